@@ -0,0 +1,4 @@
+"""Benchmarks of parakeet, in the format of airspeed velocity (asv).
+
+Run them offline with `python -m benchmarks.run`, or with `asv run`.
+"""
@@ -0,0 +1,59 @@
+"""Benchmarks of the cube operator."""
+from benchmarks.data import dims, grid, make_data
+from parakeet.backend.pandas.stats.stratification import _basic_stats
+from parakeet.stats.cube import (
+    Cube,
+    CubeStrategy,
+    _occurrence_matrix,
+    indexed_khatri_rao,
+)
+
+_MODES = {
+    "dense": {"sparse": False},
+    "sparse": {"sparse": True},
+    "lattice": {"strategy": CubeStrategy.LATTICE},
+}
+
+
+class CubeSuite:
+    """Cube of the base statistics of each cell, as in a stratification."""
+
+    params = (grid("n_rows"), grid("n_dims"), grid("cardinality"), list(_MODES))
+    param_names = ["n_rows", "n_dims", "cardinality", "mode"]
+
+    def setup(self, n_rows, n_dims, cardinality, mode):
+        data = make_data(n_rows, n_dims, cardinality)
+        self.dims = dims(n_dims)
+        basic_stats = _basic_stats(data, self.dims, "label", ["count", "ones"])
+        self.cells = basic_stats[basic_stats["count"] > 0].reset_index()
+
+    def _cube(self, mode):
+        cube = Cube(self.cells, self.dims, **_MODES[mode])
+        return cube.array(self.cells[["count", "ones"]])
+
+    def time_cube(self, n_rows, n_dims, cardinality, mode):
+        self._cube(mode)
+
+    def peakmem_cube(self, n_rows, n_dims, cardinality, mode):
+        self._cube(mode)
+
+    def track_total(self, n_rows, n_dims, cardinality, mode):
+        return int(self._cube(mode).total("ones"))
+
+
+class KhatriRaoSuite:
+    """Indexed Khatri-Rao product of the occurrence matrices of two dims."""
+
+    params = (grid("n_rows"), grid("cardinality"))
+    param_names = ["n_rows", "cardinality"]
+
+    def setup(self, n_rows, cardinality):
+        data = make_data(n_rows, 2, cardinality)
+        self.m1 = _occurrence_matrix(data["d0"])
+        self.m2 = _occurrence_matrix(data["d1"])
+
+    def time_indexed_khatri_rao(self, n_rows, cardinality):
+        indexed_khatri_rao(self.m1, self.m2)
+
+    def peakmem_indexed_khatri_rao(self, n_rows, cardinality):
+        indexed_khatri_rao(self.m1, self.m2)
@@ -0,0 +1,38 @@
+"""Benchmarks of frequency tables."""
+from benchmarks.data import dims, grid, make_data
+from parakeet.backend.pandas.dataset import PandasDataset
+from parakeet.backend.pandas.stats.frequency import frequency
+
+
+class FrequencySuite:
+    params = (grid("n_rows"), grid("n_dims"), grid("cardinality"), [None, 10])
+    param_names = ["n_rows", "n_dims", "cardinality", "top_k"]
+
+    def setup(self, n_rows, n_dims, cardinality, top_k):
+        self.data = make_data(n_rows, n_dims, cardinality)
+        self.dims = dims(n_dims)
+
+    def _frequency(self, top_k):
+        # A new dataset, so that cached group keys are not reused.
+        return frequency(PandasDataset(self.data), self.dims, top_k=top_k)
+
+    def time_frequency(self, n_rows, n_dims, cardinality, top_k):
+        self._frequency(top_k)
+
+    def peakmem_frequency(self, n_rows, n_dims, cardinality, top_k):
+        self._frequency(top_k)
+
+    def track_cells(self, n_rows, n_dims, cardinality, top_k):
+        return len(self._frequency(top_k).data)
+
+
+class FrequencyDisplaySuite:
+    params = (grid("n_dims"), grid("cardinality"), [None, 10])
+    param_names = ["n_dims", "cardinality", "top_k"]
+
+    def setup(self, n_dims, cardinality, top_k):
+        data = make_data(grid("n_rows")[0], n_dims, cardinality)
+        self.result = frequency(PandasDataset(data), dims(n_dims))
+
+    def time_display(self, n_dims, cardinality, top_k):
+        self.result.display(top_k=top_k).to_html()
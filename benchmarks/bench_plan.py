@@ -0,0 +1,40 @@
+"""Benchmarks of logical plans."""
+from benchmarks.data import dims, grid, make_data
+from parakeet.backend.pandas.dataset import PandasDataset
+from parakeet.backend.pandas.ops.aggregations.numeric1d import PandasNumeric1d
+from parakeet.core.ops.agg import Agg
+from parakeet.core.ops.aggregations import Numeric1dAggFn
+from parakeet.core.ops.groupby import GroupBy
+from parakeet.core.ops.op import Seq
+from parakeet.core.ops.project import Project
+
+
+class PlanSuite:
+    """Projection, group by and aggregation, with and without the optimizer."""
+
+    params = (grid("n_rows"), grid("n_dims"), grid("cardinality"), [True, False])
+    param_names = ["n_rows", "n_dims", "cardinality", "optimize"]
+
+    def setup(self, n_rows, n_dims, cardinality, optimize):
+        self.dataset = PandasDataset(make_data(n_rows, n_dims, cardinality))
+        by = dims(n_dims)
+        self.plan = Seq(
+            [
+                Project(by + ["label", "value"]),
+                GroupBy(by),
+                Agg(
+                    [
+                        PandasNumeric1d("value", Numeric1dAggFn.SUM),
+                        PandasNumeric1d("value", Numeric1dAggFn.MEAN),
+                        PandasNumeric1d("label", Numeric1dAggFn.COUNT),
+                    ]
+                ),
+            ],
+            optimize=optimize,
+        )
+
+    def time_seq(self, n_rows, n_dims, cardinality, optimize):
+        self.plan.transform(self.dataset)
+
+    def peakmem_seq(self, n_rows, n_dims, cardinality, optimize):
+        self.plan.transform(self.dataset)
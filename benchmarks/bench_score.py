@@ -0,0 +1,26 @@
+"""Benchmarks of score summaries, exact and binned."""
+from benchmarks.data import dims, grid, make_data
+from parakeet.backend.pandas.stats.score import score_summary
+
+
+class ScoreSummarySuite:
+    params = (grid("n_rows"), grid("cardinality"), [None, 1000])
+    param_names = ["n_rows", "cardinality", "bins"]
+
+    def setup(self, n_rows, cardinality, bins):
+        data = make_data(n_rows, 1, cardinality)
+        # Score informative of the label.
+        self.data = data.assign(score=data["value"] + data["label"])
+        self.by = dims(1)
+
+    def _summary(self, bins):
+        return score_summary(self.data, "score", "label", by=self.by, bins=bins)
+
+    def time_score_summary(self, n_rows, cardinality, bins):
+        self._summary(bins)
+
+    def peakmem_score_summary(self, n_rows, cardinality, bins):
+        self._summary(bins)
+
+    def track_auc(self, n_rows, cardinality, bins):
+        return round(float(self._summary(bins).summary["auc"].mean()), 6)
@@ -0,0 +1,68 @@
+"""Benchmarks of stratification."""
+from benchmarks.data import dims, grid, make_data
+from parakeet.backend.pandas.stats.stratification import stratification
+from parakeet.stats.stratification import LabelType
+
+
+class StratificationSuite:
+    params = (
+        grid("n_rows"),
+        grid("n_dims"),
+        grid("cardinality"),
+        grid("imbalance"),
+        [False, True],
+    )
+    param_names = ["n_rows", "n_dims", "cardinality", "imbalance", "sparse"]
+
+    def setup(self, n_rows, n_dims, cardinality, imbalance, sparse):
+        self.data = make_data(n_rows, n_dims, cardinality, imbalance)
+        self.dims = dims(n_dims)
+
+    def _stratify(self, sparse):
+        return stratification(self.data, self.dims, "label", sparse=sparse)
+
+    def time_stratification(self, n_rows, n_dims, cardinality, imbalance, sparse):
+        self._stratify(sparse)
+
+    def peakmem_stratification(self, n_rows, n_dims, cardinality, imbalance, sparse):
+        self._stratify(sparse)
+
+    def track_information_value(self, n_rows, n_dims, cardinality, imbalance, sparse):
+        return round(self._stratify(sparse).information_value(), 9)
+
+
+class StratificationLabelSuite:
+    """Stratification of each type of label, with 10 classes if multiclass."""
+
+    params = (grid("n_rows"), grid("n_dims"), list(LabelType))
+    param_names = ["n_rows", "n_dims", "label_type"]
+
+    def setup(self, n_rows, n_dims, label_type):
+        data = make_data(n_rows, n_dims, grid("cardinality")[0])
+        classes = (data["value"].rank(pct=True) * 10).astype(int).clip(0, 9)
+        self.data = data.assign(classes=classes)
+        self.dims = dims(n_dims)
+        self.label = {"binary": "label", "multiclass": "classes"}.get(
+            label_type, "value"
+        )
+
+    def _stratify(self, label_type):
+        return stratification(self.data, self.dims, self.label, label_type=label_type)
+
+    def time_stratification(self, n_rows, n_dims, label_type):
+        self._stratify(label_type)
+
+    def peakmem_stratification(self, n_rows, n_dims, label_type):
+        self._stratify(label_type)
+
+
+class StratificationDisplaySuite:
+    params = (grid("n_dims"), grid("cardinality"))
+    param_names = ["n_dims", "cardinality"]
+
+    def setup(self, n_dims, cardinality):
+        data = make_data(grid("n_rows")[0], n_dims, cardinality)
+        self.result = stratification(data, dims(n_dims), "label", sparse=True)
+
+    def time_display(self, n_dims, cardinality):
+        self.result.display().to_html()
@@ -0,0 +1,70 @@
+"""Synthetic data sets for the benchmarks.
+
+Parameter grids depend on the profile given by the `PARAKEET_BENCH_PROFILE`
+environment variable: "quick" (the default) runs in a few minutes, and
+"full" sweeps up to 1e8 rows and 10 dimensions, to find where each
+implementation stops scaling.
+"""
+import os
+from functools import lru_cache
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+PROFILE = os.environ.get("PARAKEET_BENCH_PROFILE", "quick")
+
+_GRIDS = {
+    "quick": {
+        "n_rows": [10_000, 100_000],
+        "n_dims": [1, 3],
+        "cardinality": [10, 100],
+        "imbalance": [0.5],
+    },
+    "full": {
+        "n_rows": [10_000, 100_000, 1_000_000, 10_000_000, 100_000_000],
+        "n_dims": [1, 2, 5, 10],
+        "cardinality": [10, 100, 1000],
+        "imbalance": [0.5, 0.01],
+    },
+}
+if PROFILE not in _GRIDS:
+    raise ValueError(f"Unknown benchmark profile {PROFILE}.")
+
+
+def grid(name: str) -> list:
+    """Values of a parameter in the current profile."""
+    return _GRIDS[PROFILE][name]
+
+
+def dims(n_dims: int) -> List[str]:
+    return [f"d{i}" for i in range(n_dims)]
+
+
+@lru_cache(maxsize=4)
+def make_data(
+    n_rows: int,
+    n_dims: int,
+    cardinality: int,
+    imbalance: float = 0.5,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """Rows with `n_dims` string dimensions and a binary label.
+
+    Values of each dimension follow a Zipf-like distribution over
+    `cardinality` values, as real categorical data does, and the label is 1
+    with probability `imbalance`.
+    """
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, cardinality + 1)
+    weights /= weights.sum()
+    values = pd.Index([f"v{i}" for i in range(cardinality)])
+    data = {
+        dim: pd.Categorical.from_codes(
+            rng.choice(cardinality, size=n_rows, p=weights), values
+        ).astype(str)
+        for dim in dims(n_dims)
+    }
+    data["label"] = (rng.random(n_rows) < imbalance).astype(np.int64)
+    data["value"] = rng.normal(size=n_rows)
+    return pd.DataFrame(data)
@@ -0,0 +1,237 @@
+"""Run the benchmarks offline, without asv.
+
+Benchmarks are discovered as in asv: classes of the `bench_*` modules with
+`time_*` (wall time, in seconds), `peakmem_*` (peak resident memory, in
+bytes) and `track_*` (a value of the result, e.g. a checksum) methods,
+called with every combination of the class `params`, after `setup`.
+
+Each benchmark runs in its own process, so that peak memory is measured
+in isolation and a benchmark running out of memory or time only fails
+itself. Failures are reported as scaling breakpoints: the first, smallest
+parameters at which a benchmark fails, given its other parameters.
+
+Usage::
+
+    python -m benchmarks.run [-b REGEX] [-o results.json] [--baseline FILE]
+        [--max-memory GB] [--timeout SECONDS] [--threshold RATIO]
+
+With `--baseline`, timings and peak memory are compared with a stored run,
+and tracked values must match it exactly. The exit status is 1 if anything
+regressed.
+"""
+import argparse
+import importlib
+import itertools
+import json
+import os
+import pkgutil
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import benchmarks
+
+_KINDS = {"time": "s", "peakmem": "B", "track": ""}
+
+
+def discover(pattern: str = "") -> Iterator[Tuple[str, tuple]]:
+    """Name and parameters of each benchmark matching `pattern`."""
+    regex = re.compile(pattern)
+    for module_info in pkgutil.iter_modules(benchmarks.__path__):
+        if not module_info.name.startswith("bench_"):
+            continue
+        module = importlib.import_module(f"benchmarks.{module_info.name}")
+        for cls_name, cls in vars(module).items():
+            if not isinstance(cls, type) or cls.__module__ != module.__name__:
+                continue
+            params = getattr(cls, "params", ())
+            if len(params) > 0 and not isinstance(params[0], list):
+                params = (params,)
+            for method in dir(cls):
+                if method.split("_")[0] not in _KINDS:
+                    continue
+                name = f"{module_info.name}.{cls_name}.{method}"
+                if regex.search(name):
+                    for combination in itertools.product(*params):
+                        yield name, combination
+
+
+def measure(name: str, params: tuple, repeat: int = 5) -> Dict:
+    """Run a benchmark in the current process."""
+    module, cls_name, method = name.split(".")
+    cls = getattr(importlib.import_module(f"benchmarks.{module}"), cls_name)
+    instance = cls()
+    if hasattr(instance, "setup"):
+        instance.setup(*params)
+    fn = getattr(instance, method)
+    kind = method.split("_")[0]
+
+    if kind == "track":
+        return {"value": fn(*params)}
+    if kind == "peakmem":
+        fn(*params)
+        # Kilobytes on Linux, bytes on macOS.
+        scale = 1 if sys.platform == "darwin" else 1024
+        return {"value": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale}
+
+    timings = []
+    deadline = time.perf_counter() + 1.0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*params)
+        timings.append(time.perf_counter() - start)
+        if time.perf_counter() > deadline:
+            break
+    return {"value": min(timings), "median": statistics.median(timings)}
+
+
+def run(
+    name: str,
+    params: tuple,
+    timeout: Optional[float] = None,
+    max_memory: Optional[float] = None,
+) -> Dict:
+    """Run a benchmark in a new process, with limits on time and memory."""
+    command = [sys.executable, "-m", "benchmarks.run", "--worker", name]
+    command += ["--params", json.dumps(params)]
+    if max_memory is not None:
+        command += ["--max-memory", str(max_memory)]
+    try:
+        process = subprocess.run(
+            command, capture_output=True, text=True, timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        return {"error": f"timeout after {timeout}s"}
+    if process.returncode != 0:
+        lines = (process.stderr or "killed").strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit {process.returncode}"}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def breakpoints(results: Dict[str, Dict]) -> List[str]:
+    """First failing parameters of each benchmark, given the others.
+
+    Parameters are swept in increasing order, so a failure whose smaller
+    neighbours succeed marks where an implementation stops scaling.
+    """
+    found = []
+    for key, result in results.items():
+        if "error" not in result:
+            continue
+        name, params = result["name"], result["params"]
+        smaller_failed = False
+        for i in range(len(params)):
+            for other in results.values():
+                if (
+                    other["name"] == name
+                    and "error" in other
+                    and other["params"][:i] + other["params"][i + 1 :]
+                    == params[:i] + params[i + 1 :]
+                    and _before(other["params"][i], params[i])
+                ):
+                    smaller_failed = True
+        if not smaller_failed:
+            found.append(f"{key}: {result['error']}")
+    return found
+
+
+def compare(
+    results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float
+) -> List[str]:
+    """Regressions of `results` against a baseline run."""
+    regressions = []
+    for key, result in results.items():
+        base = baseline.get(key)
+        if base is None or "value" not in base:
+            continue
+        kind = result["name"].split(".")[-1].split("_")[0]
+        if "error" in result:
+            regressions.append(f"{key}: fails ({result['error']}), baseline passed")
+        elif kind == "track":
+            if result["value"] != base["value"]:
+                regressions.append(
+                    f"{key}: {result['value']!r} != baseline {base['value']!r}"
+                )
+        elif base["value"] > 0 and result["value"] / base["value"] > threshold:
+            ratio = result["value"] / base["value"]
+            regressions.append(f"{key}: {ratio:.2f}x the baseline")
+    return regressions
+
+
+def _before(a, b) -> bool:
+    try:
+        return a < b
+    except TypeError:
+        return False
+
+
+def _key(name: str, params: tuple) -> str:
+    return f"{name}({', '.join(map(repr, params))})"
+
+
+def _format(value, unit: str) -> str:
+    if unit == "s":
+        return f"{value * 1e3:10.2f} ms"
+    if unit == "B":
+        return f"{value / 2**20:10.1f} MB"
+    return f"{value!r:>13}"
+
+
+def _worker(args) -> None:
+    if args.max_memory is not None:
+        limit = int(args.max_memory * 2**30)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    params = tuple(json.loads(args.params))
+    print(json.dumps(measure(args.worker, params)))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-b", "--bench", default="", help="regex of benchmarks")
+    parser.add_argument("-o", "--output", help="file to save the results to")
+    parser.add_argument("--baseline", help="results of a run to compare with")
+    parser.add_argument("--threshold", type=float, default=1.5)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--max-memory", type=float, help="memory limit, in GB")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--params", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.worker is not None:
+        _worker(args)
+        return 0
+
+    results = {}
+    for name, params in discover(args.bench):
+        key = _key(name, params)
+        result = run(name, params, args.timeout, args.max_memory)
+        result.update(name=name, params=list(params))
+        results[key] = result
+        unit = _KINDS[name.split(".")[-1].split("_")[0]]
+        shown = result["error"] if "error" in result else _format(result["value"], unit)
+        print(f"{key:<90} {shown}", flush=True)
+
+    if args.output is not None:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+
+    failed = breakpoints(results)
+    if len(failed) > 0:
+        print("\nScaling breakpoints:")
+        print("\n".join(f"  {line}" for line in failed))
+
+    regressions = []
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        print(f"\nRegressions against {args.baseline}: {len(regressions)}")
+        print("\n".join(f"  {line}" for line in regressions))
+    return 1 if len(regressions) > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
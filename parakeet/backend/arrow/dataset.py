@@ -0,0 +1,262 @@
+"""Datasets backed by Arrow IPC or Parquet files, read column by column.
+
+Only the columns an operation or analysis reads are loaded, into a
+`PandasDataset` that runs it. Arrow IPC files are memory-mapped, so that
+loading a numeric column without missing values from an uncompressed file
+maps its pages rather than copying them. Columns of compressed IPC files are
+decompressed, and Parquet files decoded, only when they are read.
+"""
+import os
+from typing import Iterable, Iterator, List, Optional, Union
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as fs
+from pandas import DataFrame, Series
+
+from parakeet.backend.pandas.dataset import PandasDataset
+from parakeet.backend.pandas.stats.kernel import DEFAULT_CACHE_BYTES, GroupIndexCache
+from parakeet.core.dataset import Dataset, DesiredSchema, DType, Field, Fn, Schema
+from parakeet.core.ops.partial import PartialAgg
+
+_FORMATS = {"arrow": "ipc", "feather": "ipc", "ipc": "ipc", "parquet": "parquet"}
+
+
+class ArrowDataset(Dataset):
+    """Dataset backed by Arrow IPC or Parquet files.
+
+    Nothing is read on creation: the schema comes from the file metadata,
+    and each aggregation loads the columns it reads, and only those. Use
+    `select` to project the dataset, and `to_pandas` or `batches` to read
+    it. Group keys factorized by an analysis are cached, and reused by later
+    analyses grouping by the same columns.
+
+    Parameters
+    ----------
+    source : pyarrow.Table | pyarrow.dataset.Dataset
+        Memory-mapped table or files of the dataset, e.g. from `open_ipc` or
+        `open_parquet`.
+    time : str, optional
+        Time column of the dataset.
+    columns : list[str], optional
+        Columns of the dataset, by default every column of the files.
+    cache_bytes : int, optional
+        Memory budget of the group key cache, by default
+        `DEFAULT_CACHE_BYTES`.
+    cache : GroupIndexCache, optional
+        Group key cache to use instead of a new one, e.g. the cache of other
+        projections of the same files.
+    """
+
+    def __init__(
+        self,
+        source: Union[pa.Table, ds.Dataset],
+        time: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        cache_bytes: int = DEFAULT_CACHE_BYTES,
+        cache: Optional[GroupIndexCache] = None,
+    ) -> None:
+        self._source = source
+        self._time = time
+        self._columns = list(source.schema.names)
+        if columns is not None:
+            self._columns = self._project(columns)
+        self._schema: Optional[Schema] = None
+        self._cache = GroupIndexCache(cache_bytes) if cache is None else cache
+
+    @classmethod
+    def open(cls, path: str, time: Optional[str] = None, **kwargs) -> "ArrowDataset":
+        """Open Arrow IPC or Parquet files, given their extension.
+
+        `path` is a file or a directory of files. Arrow IPC files have the
+        ".arrow", ".feather" or ".ipc" extension.
+        """
+        extension = _files(path)[0].rsplit(".", 1)[-1].lower()
+        if extension not in _FORMATS:
+            raise ValueError(f"Unknown format of {path}, use open_ipc or open_parquet.")
+        if _FORMATS[extension] == "ipc":
+            return cls.open_ipc(path, time, **kwargs)
+        return cls.open_parquet(path, time, **kwargs)
+
+    @classmethod
+    def open_ipc(
+        cls, path: str, time: Optional[str] = None, **kwargs
+    ) -> "ArrowDataset":
+        """Memory-map Arrow IPC files, a file or a directory of files.
+
+        Pages of the files are only read when their columns are, and columns
+        of compressed files are only decompressed when they are read. Zero-copy
+        loading only applies to uncompressed files: their numeric columns
+        without missing values are loaded without copies when each file holds
+        a single record batch.
+        """
+        filesystem = fs.LocalFileSystem(use_mmap=True)
+        return cls(
+            ds.dataset(path, format="ipc", filesystem=filesystem), time, **kwargs
+        )
+
+    @classmethod
+    def open_parquet(
+        cls, path: str, time: Optional[str] = None, **kwargs
+    ) -> "ArrowDataset":
+        """Open Parquet files, a file or a directory of files."""
+        return cls(ds.dataset(path, format="parquet"), time, **kwargs)
+
+    @property
+    def source(self) -> Union[pa.Table, ds.Dataset]:
+        return self._source
+
+    @property
+    def columns(self) -> List[str]:
+        return self._columns
+
+    @property
+    def cache(self) -> GroupIndexCache:
+        return self._cache
+
+    @property
+    def schema(self) -> Schema:
+        if self._schema is None:
+            arrow_schema = self._source.schema
+            self._schema = Schema(
+                Field(name, _dtype_from_arrow(arrow_schema.field(name).type))
+                for name in self._columns
+            )
+        return self._schema
+
+    def shape(self):
+        # Parquet and IPC files store their number of rows in their metadata.
+        if isinstance(self._source, pa.Table):
+            return (self._source.num_rows, len(self._columns))
+        return (self._source.count_rows(), len(self._columns))
+
+    @property
+    def time(self):
+        return self._time
+
+    def select(self, columns: List[str]) -> "ArrowDataset":
+        """Project the dataset on `columns`, without reading them."""
+        return ArrowDataset(self._source, self._time, columns, cache=self._cache)
+
+    def to_pandas(self, columns: Optional[List[str]] = None) -> PandasDataset:
+        """Load columns into a `PandasDataset`, by default every column.
+
+        Numeric columns without missing values are not copied from a
+        memory-mapped file. The dataset shares the group key cache of this
+        one.
+        """
+        columns = self._columns if columns is None else self._project(columns)
+        if isinstance(self._source, pa.Table):
+            table = self._source.select(columns)
+        else:
+            table = self._source.to_table(columns=columns)
+        data = DataFrame(
+            {name: _to_pandas(table.column(name)) for name in columns}, copy=False
+        )
+        return PandasDataset(data, self._time, cache=self._cache)
+
+    def batches(
+        self, columns: Optional[List[str]] = None, batch_size: int = 1_000_000
+    ) -> Iterator[DataFrame]:
+        """Read columns in chunks of at most `batch_size` rows.
+
+        Row groups are read lazily, e.g. for the chunked analyses of
+        `parakeet.backend.pandas.stats`.
+        """
+        columns = self._columns if columns is None else self._project(columns)
+        if isinstance(self._source, pa.Table):
+            batches = self._source.select(columns).to_batches(batch_size)
+        else:
+            batches = self._source.to_batches(columns=columns, batch_size=batch_size)
+        for batch in batches:
+            yield batch.to_pandas()
+
+    def groupby(self, by: List[str]) -> "Dataset":
+        return ArrowGroupByDataset(self, by)
+
+    def agg(self, desired: DesiredSchema) -> "Dataset":
+        return self.to_pandas(_inputs(desired)).agg(desired)
+
+    def groupby_agg(self, by: List[str], desired: DesiredSchema) -> "Dataset":
+        return self.to_pandas(by + _inputs(desired)).groupby_agg(by, desired)
+
+    def partial_agg(self, by: List[str], desired: DesiredSchema) -> PartialAgg:
+        return self.to_pandas(by + _inputs(desired)).partial_agg(by, desired)
+
+    def _project(self, columns: Iterable[str]) -> List[str]:
+        columns = list(dict.fromkeys(columns))
+        missing = [c for c in columns if c not in self._columns]
+        if len(missing) > 0:
+            raise ValueError(f"Columns {missing} are not in the dataset.")
+        return columns
+
+
+class ArrowGroupByDataset(Dataset):
+    """Arrow dataset grouped by columns, read once it is aggregated."""
+
+    def __init__(self, dataset: ArrowDataset, groups: List[str]) -> None:
+        self._dataset = dataset
+        self.groups = list(groups)
+
+    @property
+    def schema(self) -> Schema:
+        return self._dataset.schema
+
+    def shape(self):
+        return self._dataset.shape()
+
+    @property
+    def time(self):
+        return self._dataset.time
+
+    def groupby(self, _: List[str]) -> "Dataset":
+        raise NotImplementedError("groupby is not supported for grouped dataset.")
+
+    def agg(self, desired: DesiredSchema) -> "Dataset":
+        return self._dataset.groupby_agg(self.groups, desired)
+
+
+def _files(path: str) -> List[str]:
+    """A file, or the files of a directory, in order."""
+    path = str(path)
+    if not os.path.isdir(path):
+        return [path]
+    files = [os.path.join(path, name) for name in sorted(os.listdir(path))]
+    if len(files) == 0:
+        raise ValueError(f"Directory {path} has no files.")
+    return files
+
+
+def _inputs(desired: DesiredSchema) -> List[str]:
+    """Columns read by the aggregation functions of a desired schema."""
+    return [f.input_column for f in desired if isinstance(f, Fn)]
+
+
+def _to_pandas(column: pa.ChunkedArray) -> Series:
+    """Column as a pandas series, sharing its buffer when possible."""
+    dtype = column.type
+    numeric = pa.types.is_integer(dtype) or pa.types.is_floating(dtype)
+    if numeric and column.num_chunks == 1 and column.null_count == 0:
+        return Series(column.chunk(0).to_numpy(zero_copy_only=True), copy=False)
+    return column.to_pandas()
+
+
+def _dtype_from_arrow(dtype: pa.DataType) -> DType:
+    if pa.types.is_int32(dtype):
+        return DType.INT32
+    elif pa.types.is_int64(dtype):
+        return DType.INT64
+    elif pa.types.is_float32(dtype):
+        return DType.FLOAT32
+    elif pa.types.is_float64(dtype):
+        return DType.FLOAT64
+    elif pa.types.is_string(dtype) or pa.types.is_large_string(dtype):
+        return DType.STRING
+    elif pa.types.is_boolean(dtype):
+        return DType.BOOL
+    elif pa.types.is_timestamp(dtype) or pa.types.is_date(dtype):
+        return DType.DATETIME
+    elif pa.types.is_dictionary(dtype):
+        return DType.CATEGORICAL
+    else:
+        raise ValueError(f"Unknown dtype {dtype}")
@@ -0,0 +1,149 @@
+"""Test Arrow-backed datasets against the pandas implementation."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+pa = pytest.importorskip("pyarrow")
+
+import pyarrow.feather as feather  # noqa: E402
+import pyarrow.parquet as pq  # noqa: E402
+
+from parakeet.backend.arrow.dataset import ArrowDataset  # noqa: E402
+from parakeet.backend.pandas.dataset import PandasDataset  # noqa: E402
+from parakeet.backend.pandas.ops.aggregations.numeric1d import (  # noqa: E402
+    PandasNumeric1d,
+)
+from parakeet.backend.pandas.stats.frequency import frequency  # noqa: E402
+from parakeet.backend.pandas.stats.stratification import (  # noqa: E402
+    stratification,
+    stratification_chunked,
+)
+from parakeet.core.dataset import DType  # noqa: E402
+from parakeet.core.ops.agg import Agg  # noqa: E402
+from parakeet.core.ops.aggregations import Numeric1dAggFn  # noqa: E402
+from parakeet.core.ops.groupby import GroupBy  # noqa: E402
+from parakeet.core.ops.op import Seq  # noqa: E402
+
+
+@pytest.fixture
+def sample_data():
+    rng = np.random.default_rng(5)
+    n = 1000
+    data = pd.DataFrame(
+        {
+            "A": rng.choice(["a", "b", "c"], n),
+            "B": rng.integers(0, 4, n),
+            "label": rng.integers(0, 2, n),
+            "value": rng.normal(size=n),
+        }
+    )
+    # Wide table, of which analyses only read a few columns.
+    wide = {f"x{i}": rng.normal(size=n) for i in range(50)}
+    return data.assign(**wide)
+
+
+@pytest.fixture(params=["arrow", "parquet"])
+def dataset(request, sample_data, tmp_path):
+    path = str(tmp_path / f"data.{request.param}")
+    table = pa.Table.from_pandas(sample_data, preserve_index=False)
+    if request.param == "arrow":
+        feather.write_feather(table, path, compression="uncompressed")
+    else:
+        pq.write_table(table, path, row_group_size=128)
+    return ArrowDataset.open(path)
+
+
+def test_schema(dataset, sample_data):
+    assert dataset.schema.names == tuple(sample_data.columns)
+    assert dataset.schema["A"].dtype == DType.STRING
+    assert dataset.schema["B"].dtype == DType.INT64
+    assert dataset.shape() == sample_data.shape
+
+    projected = dataset.select(["label", "A"])
+    assert projected.schema.names == ("label", "A")
+    assert projected.shape() == (len(sample_data), 2)
+    with pytest.raises(ValueError):
+        dataset.select(["missing"])
+
+
+def test_to_pandas(dataset, sample_data):
+    loaded = dataset.to_pandas(["A", "value"])
+    assert isinstance(loaded, PandasDataset)
+    assert list(loaded.data.columns) == ["A", "value"]
+    assert_frame_equal(loaded.data, sample_data[["A", "value"]], check_dtype=False)
+    chunks = list(dataset.batches(["B"], batch_size=300))
+    assert max(len(chunk) for chunk in chunks) <= 300
+    assert pd.concat(chunks, ignore_index=True)["B"].equals(sample_data["B"])
+
+
+@pytest.mark.parametrize("by", [["A"], ["A", "B"]])
+def test_groupby_agg(dataset, sample_data, by):
+    plan = Seq(
+        [
+            GroupBy(by),
+            Agg(
+                [
+                    PandasNumeric1d("value", Numeric1dAggFn.SUM),
+                    PandasNumeric1d("value", Numeric1dAggFn.MEAN),
+                ]
+            ),
+        ]
+    )
+    expected = plan.transform(PandasDataset(sample_data)).data
+    assert_frame_equal(plan.transform(dataset).data, expected)
+    unfused = Seq(plan.ops, optimize=False)
+    assert_frame_equal(unfused.transform(dataset).data, expected)
+
+
+def test_analyses(dataset, sample_data):
+    assert_frame_equal(
+        stratification(dataset, ["A", "B"], "label").data,
+        stratification(sample_data, ["A", "B"], "label").data,
+        check_index_type=False,
+    )
+    # Groups factorized by an analysis are reused by the next one.
+    misses = dataset.cache.misses
+    stratification(dataset, ["A", "B"], "label")
+    assert dataset.cache.misses == misses
+
+    assert_frame_equal(
+        frequency(dataset, ["A"]).data,
+        frequency(PandasDataset(sample_data), ["A"]).data,
+    )
+    chunked = stratification_chunked(
+        dataset.batches(["A", "label"], batch_size=256), ["A"], "label"
+    )
+    assert_frame_equal(chunked.data, stratification(sample_data, ["A"], "label").data)
+
+
+def test_zero_copy(tmp_path):
+    path = str(tmp_path / "data.arrow")
+    values = np.arange(100_000, dtype=np.float64)
+    table = pa.table({"value": values, "other": values})
+    feather.write_feather(
+        table, path, compression="uncompressed", chunksize=len(values)
+    )
+
+    pool = pa.default_memory_pool()
+    before = pool.bytes_allocated()
+    loaded = ArrowDataset.open_ipc(path).to_pandas(["value"])
+    # The column maps the pages of the file rather than copying them.
+    assert pool.bytes_allocated() - before < values.nbytes
+    assert loaded.data["value"].to_numpy()[-1] == values[-1]
+
+
+def test_compressed_ipc_reads_only_projected_columns(tmp_path):
+    path = str(tmp_path / "data.arrow")
+    rng = np.random.default_rng(0)
+    table = pa.table({f"x{i}": rng.normal(size=100_000) for i in range(8)})
+    feather.write_feather(table, path, compression="zstd")
+
+    pool = pa.default_memory_pool()
+    before = pool.bytes_allocated()
+    dataset = ArrowDataset.open_ipc(path)
+    loaded = dataset.to_pandas(["x0"])
+    # Only the projected column is decompressed, with some scratch space.
+    assert pool.bytes_allocated() - before < 4 * table.column("x0").nbytes
+    np.testing.assert_array_equal(loaded.data["x0"], table.column("x0").to_numpy())
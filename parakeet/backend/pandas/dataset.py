@@ -1,29 +1,99 @@
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from pandas import DataFrame, NamedAgg
+import numpy as np
+from pandas import (
+    Categorical,
+    CategoricalDtype,
+    DataFrame,
+    Index,
+    NamedAgg,
+    StringDtype,
+)
 from pandas.core.groupby.generic import DataFrameGroupBy
 
+from parakeet.backend.pandas.stats.kernel import (
+    DEFAULT_CACHE_BYTES,
+    GroupIndexCache,
+    Groups,
+    factorize_groups,
+)
 from parakeet.core.dataset import Dataset, DesiredSchema, DType, Field, Fn, Schema
+from parakeet.core.ops.partial import PartialAgg
 
 # TODO: We can later ensure that the desired schema is being followed
 # by checking the schema of the resulting dataset versus the desired.
 
 
 class PandasDataset(Dataset):
-    def __init__(self, data: DataFrame, time: Optional[str] = None):
+    """Dataset backed by a pandas `DataFrame`.
+
+    Factorized group keys are cached, so that analyses grouping by the same
+    dimensions, or by a subset of them, do not factorize them again.
+
+    Parameters
+    ----------
+    data : DataFrame
+        Data of the dataset.
+    time : str, optional
+        Time column of the dataset.
+    cache_bytes : int, optional
+        Memory budget of the group key cache, by default
+        `DEFAULT_CACHE_BYTES`. 0 disables the cache.
+    cache : GroupIndexCache, optional
+        Group key cache to use instead of a new one, e.g. the cache of other
+        projections of the same rows.
+    """
+
+    def __init__(
+        self,
+        data: DataFrame,
+        time: Optional[str] = None,
+        cache_bytes: int = DEFAULT_CACHE_BYTES,
+        cache: Optional[GroupIndexCache] = None,
+    ):
         self._data = data
         self._time = time
+        self._schema: Optional[Schema] = None
+        self._cache = GroupIndexCache(cache_bytes) if cache is None else cache
 
     @property
     def data(self):
         return self._data
 
+    @data.setter
+    def data(self, data: DataFrame):
+        self._data = data
+        self.invalidate()
+
+    @property
+    def cache(self) -> GroupIndexCache:
+        return self._cache
+
+    def invalidate(self) -> None:
+        """Drop everything derived from the data.
+
+        Replacing `data` invalidates the dataset automatically; this is only
+        needed after modifying the frame in place.
+        """
+        self._schema = None
+        self._cache.clear()
+
+    def group_index(self, dims: List[str], observed: bool = True) -> Groups:
+        """Group the rows by the given dimensions, using the cache.
+
+        See `parakeet.backend.pandas.stats.kernel.factorize_groups`.
+        """
+        return factorize_groups(self._data, dims, observed, self._cache)
+
     @property
     def schema(self) -> Schema:
-        return [
-            Field(name, _dtype_from_pandas(dtype))
-            for (name, dtype) in self.data.dtypes.items()
-        ]
+        # Built once: datasets are not expected to change after creation.
+        if self._schema is None:
+            self._schema = Schema(
+                Field(name, _dtype_from_pandas(dtype))
+                for (name, dtype) in self.data.dtypes.items()
+            )
+        return self._schema
 
     def shape(self):
         return self._data.shape
@@ -32,13 +102,114 @@ class PandasDataset(Dataset):
     def time(self):
         return self._time
 
+    @property
+    def dictionary(self) -> Dict[str, Index]:
+        """Dictionary of values of each categorical column."""
+        return {
+            f.name: self._data[f.name].cat.categories
+            for f in self.schema
+            if f.dtype == DType.CATEGORICAL
+        }
+
+    def encode(
+        self,
+        columns: Optional[List[str]] = None,
+        dictionary: Optional[Dict[str, Iterable]] = None,
+    ) -> "PandasDataset":
+        """Dictionary-encode columns as categoricals.
+
+        Each distinct value is stored once, in sorted order, and rows only
+        hold its integer code, using the smallest integer type that fits
+        (int8 up to 127 values, int16 up to 32,767, ...). Frequencies,
+        stratifications and cubes group by the codes directly, without
+        hashing or comparing values again.
+
+        Analyses keep every value of the dictionary, as in
+        `groupby(observed=False)`: values that do not occur in the data are
+        reported with zero counts.
+
+        Parameters
+        ----------
+        columns : list[str], optional
+            Columns to encode, by default every string column.
+        dictionary : dict[str, Iterable], optional
+            Values to include in the dictionary of some columns, besides
+            their own. Passing the `dictionary` of another dataset, e.g. a
+            previous partition, gives both datasets the same codes.
+
+        Returns
+        -------
+        PandasDataset
+            Dataset whose encoded columns have the `DType.CATEGORICAL` type.
+
+        """
+        if columns is None:
+            columns = [f.name for f in self.schema if f.dtype == DType.STRING]
+        dictionary = dictionary or {}
+
+        encoded = {}
+        for column in columns:
+            s = self._data[column]
+            if isinstance(s.dtype, CategoricalDtype):
+                values = s.cat.categories
+            else:
+                values = Index(s.dropna().unique())
+            if column in dictionary:
+                values = values.union(Index(dictionary[column]))
+            encoded[column] = Categorical(s, categories=values.sort_values())
+        # Encoded columns are new keys, so the cache is new, with the same budget.
+        return PandasDataset(
+            self._data.assign(**encoded),
+            self._time,
+            cache_bytes=self._cache.max_bytes,
+        )
+
     def groupby(self, by: List[str]) -> "Dataset":
-        return PandasGroupByDataset(self._data.groupby(by), self._time, self.schema)
+        grouped, index = self._grouped(by)
+        return PandasGroupByDataset(grouped, self._time, self.schema, by, index)
 
     def agg(self, desired: DesiredSchema) -> "Dataset":
         aggregations = _to_pandas_aggregations(desired)
         return PandasDataset(self._data.agg(**aggregations), self._time)
 
+    def select(self, columns: List[str]) -> "Dataset":
+        # Projections keep the rows, so they share the group key cache.
+        return PandasDataset(self._data[columns], self._time, cache=self._cache)
+
+    def groupby_agg(self, by: List[str], desired: DesiredSchema) -> "Dataset":
+        grouped, index = self._grouped(by)
+        aggregations = _to_pandas_aggregations(desired)
+        return PandasDataset(_agg(grouped, aggregations, index), self._time)
+
+    def partial_agg(self, by: List[str], desired: DesiredSchema) -> PartialAgg:
+        data, ids, keys = self._data, np.zeros(len(self._data), dtype=np.int64), None
+        if len(by) > 0:
+            groups = self.group_index(by)
+            data, ids, keys = _present_groups(data, groups)
+        n_groups = 1 if keys is None else len(keys)
+        states = {
+            f.name: f.state().of(data[f.input_column].to_numpy(), ids, n_groups)
+            for f in desired
+            if isinstance(f, Fn)
+        }
+        return PartialAgg(by, keys, states, _from_partial)
+
+    def _grouped(self, by: List[str]) -> Tuple[DataFrameGroupBy, Index]:
+        """Group by the cached group ids rather than by the columns.
+
+        Groups with missing keys are dropped, as in `groupby`.
+        """
+        groups = self.group_index(by)
+        keys = groups.index
+        present = ~keys.to_frame(index=False).isna().any(axis=1).to_numpy()
+        data, ids = self._data, groups.ids
+        if not present.all():
+            rows = present[ids]
+            data, ids = data[rows], ids[rows]
+        if len(by) == 1:
+            keys = keys.get_level_values(0)
+        return data.groupby(ids), keys
+
 
 class PandasGroupByDataset(Dataset):
     def __init__(
@@ -46,11 +217,15 @@ class PandasGroupByDataset(Dataset):
         data: DataFrameGroupBy,
         time: str,
         schema: Schema,
+        groups: Optional[List[str]] = None,
+        index: Optional[Index] = None,
     ) -> None:
         self._data = data
         self._time = time
         self._schema = schema
-        self.groups: List[str] = list(self._data.keys)
+        # Data may be grouped by group ids, whose keys are then given by index.
+        self.groups: List[str] = list(self._data.keys) if groups is None else groups
+        self._index = index
 
     @property
     def data(self):
@@ -73,7 +248,41 @@ class PandasGroupByDataset(Dataset):
 
     def agg(self, desired: DesiredSchema) -> "Dataset":
         aggregations = _to_pandas_aggregations(desired)
-        return PandasDataset(self._data.agg(**aggregations), self._time)
+        return PandasDataset(_agg(self._data, aggregations, self._index), self._time)
+
+
+def _agg(grouped: DataFrameGroupBy, aggregations, index: Optional[Index]):
+    """Aggregate groups, replacing group ids by the keys of the groups."""
+    result = grouped.agg(**aggregations)
+    if index is not None:
+        result.index = index.take(result.index.to_numpy(dtype=np.int64))
+    return result
+
+
+def _present_groups(data: DataFrame, groups: Groups):
+    """Rows, group ids and keys of the groups without missing keys."""
+    keys, ids = groups.index, groups.ids
+    present = ~keys.to_frame(index=False).isna().any(axis=1).to_numpy()
+    if not present.all():
+        rows = present[ids]
+        data, ids = data[rows], (np.cumsum(present) - 1)[ids[rows]]
+        keys = keys[present]
+    return data, ids, keys
+
+
+def _from_partial(partial: PartialAgg) -> PandasDataset:
+    """Aggregated dataset of merged partial aggregations.
+
+    Groups are sorted by key, as with `groupby`. Without groups, the result
+    has a single row.
+    """
+    columns = partial.finalize()
+    if partial.keys is None:
+        return PandasDataset(DataFrame(columns))
+    index = partial.keys
+    if len(partial.by) == 1:
+        index = index.get_level_values(0)
+    return PandasDataset(DataFrame(columns, index=index).sort_index())
 
 
 def _dtype_from_pandas(dtype: str) -> DType:
@@ -81,8 +290,10 @@ def _dtype_from_pandas(dtype: str) -> DType:
         return DType.INT64
     elif dtype == "float64":
         return DType.FLOAT64
-    elif dtype == "object":
+    elif dtype == "object" or isinstance(dtype, StringDtype):
         return DType.STRING
+    elif isinstance(dtype, CategoricalDtype):
+        return DType.CATEGORICAL
     else:
         raise ValueError(f"Unknown dtype {dtype}")
 
@@ -0,0 +1,63 @@
+"""Read data sets in chunks, for analyses that do not fit in memory."""
+from typing import Iterator, List, Optional
+
+import pandas as pd
+
+
+def read_parquet_chunks(
+    path: str, columns: Optional[List[str]] = None, batch_size: int = 1_000_000
+) -> Iterator[pd.DataFrame]:
+    """Read a Parquet file in chunks of at most `batch_size` rows.
+
+    Requires `pyarrow`. Row groups are read lazily and only the requested
+    columns are loaded.
+
+    Parameters
+    ----------
+    path : str
+        Path of the Parquet file.
+    columns : list[str], optional
+        Columns to read, by default all columns.
+    batch_size : int, optional
+        Maximum number of rows per chunk, by default 1,000,000.
+
+    Yields
+    ------
+    pd.DataFrame
+        Chunks of the data set.
+
+    """
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading Parquet files in chunks requires pyarrow.") from e
+
+    parquet = pq.ParquetFile(path)
+    for batch in parquet.iter_batches(batch_size=batch_size, columns=columns):
+        yield batch.to_pandas()
+
+
+def read_csv_chunks(
+    path: str, columns: Optional[List[str]] = None, chunksize: int = 1_000_000, **kwargs
+) -> Iterator[pd.DataFrame]:
+    """Read a CSV file in chunks of at most `chunksize` rows.
+
+    Parameters
+    ----------
+    path : str
+        Path of the CSV file.
+    columns : list[str], optional
+        Columns to read, by default all columns.
+    chunksize : int, optional
+        Maximum number of rows per chunk, by default 1,000,000.
+    **kwargs
+        Additional arguments to `pd.read_csv`.
+
+    Yields
+    ------
+    pd.DataFrame
+        Chunks of the data set.
+
+    """
+    with pd.read_csv(path, usecols=columns, chunksize=chunksize, **kwargs) as reader:
+        yield from reader
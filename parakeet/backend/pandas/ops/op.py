@@ -1,21 +1,31 @@
-from typing import Callable, Optional
+from typing import Callable, Iterable, Optional, Set, Tuple
 
-from parakeet.core.dataset import Dataset, DType
+from parakeet.core.dataset import Dataset, DType, Field, Schema
 from parakeet.core.ops.op import Op as _Op
+from parakeet.core.ops.op import Step
 
 
 class LambdaOp(_Op):
+    """Operation applying a function to the dataset.
+
+    `fn` receives the whole dataset, so it may read any column. Unless the
+    columns it reads are declared in `reads`, no projection is pushed down
+    past the operation.
+    """
+
     def __init__(
         self,
         fn: Callable[[Dataset, str, str], Dataset],
         input_column: str,
         output_dtype: DType,
         output_column: Optional[str],
+        reads: Optional[Iterable[str]] = None,
     ) -> None:
         self.fn = fn
         self._input_column = input_column
         self._output_column = output_column
         self._output_column_dtype = output_dtype
+        self._reads = None if reads is None else set(reads) | {input_column}
 
     @property
     def input_column(self) -> str:
@@ -32,7 +42,30 @@ class LambdaOp(_Op):
     def transform(self, dataset: Dataset) -> Dataset:
         return self.fn(dataset, self._input_column, self._output_column)
 
-    def _output_schema(self, input_schema: Dataset) -> Dataset:
-        schema = input_schema[:]
-        schema[self._output_column] = self._output_column_dtype
-        return schema
+    def bind(self, schema: Schema) -> Tuple[Step, Optional[Schema]]:
+        if self._input_column not in schema:
+            raise ValueError(
+                f"Column {self._input_column} is not contained in the dataset."
+            )
+        return self.transform, self._output_schema(schema)
+
+    def required_columns(self, needed: Optional[Set[str]]) -> Optional[Set[str]]:
+        if needed is None or self._reads is None:
+            return None
+        return (needed - {self._output_column}) | self._reads
+
+    def unused(self, needed: Optional[Set[str]]) -> bool:
+        return (
+            needed is not None
+            and self._output_column is not None
+            and self._output_column not in needed
+        )
+
+    def _output_schema(self, input_schema: Schema) -> Schema:
+        return input_schema.with_field(
+            Field(self._output_column, self._output_column_dtype)
+        )
+
+    def __repr__(self) -> str:
+        name = getattr(self.fn, "__name__", type(self.fn).__name__)
+        return f"LambdaOp({name}: {self._input_column} -> {self._output_column})"
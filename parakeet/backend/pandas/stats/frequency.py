@@ -1,19 +1,68 @@
 """Calculate frequency tables from Pandas datasets."""
-from typing import List
+from dataclasses import replace
+from typing import Iterable, List, Optional
+
+from pandas import DataFrame, Series
 
 from parakeet.backend.pandas.dataset import PandasDataset
-from parakeet.stats.frequency import Result
+from parakeet.backend.pandas.stats.kernel import factorize_groups
+from parakeet.backend.pandas.stats.partial import merge_partials
+from parakeet.core import profile
+from parakeet.stats.frequency import Result, select_top_k
+from parakeet.stats.sketch import FrequencySketch
 
 
-def frequency(dataset: PandasDataset, dims: List[str]) -> Result:
+def frequency(
+    dataset: PandasDataset, dims: List[str], top_k: Optional[int] = None
+) -> Result:
     """Calculate the frequency of a data set.
 
     Parameters
     ----------
     dataset : PandasDataset
-        Input data set.
+        Input data set. Other datasets with a `to_pandas` method, e.g. an
+        `ArrowDataset`, only load the dimensions.
+    dims : list[str]
+        List of dimensions to calculate the frequency of.
+    top_k : int, optional
+        Number of most frequent cells to keep, by default every cell. The
+        other cells are folded into a single "Other" row, see
+        `parakeet.stats.frequency.select_top_k`.
+
+    Returns
+    -------
+    Result
+        Frequency result.
+
+    """
+    if not isinstance(dataset, PandasDataset):
+        dataset = dataset.to_pandas(dims)
+    with profile.span("frequency", rows_in=profile.rows(dataset)) as root:
+        with profile.span("factorize", rows_in=profile.rows(dataset)) as span:
+            groups = dataset.group_index(dims, observed=False)
+            counts = Series(groups.size(), index=groups.index)
+            span.rows_out = len(counts)
+        result = _result(counts, dims, top_k)
+        root.rows_out = len(result.data)
+    return replace(result, profile=root or None)
+
+
+def frequency_chunked(
+    chunks: Iterable[DataFrame], dims: List[str], top_k: Optional[int] = None
+) -> Result:
+    """Calculate the frequency of a data set that is read in chunks.
+
+    Counts are calculated for each chunk and merged by sum, so only the
+    counts are kept in memory.
+
+    Parameters
+    ----------
+    chunks : Iterable[DataFrame]
+        Chunks of the input data set, e.g. Parquet row groups or CSV chunks.
     dims : list[str]
         List of dimensions to calculate the frequency of.
+    top_k : int, optional
+        Number of most frequent cells to keep, as in `frequency`.
 
     Returns
     -------
@@ -21,11 +70,107 @@ def frequency(dataset: PandasDataset, dims: List[str]) -> Result:
         Frequency result.
 
     """
-    freq = (
-        dataset.data.groupby(dims, observed=False, dropna=False)
-        .size()
-        .reset_index()
-        .rename(columns={0: "Frequency"})
-    )
+    with profile.span("frequency") as root:
+        counts = None
+        for chunk in chunks:
+            with profile.span("factorize", rows_in=len(chunk)) as span:
+                counts = merge_partials(counts, _counts(chunk, dims))
+                span.rows_out = len(counts)
+        if counts is None:
+            raise ValueError(
+                "Cannot calculate the frequency of an empty sequence of chunks."
+            )
+        result = _result(counts, dims, top_k)
+        root.rows_out = len(result.data)
+    return replace(result, profile=root or None)
+
+
+def frequency_approx(
+    chunks: Iterable[DataFrame],
+    dims: List[str],
+    top_k: Optional[int] = None,
+    capacity: int = 1000,
+    precision: int = 14,
+) -> Result:
+    """Estimate the frequency of the most frequent cells of a data set.
+
+    Meant for dimensions with too many distinct values for an exact table to
+    fit in memory. See `frequency_sketch` for the estimates and their errors.
+
+    Parameters
+    ----------
+    chunks : Iterable[DataFrame]
+        Chunks of the input data set, e.g. Parquet row groups or CSV chunks.
+    dims : list[str]
+        List of dimensions to calculate the frequency of.
+    top_k : int, optional
+        Number of cells to return, by default every tracked cell.
+    capacity : int, optional
+        Number of cells to keep track of, by default 1000.
+    precision : int, optional
+        Precision of the distinct count, by default 14.
+
+    Returns
+    -------
+    Result
+        Estimated frequency result, with `estimated` set.
+
+    """
+    return frequency_sketch(chunks, dims, capacity, precision).result(top_k)
+
+
+def frequency_sketch(
+    chunks: Iterable[DataFrame],
+    dims: List[str],
+    capacity: int = 1000,
+    precision: int = 14,
+) -> FrequencySketch:
+    """Sketch the frequency of a data set that is read in chunks.
+
+    Memory depends on `capacity` and `precision`, and on the size of a
+    chunk, but not on the number of cells. Sketches of disjoint partitions
+    can be combined with `FrequencySketch.merge`.
+
+    For `n` rows, estimated frequencies are at most `n / (capacity + 1)`
+    below the true ones, and every cell more frequent than that is tracked.
+    The distinct count has a relative standard error of about
+    `1.04 / sqrt(2 ** precision)`.
+
+    Parameters
+    ----------
+    chunks : Iterable[DataFrame]
+        Chunks of the input data set. Dimensions must have the same dtype in
+        every chunk.
+    dims : list[str]
+        List of dimensions to calculate the frequency of.
+    capacity : int, optional
+        Number of cells to keep track of, by default 1000.
+    precision : int, optional
+        Precision of the distinct count, by default 14.
+
+    Returns
+    -------
+    FrequencySketch
+        Sketch of the frequency table.
+
+    """
+    sketch = FrequencySketch(dims, capacity, precision)
+    for chunk in chunks:
+        groups = factorize_groups(chunk, dims)
+        sketch.update(Series(groups.size(), index=groups.index))
+    return sketch
+
+
+def _counts(data: DataFrame, dims: List[str]) -> Series:
+    groups = factorize_groups(data, dims, observed=False)
+    return Series(groups.size(), index=groups.index)
+
+
+def _result(counts: Series, dims: List[str], top_k: Optional[int]) -> Result:
+    freq = counts.reset_index().rename(columns={0: "Frequency"})
     freq["Percentage"] = freq["Frequency"] / freq["Frequency"].sum()
+    if top_k is not None:
+        with profile.span("top_k", rows_in=len(freq)) as span:
+            freq = select_top_k(freq, dims, top_k)
+            span.rows_out = len(freq)
     return Result(freq, dims)
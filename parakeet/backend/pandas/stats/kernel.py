@@ -0,0 +1,284 @@
+"""Group rows by factorized integer codes instead of hashing row tuples."""
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+_MIN_DENSE_CELLS = 1 << 16
+"""Products of cardinalities up to this size always use the dense path."""
+_DENSE_CELLS_PER_ROW = 4
+"""Above the minimum, the dense path is used while there are at most this many
+   cells for each row of the input data."""
+_MAX_CELL_ID = 1 << 62
+DEFAULT_CACHE_BYTES = 1 << 28
+"""Default memory budget of a `GroupIndexCache`, in bytes."""
+
+
+@dataclass
+class Factorized:
+    """Sorted integer codes of a column.
+
+    Missing values take the code after the last unique value.
+    """
+
+    codes: np.ndarray
+    uniques: pd.Index
+    missing: bool
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + self.uniques.memory_usage(deep=True)
+
+
+@dataclass
+class Groups:
+    """Group id of each row and the keys of each group.
+
+    Groups are numbered from 0 in the order of their keys, as in a sorted
+    `groupby`.
+    """
+
+    ids: np.ndarray
+    index: pd.MultiIndex
+
+    @property
+    def n_groups(self) -> int:
+        return len(self.index)
+
+    @property
+    def nbytes(self) -> int:
+        return self.ids.nbytes + self.index.memory_usage(deep=True)
+
+    def size(self) -> np.ndarray:
+        """Number of rows in each group."""
+        return np.bincount(self.ids, minlength=self.n_groups)
+
+    def count(self, values: np.ndarray) -> np.ndarray:
+        """Number of non-missing values in each group."""
+        return np.bincount(self.ids[pd.notna(values)], minlength=self.n_groups)
+
+    def count_equal(self, values: np.ndarray, value) -> np.ndarray:
+        """Number of values equal to `value` in each group."""
+        return np.bincount(self.ids[values == value], minlength=self.n_groups)
+
+    def count_classes(self, codes: np.ndarray, n_classes: int) -> np.ndarray:
+        """Number of rows of each class in each group, in a single pass.
+
+        `codes` are the classes of the rows, from 0 to `n_classes - 1`, and
+        the result is a matrix of groups by classes.
+        """
+        cells = self.ids * n_classes + codes
+        counts = np.bincount(cells, minlength=self.n_groups * n_classes)
+        return counts.reshape(self.n_groups, n_classes)
+
+    def sum(self, values: np.ndarray) -> np.ndarray:
+        """Sum of the values in each group, ignoring missing values."""
+        values = np.asarray(values, dtype=np.float64)
+        present = ~np.isnan(values)
+        return np.bincount(
+            self.ids[present], weights=values[present], minlength=self.n_groups
+        )
+
+
+class GroupIndexCache:
+    """LRU cache of factorized columns and of the groups they form.
+
+    Columns are cached one by one, so that grouping by any combination of
+    cached columns skips factorizing them again, and groups are cached by
+    tuple of dimensions. The least recently used entries are evicted when
+    their arrays take more than `max_bytes`.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        Memory budget of the cache, by default `DEFAULT_CACHE_BYTES`.
+        0 disables the cache.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES) -> None:
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def get(self, key: Hashable, compute: Callable):
+        """Return the cached value of `key`, computing it if needed."""
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        self.misses += 1
+        value = compute()
+        if value.nbytes <= self.max_bytes:
+            self._entries[key] = value
+            self.nbytes += value.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.nbytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+
+def factorize_groups(
+    data: pd.DataFrame,
+    dims: List[str],
+    observed: bool = True,
+    cache: Optional[GroupIndexCache] = None,
+) -> Groups:
+    """Group the rows of a data set by the given dimensions.
+
+    Each dimension is factorized to integer codes, and the codes are combined
+    into a mixed-radix cell id. When the product of cardinalities is small
+    enough, groups are found by counting cell ids with `np.bincount`.
+    Otherwise, cell ids are hashed.
+
+    Missing values form their own group, as in `groupby(dropna=False)`.
+
+    Parameters
+    ----------
+    data : pd.DataFrame
+        Input data set.
+    dims : list[str]
+        Dimensions to group by.
+    observed : bool, optional
+        Whether to only keep observed groups when a dimension is categorical,
+        by default True. If False, every combination of categories is kept,
+        as in `groupby(observed=False)`.
+    cache : GroupIndexCache, optional
+        Cache of factorizations of `data` to read from and add to.
+
+    Returns
+    -------
+    Groups
+        Group id of each row and the keys of each group.
+
+    """
+    if cache is None:
+        return _factorize_groups(data, dims, observed, None)
+    return cache.get(
+        ("groups", tuple(dims), observed),
+        lambda: _factorize_groups(data, dims, observed, cache),
+    )
+
+
+def factorize_column(s: pd.Series) -> Factorized:
+    """Factorize a column to sorted codes, reusing the codes of categoricals."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        codes = s.cat.codes.to_numpy().astype(np.int64)
+        uniques = pd.CategoricalIndex(s.cat.categories, dtype=s.dtype)
+    else:
+        codes, uniques = pd.factorize(s, sort=True)
+        codes = codes.astype(np.int64)
+    # Missing values take the slot after the last unique value.
+    missing = bool((codes < 0).any())
+    codes[codes < 0] = len(uniques)
+    # Codes may be cached and shared between groupings.
+    codes.flags.writeable = False
+    return Factorized(codes, pd.Index(uniques, name=s.name), missing)
+
+
+def _factorize_groups(
+    data: pd.DataFrame,
+    dims: List[str],
+    observed: bool,
+    cache: Optional[GroupIndexCache],
+) -> Groups:
+    columns = []
+    for dim in dims:
+        if cache is None:
+            columns.append(factorize_column(data[dim]))
+        else:
+            columns.append(
+                cache.get(("column", dim), lambda: factorize_column(data[dim]))
+            )
+
+    codes = [c.codes for c in columns]
+    levels = [c.uniques for c in columns]
+    missing = [c.missing for c in columns]
+    full = not observed and any(
+        isinstance(data[dim].dtype, pd.CategoricalDtype) for dim in dims
+    )
+
+    shape = [len(level) + 1 for level in levels]
+    size = int(np.prod(shape, dtype=object))
+    if size <= max(_MIN_DENSE_CELLS, _DENSE_CELLS_PER_ROW * len(data)):
+        ids, cell_codes = _dense_groups(codes, shape, missing if full else None)
+    else:
+        ids, cell_codes = _hashed_groups(codes, shape, missing if full else None)
+
+    index = pd.MultiIndex(
+        levels=levels,
+        codes=[
+            np.where(c == len(level), -1, c) for c, level in zip(cell_codes, levels)
+        ],
+        names=dims,
+        verify_integrity=False,
+    )
+    return Groups(ids, index)
+
+
+def _dense_groups(
+    codes: List[np.ndarray], shape: List[int], missing: Optional[List[bool]]
+):
+    """Find groups by counting cell ids.
+
+    If `missing` is given, every combination of values is kept, including
+    missing values for the dimensions where they occur.
+    """
+    size = int(np.prod(shape))
+    cells = np.ravel_multi_index(codes, shape)
+    keep = np.bincount(cells, minlength=size) > 0
+    if missing is not None:
+        all_codes = np.unravel_index(np.arange(size), shape)
+        keep |= np.logical_and.reduce(
+            [(c < n - 1) | m for c, n, m in zip(all_codes, shape, missing)]
+        )
+
+    occupied = np.flatnonzero(keep)
+    remap = np.zeros(size, dtype=np.int64)
+    remap[occupied] = np.arange(len(occupied))
+    return remap[cells], np.unravel_index(occupied, shape)
+
+
+def _hashed_groups(
+    codes: List[np.ndarray], shape: List[int], missing: Optional[List[bool]] = None
+):
+    """Find groups by hashing cell ids, compressing them to avoid overflows.
+
+    If `missing` is given, every combination of values is kept, as in
+    `_dense_groups`. Groups are then the cells of the product of the values,
+    including missing values for the dimensions where they occur, which is
+    materialized anyway, so no hashing is needed.
+    """
+    if missing is not None:
+        sizes = [n - 1 + m for n, m in zip(shape, missing)]
+        ids = np.ravel_multi_index(codes, sizes)
+        return ids, np.unravel_index(np.arange(int(np.prod(sizes))), sizes)
+
+    cells, radix = codes[0], shape[0]
+    for c, n in zip(codes[1:], shape[1:]):
+        if radix * n > _MAX_CELL_ID:
+            # Sorted factorization keeps the lexicographic order of cells.
+            cells, uniques = pd.factorize(cells, sort=True)
+            radix = len(uniques)
+        cells = cells * n + c
+        radix *= n
+
+    ids, uniques = pd.factorize(cells, sort=True)
+    # Keys of each group are read from its first row.
+    first = np.empty(len(uniques), dtype=np.int64)
+    first[ids[::-1]] = np.arange(len(ids))[::-1]
+    return ids, [c[first] for c in codes]
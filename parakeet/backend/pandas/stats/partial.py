@@ -0,0 +1,36 @@
+"""Merge partial aggregations calculated over chunks of a data set."""
+from typing import Optional, TypeVar
+
+from pandas import DataFrame, MultiIndex, Series, concat
+
+Partial = TypeVar("Partial", DataFrame, Series)
+
+
+def merge_partials(acc: Optional[Partial], partial: Partial) -> Partial:
+    """Merge two partial aggregations that are summarizable by sum.
+
+    Parameters
+    ----------
+    acc : DataFrame or Series, optional
+        Accumulated partial aggregation, indexed by the grouping dimensions.
+        If None, `partial` is returned as is.
+    partial : DataFrame or Series
+        Partial aggregation over a new chunk of data, with the same index.
+
+    Returns
+    -------
+    DataFrame or Series
+        Sum of both partial aggregations for each group.
+
+    """
+    if acc is None:
+        return partial
+    levels = list(range(acc.index.nlevels))
+    merged = (
+        concat([acc, partial]).groupby(level=levels, observed=False, dropna=False).sum()
+    )
+    if isinstance(partial.index, MultiIndex) and merged.index.nlevels == 1:
+        # Grouping by a single level flattens the index, which could then no
+        # longer be merged with the next partials.
+        merged.index = MultiIndex.from_arrays([merged.index])
+    return merged
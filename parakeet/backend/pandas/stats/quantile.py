@@ -0,0 +1,56 @@
+"""Approximate quantiles, ECDFs and histograms from chunked pandas data."""
+from typing import Iterable, List
+
+import numpy as np
+from pandas import DataFrame
+
+from parakeet.backend.pandas.stats.kernel import factorize_groups
+from parakeet.stats.quantile import QuantileSketch
+
+
+def quantile_sketch(
+    chunks: Iterable[DataFrame],
+    dims: List[str],
+    column: str,
+    compression: float = 200,
+) -> QuantileSketch:
+    """Summarize a numeric column of a data set read in chunks, per group.
+
+    Each chunk is reduced to a t-digest per group of `dims` in a single pass,
+    and digests are merged as chunks are read. Sketches of partitions can be
+    combined with `QuantileSketch.merge`, and queried for quantiles, ECDFs
+    and equal-frequency histogram bins.
+
+    Parameters
+    ----------
+    chunks : Iterable[DataFrame]
+        Chunks of the input data set, e.g. Parquet row groups or CSV chunks.
+    dims : list[str]
+        Dimensions to group by. If empty, the whole column is summarized.
+    column : str
+        Numeric column to summarize. Missing values are ignored.
+    compression : float, optional
+        Size of the digests, by default 200. Larger digests are more accurate.
+
+    Returns
+    -------
+    QuantileSketch
+        Digests of each group.
+
+    """
+    sketch = None
+    for chunk in chunks:
+        if len(dims) == 0:
+            partial = QuantileSketch.from_series(chunk[column], compression)
+        else:
+            groups = factorize_groups(chunk, dims)
+            partial = QuantileSketch.from_values(
+                chunk[column].to_numpy(dtype=np.float64, na_value=np.nan),
+                groups.ids,
+                groups.index,
+                compression,
+            )
+        sketch = partial if sketch is None else sketch.merge(partial)
+    if sketch is None:
+        raise ValueError("Cannot summarize an empty sequence of chunks.")
+    return sketch
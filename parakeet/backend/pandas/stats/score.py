@@ -0,0 +1,92 @@
+"""Summarize a continuous score against a binary label, for pandas datasets."""
+from typing import List, Optional, Union
+
+import numpy as np
+from pandas import DataFrame
+
+from parakeet.backend.pandas.dataset import PandasDataset
+from parakeet.backend.pandas.stats.kernel import factorize_groups
+from parakeet.core import profile
+from parakeet.stats.score import (
+    DEFAULT_POINTS,
+    Result,
+    binned_runs,
+    quantile_edges,
+    runs,
+    single_stratum,
+    summarize,
+)
+
+
+def score_summary(
+    data: Union[DataFrame, PandasDataset],
+    score: str,
+    label: str,
+    by: Optional[List[str]] = None,
+    bins: Optional[int] = None,
+    points: int = DEFAULT_POINTS,
+) -> Result:
+    """Calculate the AUC, Gini, KS and Lorenz curve of a score, per stratum.
+
+    Higher scores are expected for positive labels, i.e. labels equal to 1.
+    Rows with a missing score or label are ignored.
+
+    Parameters
+    ----------
+    data : DataFrame | PandasDataset
+        Input data set. Other datasets with a `to_pandas` method, e.g. an
+        `ArrowDataset`, only load the score, the label and the dimensions.
+    score : str
+        Continuous score.
+    label : str
+        Binary label.
+    by : list[str], optional
+        Dimensions of the strata, by default a single stratum. Strata with
+        missing keys are dropped, as in `groupby`.
+    bins : int, optional
+        Number of quantile bins of the score. By default, rows are sorted
+        once, by stratum and score, and metrics are exact. With `bins`, rows
+        are counted per bin instead of sorted, which is faster on large data
+        sets, and the result bounds the error of the AUC and the KS.
+    points : int, optional
+        Number of points of each curve, by default `DEFAULT_POINTS`.
+
+    Returns
+    -------
+    Result
+        Metrics and curves of each stratum.
+
+    """
+    by = [] if by is None else list(by)
+    if not isinstance(data, (DataFrame, PandasDataset)):
+        data = data.to_pandas(by + [score, label])
+    with profile.span("score_summary", rows_in=profile.rows(data)):
+        if len(by) > 0:
+            if isinstance(data, PandasDataset):
+                groups = data.group_index(by)
+                data = data.data
+            else:
+                groups = factorize_groups(data, by)
+            group, keys = groups.ids, groups.index
+            present = ~keys.to_frame(index=False).isna().any(axis=1).to_numpy()
+        else:
+            data = data.data if isinstance(data, PandasDataset) else data
+            group, keys = np.zeros(len(data), dtype=np.int64), single_stratum()
+            present = np.ones(1, dtype=bool)
+
+        x = data[score].to_numpy(dtype=np.float64, na_value=np.nan)
+        y = data[label].to_numpy(dtype=np.float64, na_value=np.nan)
+        rows = present[group] & ~np.isnan(x) & ~np.isnan(y)
+        # Strata are renumbered without the ones with missing keys.
+        group = (np.cumsum(present) - 1)[group[rows]]
+        x, y, keys = x[rows], y[rows], keys[present]
+
+        with profile.span("runs", rows_in=len(x)) as span:
+            if bins is None:
+                reduced = runs(group, x, y)
+            else:
+                edges = quantile_edges(x, bins)
+                reduced = binned_runs(group, x, y, edges, len(keys))
+            span.rows_out = len(reduced[0])
+        with profile.span("summarize"):
+            return summarize(reduced, keys, by, points, binned=bins is not None)
@@ -0,0 +1,125 @@
+"""Stratified stability over time of pandas data sets."""
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+from pandas import DataFrame, factorize
+
+from parakeet.backend.pandas.dataset import PandasDataset
+from parakeet.backend.pandas.stats.kernel import factorize_groups
+from parakeet.backend.pandas.stats.stratification import Stats, _basic_stats
+from parakeet.stats.stability import (
+    DEFAULT_EPSILON,
+    Period,
+    PeriodCache,
+    Result,
+    cache_key,
+    cached_stats,
+    periods_to_scan,
+    plan_stability,
+    stabilize,
+    to_periods,
+)
+
+_PERIOD = "__period"
+
+
+def stability(
+    data: Union[DataFrame, PandasDataset],
+    dims: List[str],
+    label: str,
+    time: Optional[str] = None,
+    freq: str = "M",
+    reference: Optional[Period] = None,
+    stats: Stats = None,
+    cache: Optional[PeriodCache] = None,
+    refresh: Iterable[Period] = (),
+    epsilon: float = DEFAULT_EPSILON,
+    **kwargs,
+) -> Result:
+    """Calculate the stratification of each period and its drift over time.
+
+    The base statistics of each period are cached in `cache`. Only the rows
+    of periods that are not cached yet, or refreshed, are scanned, in a
+    single pass grouping by the dimensions and the period. Periods cached
+    earlier are part of the result even if they are not in `data`, so that
+    a monitoring job only needs to pass the latest data.
+
+    Parameters
+    ----------
+    data : DataFrame | PandasDataset
+        Input data set. Other datasets with a `to_pandas` method, e.g. an
+        `ArrowDataset`, only load the dimensions, the label and the time.
+    dims : list[str]
+        List of dimensions to stratify.
+    label : str
+        Label of the stratification.
+    time : str, optional
+        Time column, by default the time of the `PandasDataset`.
+    freq : str, optional
+        Frequency of the periods of a datetime time column, by default "M"
+        for months. See `parakeet.stats.stability.to_periods`.
+    reference : Period, optional
+        Period the others are compared with, by default the first one.
+    stats : list[str | Stat], optional
+        Statistics to calculate, as in `stratification`.
+    cache : PeriodCache, optional
+        Cache of the base statistics of each period, by default a new one.
+    refresh : Iterable[Period], optional
+        Periods to calculate again even if cached, e.g. after late data.
+    epsilon : float, optional
+        Minimum share of a cell in the stability indices.
+    **kwargs
+        Cube options, as in `stratification`.
+
+    Returns
+    -------
+    Result
+        Stratification of each period, and its population and
+        characteristic stability indices against the reference period.
+
+    """
+    if not isinstance(data, DataFrame):
+        time = data.time if time is None else time
+    if time is None:
+        raise ValueError("A time column is needed to calculate stability.")
+    if not isinstance(data, (DataFrame, PandasDataset)):
+        data = data.to_pandas(dims + [label, time])
+    if isinstance(data, PandasDataset):
+        data = data.data
+
+    graph, outputs, base = plan_stability(stats, kwargs.get("min_count", 0))
+    cache = PeriodCache() if cache is None else cache
+    key = cache_key(
+        time,
+        freq,
+        dims,
+        label,
+        base,
+        grouping_sets=kwargs.get("grouping_sets"),
+        min_count=kwargs.get("min_count", 0),
+    )
+
+    codes, periods = factorize(to_periods(data[time], freq), sort=True)
+    scan = periods_to_scan(cache, key, periods, base, refresh)
+    if len(scan) > 0:
+        rows = np.isin(codes, [i for i, p in enumerate(periods) if p in scan])
+        subset = data.loc[rows, dims + [label]].assign(**{_PERIOD: codes[rows]})
+        groups = factorize_groups(subset, dims + [_PERIOD])
+        basic_stats = _basic_stats(subset, dims + [_PERIOD], label, base, groups)
+        cache.put(
+            key,
+            {
+                periods[code]: frame.droplevel(_PERIOD)
+                for code, frame in basic_stats.groupby(level=_PERIOD)
+            },
+        )
+    return stabilize(
+        cached_stats(cache, key, base),
+        dims,
+        graph,
+        outputs,
+        reference=reference,
+        epsilon=epsilon,
+        scanned=scan,
+        **kwargs,
+    )
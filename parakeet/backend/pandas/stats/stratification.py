@@ -1,21 +1,89 @@
-from numpy import log
-from pandas import DataFrame
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from multiprocessing.shared_memory import SharedMemory
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
 
-from parakeet.stats.cube import _INTERNAL_MARGINAL, Cube
-from parakeet.stats.stratification import Result
+import numpy as np
+from pandas import Categorical, CategoricalDtype, DataFrame, Index, Series, factorize
 
+from parakeet.backend.pandas.dataset import PandasDataset
+from parakeet.backend.pandas.stats.kernel import Groups, factorize_groups
+from parakeet.backend.pandas.stats.partial import merge_partials
+from parakeet.core import profile
+from parakeet.stats.cube import CubeStrategy
+from parakeet.stats.graph import Stat
+from parakeet.stats.stratification import (
+    LabelType,
+    Result,
+    ScreeningResult,
+    class_stat,
+    plan_stats,
+    stratify,
+)
 
-def stratification(data: DataFrame, dims: list[str], label: str) -> Result:
+_BINARY_CLASSES = {"zeros": 0, "ones": 1}
+"""Base statistics of a binary label, and the class each one counts."""
+
+Stats = Optional[List[Union[str, Stat]]]
+
+
+def stratification(
+    data: Union[DataFrame, PandasDataset],
+    dims: list[str],
+    label: str,
+    stats: Stats = None,
+    sparse: bool = False,
+    strategy: CubeStrategy = CubeStrategy.MATRIX,
+    grouping_sets: Optional[Iterable[Iterable[str]]] = None,
+    min_count: int = 0,
+    label_type: LabelType = LabelType.BINARY,
+    classes: Optional[Sequence[Hashable]] = None,
+) -> Result:
     """Calculate the stratification of a data set.
 
+    The label is reduced to the base statistics of every cell in a single
+    pass over the rows: a matrix of cells by classes counted at once for a
+    binary or multiclass label, or the count, sum and sum of squares of a
+    continuous label.
+
     Parameters
     ----------
-    data : DataFrame
-        Input data set.
+    data : DataFrame | PandasDataset
+        Input data set. Categorical dimensions, e.g. from
+        `PandasDataset.encode`, are grouped by their codes. The groups of a
+        `PandasDataset` are cached and reused by later analyses.
+        Other datasets with a `to_pandas` method, e.g. an `ArrowDataset`,
+        only load the dimensions and the label.
     dims : list[str]
         List of dimensions to stratify.
     label : str
         Label of the stratification.
+    stats : list[str | Stat], optional
+        Statistics to calculate, by default every statistic in
+        `parakeet.stats.stratification.STATS`. Custom statistics can be given
+        as `Stat`s derived from the available ones. Only the statistics needed
+        for the requested ones are calculated.
+    sparse : bool, optional
+        Whether to use a sparse cube, by default False.
+        Sparse cubes only contain cells that are present in the data.
+    strategy : CubeStrategy, optional
+        Strategy used to calculate the cube, by default `CubeStrategy.MATRIX`.
+    grouping_sets : Iterable[Iterable[str]], optional
+        Grouping sets to calculate, by default every subset of `dims`.
+        The grand total is always calculated, as percentages depend on it.
+    min_count : int, optional
+        Minimum count for a cell to be kept in the result, by default 0.
+    label_type : LabelType, optional
+        Type of the label, by default `LabelType.BINARY`, which counts the
+        zeros and ones. A `LabelType.MULTICLASS` label counts every class,
+        and compares each one with the rest, see
+        `parakeet.stats.stratification.multiclass_stats`. A
+        `LabelType.CONTINUOUS` label is summarized by its sum, sum of
+        squares, mean and standard deviation.
+    classes : Sequence, optional
+        Classes of a multiclass label, by default its sorted values. Labels
+        with other values are an error.
 
     Returns
     -------
@@ -23,49 +91,347 @@ def stratification(data: DataFrame, dims: list[str], label: str) -> Result:
         Stratification result.
 
     """
-    # Pre-aggregate statistics that are summarizable by sum.
-    # This means that they can be aggregated by the cube op.
-    basic_stats = (
-        data[dims + [label]]
-        .groupby(dims, observed=False, dropna=False)
-        .agg(
-            count=(label, "count"),
-            zeros=(label, lambda x: (x == 0).sum()),
-            ones=(label, lambda x: (x == 1).sum()),
+    if not isinstance(data, (DataFrame, PandasDataset)):
+        data = data.to_pandas(dims + [label])
+    frame = data.data if isinstance(data, PandasDataset) else data
+    if label_type == LabelType.MULTICLASS and classes is None:
+        classes = _infer_classes(frame[label])
+    graph, outputs, base = plan_stats(stats, min_count, label_type, classes)
+    with profile.span("stratification", rows_in=profile.rows(data)) as root:
+        with profile.span("base_stats", rows_in=profile.rows(data)) as span:
+            groups = None
+            if isinstance(data, PandasDataset):
+                groups = data.group_index(dims, observed=False)
+            basic_stats = _basic_stats(
+                frame, dims, label, base, groups, label_type, classes
+            )
+            span.rows_out = len(basic_stats)
+        result = stratify(
+            basic_stats,
+            dims,
+            graph,
+            outputs,
+            sparse=sparse,
+            strategy=strategy,
+            grouping_sets=grouping_sets,
+            min_count=min_count,
+            label_type=label_type,
+            classes=classes,
         )
+        root.rows_out = len(result.data)
+    return replace(result, profile=root or None)
+
+
+def stratification_chunked(
+    chunks: Iterable[DataFrame],
+    dims: list[str],
+    label: str,
+    stats: Stats = None,
+    label_type: LabelType = LabelType.BINARY,
+    classes: Optional[Sequence[Hashable]] = None,
+    **kwargs,
+) -> Result:
+    """Calculate the stratification of a data set that is read in chunks.
+
+    Each chunk is reduced to per-cell sums of the basic statistics, which are
+    merged before the cube and the derived statistics are calculated. Only
+    the partial sums are kept in memory, so the data set can be larger than
+    the available memory.
+
+    Parameters
+    ----------
+    chunks : Iterable[DataFrame]
+        Chunks of the input data set, e.g. Parquet row groups or CSV chunks.
+    dims : list[str]
+        List of dimensions to stratify.
+    label : str
+        Label of the stratification.
+    stats : list[str | Stat], optional
+        Statistics to calculate, as in `stratification`.
+    label_type : LabelType, optional
+        Type of the label, as in `stratification`.
+    classes : Sequence, optional
+        Classes of a multiclass label, which are required, since every chunk
+        must count the same ones.
+    **kwargs
+        Cube options, as in `stratification`.
+
+    Returns
+    -------
+    Result
+        Stratification result.
+
+    """
+    if label_type == LabelType.MULTICLASS and classes is None:
+        raise ValueError("Classes of a multiclass label must be given for chunks.")
+    graph, outputs, base = plan_stats(
+        stats, kwargs.get("min_count", 0), label_type, classes
     )
-    basic_stats = basic_stats.reset_index(drop=False)
-
-    # Calculate and apply the cube op to fill in marginal values.
-    cube = Cube(basic_stats, dims)
-    stats = cube(basic_stats.drop(columns=dims)).fillna(0)
-
-    # Calculate the remaining statistics as combinations of things
-    # that can be aggregated by sum.
-    #
-    # This step would benefit from a more general solution.
-    # Our previous solution was to define a desired schema for the
-    # output and then calculate each column of the schema directly.
-    # While it works, it has a few drawbacks:
-    # 1. It's not very general. It's hard to extend to new statistics
-    #    as you need to know how to calculate them from the basic stats.
-    # 2. It can be less than ideal for performance due to duplicated
-    #    calculations when more than one stat depends on any given op.
-    # 3. It can lead to errors if the schema is not defined correctly.
-    #    For example, if you forget to include a column in the schema
-    #    that would be necessary for calculating another column.
-    #
-    # A better solution would be to define a schema for the output
-    # and then resolve what needs to be calculated to obtain that schema.
-    # This looks very much like defining a computation graph.
-    # It goes from the label column, which can take some forms
-    # (binary, categorical, continuous), to basic stats, to final stats.
-    # In this scenario, basic statistics don't need to be defined explicitly and
-    # don't need to be shown in the result set unless they are requested.
-    population_idx = [_INTERNAL_MARGINAL] * len(dims)
-    stats["zeros_pct"] = stats["zeros"] / stats["zeros"].loc[*population_idx]
-    stats["ones_pct"] = stats["ones"] / stats["ones"].loc[*population_idx]
-    stats["ones_ratio"] = stats["ones"] / stats["count"]
-    stats["woe"] = log(stats["zeros"] / stats["ones"])
-    stats["iv"] = (stats["zeros_pct"] - stats["ones_pct"]) * stats["woe"]
-    return Result(stats)
+    with profile.span("stratification") as root:
+        basic_stats, shift = None, None
+        for chunk in chunks:
+            with profile.span("base_stats", rows_in=len(chunk)) as span:
+                if label_type == LabelType.CONTINUOUS and shift is None:
+                    # Every chunk is shifted as the first one, to be summed.
+                    shift = _shift(
+                        chunk[label].to_numpy(dtype=np.float64, na_value=np.nan)
+                    )
+                partial = _basic_stats(
+                    chunk, dims, label, base, None, label_type, classes, shift
+                )
+                basic_stats = merge_partials(basic_stats, partial)
+                span.rows_out = len(basic_stats)
+        if basic_stats is None:
+            raise ValueError("Cannot stratify an empty sequence of chunks.")
+        result = stratify(
+            basic_stats,
+            dims,
+            graph,
+            outputs,
+            label_type=label_type,
+            classes=classes,
+            **kwargs,
+        )
+        root.rows_out = len(result.data)
+    return replace(result, profile=root or None)
+
+
+def stratification_many(
+    data: DataFrame,
+    dims_list: List[Union[str, List[str]]],
+    label: str,
+    n_jobs: Optional[int] = None,
+    stats: Stats = None,
+    **kwargs,
+) -> ScreeningResult:
+    """Calculate the stratification of many variables against the same label.
+
+    The label and every dimension are converted to numeric arrays only once.
+    With `n_jobs > 1`, the arrays are copied to shared memory and variables are
+    stratified in a process pool, so that workers read them without pickling.
+
+    Parameters
+    ----------
+    data : DataFrame
+        Input data set.
+    dims_list : list[str | list[str]]
+        Variables to stratify. Each one is a dimension or a list of dimensions.
+    label : str
+        Label of the stratification. Must be numeric.
+    n_jobs : int, optional
+        Number of worker processes, by default None, which stratifies every
+        variable in the current process. -1 uses every available CPU.
+    stats : list[str | Stat], optional
+        Statistics to calculate, as in `stratification`. The information value
+        is always calculated for the summary.
+    **kwargs
+        Cube options, as in `stratification`.
+
+    Returns
+    -------
+    ScreeningResult
+        Stratification of each variable and total information value summary.
+
+    """
+    variables = [[d] if isinstance(d, str) else list(d) for d in dims_list]
+    names = [", ".join(dims) for dims in variables]
+    if len(set(names)) != len(names):
+        raise ValueError("Variables to stratify contain duplicates.")
+    if kwargs.get("label_type") == LabelType.CONTINUOUS:
+        raise ValueError(
+            "Variables cannot be screened by IV against a continuous label."
+        )
+    if data[label].dtype.kind not in "biuf":
+        raise ValueError(f"Label {label} must be numeric.")
+    if stats is not None and "iv" not in stats:
+        stats = list(stats) + ["iv"]
+    kwargs["stats"] = stats
+
+    # Every dimension is factorized once, even when used by many variables.
+    arrays = {label: data[label].to_numpy()}
+    uniques = {}
+    for dim in dict.fromkeys(d for dims in variables for d in dims):
+        s = data[dim]
+        if isinstance(s.dtype, CategoricalDtype):
+            # Already encoded: share the compact codes as they are.
+            arrays[dim], uniques[dim] = s.cat.codes.to_numpy(), s.cat.categories
+        else:
+            arrays[dim], uniques[dim] = factorize(s, sort=True)
+
+    if n_jobs == -1:
+        n_jobs = os.cpu_count()
+    if n_jobs is None or n_jobs <= 1:
+        results = [
+            _stratify_codes(arrays, uniques, dims, label, kwargs) for dims in variables
+        ]
+    else:
+        with _SharedArrays(arrays) as shared:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                futures = [
+                    pool.submit(
+                        _stratify_shared,
+                        shared.specs,
+                        {d: uniques[d] for d in dims},
+                        dims,
+                        label,
+                        kwargs,
+                    )
+                    for dims in variables
+                ]
+                results = [f.result() for f in futures]
+
+    summary = DataFrame(
+        {"iv": [r.information_value() for r in results]},
+        index=Index(names, name="variable"),
+    ).sort_values("iv", ascending=False)
+    return ScreeningResult(dict(zip(names, results)), summary)
+
+
+class _SharedArrays:
+    """Copy arrays to shared memory blocks that worker processes can attach to."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray]) -> None:
+        self._blocks = []
+        self.specs = {}
+        for key, array in arrays.items():
+            block = SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+            self._blocks.append(block)
+            self.specs[key] = (block.name, array.shape, array.dtype.str)
+
+    def __enter__(self) -> "_SharedArrays":
+        return self
+
+    def __exit__(self, *_) -> None:
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+
+
+def _stratify_shared(
+    specs: dict, uniques: dict, dims: List[str], label: str, kwargs: dict
+) -> Result:
+    """Stratify a variable from arrays in shared memory."""
+    blocks = [SharedMemory(name=specs[key][0]) for key in dims + [label]]
+    try:
+        arrays = {
+            key: np.ndarray(specs[key][1], specs[key][2], buffer=block.buf)
+            for key, block in zip(dims + [label], blocks)
+        }
+        result = _stratify_codes(arrays, uniques, dims, label, kwargs)
+        # Views must be released before the blocks can be closed.
+        del arrays
+        return result
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def _stratify_codes(
+    arrays: dict, uniques: dict, dims: List[str], label: str, kwargs: dict
+) -> Result:
+    """Stratify a variable from factorized dimensions."""
+    data = DataFrame(
+        {d: Categorical.from_codes(arrays[d], uniques[d]) for d in dims}
+    ).assign(**{label: arrays[label]})
+    return stratification(data, dims, label, **kwargs)
+
+
+def _basic_stats(
+    data: DataFrame,
+    dims: list[str],
+    label: str,
+    base: List[str],
+    groups: Optional[Groups] = None,
+    label_type: LabelType = LabelType.BINARY,
+    classes: Optional[Sequence[Hashable]] = None,
+    shift: Optional[float] = None,
+) -> DataFrame:
+    """Pre-aggregate statistics that are summarizable by sum.
+
+    This means that they can be aggregated by the cube op, and that partial
+    results over disjoint chunks of data can be merged by sum, as long as a
+    continuous label is shifted by the same constant in each chunk. The shift
+    is the mean of the label by default.
+    """
+    if label_type == LabelType.CONTINUOUS:
+        available = ["count", "offset_sum", "shifted_sum", "shifted_sum_sq"]
+    elif label_type == LabelType.BINARY:
+        available = ["count", *_BINARY_CLASSES]
+    else:
+        available = ["count"] + [class_stat("count", value) for value in classes]
+    unknown = [name for name in base if name not in available]
+    if len(unknown) > 0:
+        raise ValueError(f"Base statistics {unknown} are not supported.")
+
+    if groups is None:
+        groups = factorize_groups(data, dims, observed=False)
+    if label_type == LabelType.CONTINUOUS:
+        columns = _moments(groups, data[label], base, shift)
+    else:
+        if label_type == LabelType.BINARY:
+            classes = list(_BINARY_CLASSES.values())
+        codes = _class_codes(data[label], classes, label_type == LabelType.MULTICLASS)
+        # Classes, then other values and missing values, counted at once.
+        counts = groups.count_classes(codes, len(classes) + 2)
+        columns = dict(zip(available[1:], counts.T))
+        columns["count"] = counts[:, :-1].sum(axis=1)
+    return DataFrame({name: columns[name] for name in base}, index=groups.index)
+
+
+def _moments(
+    groups: Groups, label: Series, base: List[str], shift: Optional[float]
+) -> Dict[str, np.ndarray]:
+    """Count, sum and sum of squares of a shifted continuous label per group."""
+    y = label.to_numpy(dtype=np.float64, na_value=np.nan)
+    present = ~np.isnan(y)
+    ids, y = groups.ids[present], y[present]
+    if shift is None:
+        shift = _shift(y)
+    # Shifting before squaring keeps the deviations from cancelling out.
+    y = y - shift
+    count = np.bincount(ids, minlength=groups.n_groups)
+    columns = {"count": count, "offset_sum": count * shift}
+    if "shifted_sum" in base:
+        columns["shifted_sum"] = np.bincount(ids, y, minlength=groups.n_groups)
+    if "shifted_sum_sq" in base:
+        columns["shifted_sum_sq"] = np.bincount(ids, y * y, minlength=groups.n_groups)
+    return columns
+
+
+def _shift(label) -> float:
+    """Constant a continuous label is shifted by: its mean, or 0 if empty."""
+    y = np.asarray(label, dtype=np.float64)
+    y = y[~np.isnan(y)]
+    return float(y.mean()) if len(y) > 0 else 0.0
+
+
+def _class_codes(
+    label: Series, classes: Sequence[Hashable], strict: bool
+) -> np.ndarray:
+    """Position of the class of each label.
+
+    Values that are not classes take the position after the last class, and
+    missing values the one after it. Distinct values are matched with the
+    classes rather than every row.
+    """
+    codes, uniques = factorize(label)
+    uniques = Index(uniques)
+    expected = Index(classes)
+    if uniques.dtype.kind == "b" and expected.dtype.kind != "b":
+        uniques = uniques.astype(np.int64)
+    positions = expected.get_indexer(uniques)
+    unknown = positions < 0
+    if strict and unknown.any():
+        raise ValueError(f"Label values {list(uniques[unknown])} are not classes.")
+    positions[unknown] = len(classes)
+    # Missing values have code -1, i.e. the last position.
+    return np.append(positions, len(classes) + 1)[codes]
+
+
+def _infer_classes(label: Series) -> Tuple:
+    """Sorted distinct values of a label, as integers if they all are."""
+    uniques = Series(label.unique()).dropna().sort_values()
+    if uniques.dtype.kind == "f" and (uniques == uniques.round()).all():
+        uniques = uniques.astype(np.int64)
+    return tuple(uniques.tolist())
@@ -0,0 +1,54 @@
+"""Test the factorized-code grouping kernel against pandas groupby."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from parakeet.backend.pandas.stats import kernel
+from parakeet.backend.pandas.stats.kernel import factorize_groups
+
+
+@pytest.fixture
+def sample_data():
+    rng = np.random.default_rng(7)
+    n = 500
+    data = pd.DataFrame(
+        {
+            "A": rng.choice(["x", "y", "z"], n),
+            "B": rng.integers(0, 5, n).astype(float),
+            "C": pd.Categorical(rng.choice(["p", "q"], n), categories=["q", "p", "r"]),
+            "label": rng.integers(0, 2, n),
+        }
+    )
+    data.loc[::7, "A"] = None
+    data.loc[::11, "B"] = np.nan
+    return data
+
+
+@pytest.mark.parametrize("dims", [["A"], ["B", "A"], ["A", "B", "C"]])
+@pytest.mark.parametrize("observed", [True, False])
+@pytest.mark.parametrize("dense", [True, False])
+def test_factorize_groups_matches_groupby(
+    sample_data, monkeypatch, dims, observed, dense
+):
+    if not dense:
+        monkeypatch.setattr(kernel, "_MIN_DENSE_CELLS", 0)
+        monkeypatch.setattr(kernel, "_DENSE_CELLS_PER_ROW", 0)
+
+    groups = factorize_groups(sample_data, dims, observed=observed)
+    grouped = sample_data.groupby(dims, observed=observed, dropna=False)
+
+    assert_frame_equal(
+        pd.Series(groups.size(), index=groups.index).reset_index(),
+        grouped.size().reset_index(),
+    )
+
+    ones = grouped["label"].sum().to_numpy()
+    assert (groups.count_equal(sample_data["label"].to_numpy(), 1) == ones).all()
+    assert np.allclose(groups.sum(sample_data["label"].to_numpy()), ones)
+
+    counts = groups.count_classes(sample_data["label"].to_numpy(), 2)
+    assert counts.shape == (groups.n_groups, 2)
+    assert (counts[:, 1] == ones).all()
+    assert (counts.sum(axis=1) == groups.size()).all()
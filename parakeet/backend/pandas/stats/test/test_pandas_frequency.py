@@ -0,0 +1,74 @@
+"""Test frequency tables with the pandas backend."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from parakeet.backend.pandas.dataset import PandasDataset
+from parakeet.backend.pandas.stats.frequency import (
+    frequency,
+    frequency_approx,
+    frequency_chunked,
+    frequency_sketch,
+)
+from parakeet.core import profile
+
+
+def test_frequency_approx():
+    rng = np.random.default_rng(11)
+    data = pd.DataFrame(
+        {"id": rng.zipf(1.4, 50_000), "A": rng.choice(["a", "b"], 50_000)}
+    )
+    chunks = [data.iloc[i : i + 5000] for i in range(0, len(data), 5000)]
+    exact = frequency(PandasDataset(data), ["id", "A"], top_k=10).data.iloc[:10]
+
+    result = frequency_approx(chunks, ["id", "A"], top_k=10, capacity=200)
+    assert result.estimated
+    assert result.error <= len(data) / 201
+    assert_frame_equal(result.data[["id", "A"]], exact[["id", "A"]], check_dtype=False)
+    diff = exact["Frequency"] - result.data["Frequency"]
+    assert ((diff >= 0) & (diff <= result.error)).all()
+
+    # Partitions sketched separately give the same guarantees once merged.
+    merged = frequency_sketch(chunks[:4], ["id", "A"], 200).merge(
+        frequency_sketch(chunks[4:], ["id", "A"], 200)
+    )
+    assert merged.heavy_hitters.n == len(data)
+    assert merged.result().error <= len(data) / 201
+
+
+def test_frequency_chunked_top_k():
+    rng = np.random.default_rng(12)
+    data = pd.DataFrame({"A": rng.choice(list("abcdef"), 1000)})
+    chunks = [data.iloc[i : i + 100] for i in range(0, len(data), 100)]
+    assert_frame_equal(
+        frequency_chunked(chunks, ["A"], top_k=3).data,
+        frequency(PandasDataset(data), ["A"], top_k=3).data,
+    )
+
+
+def test_frequency_chunked_profile():
+    data = pd.DataFrame({"A": list("aabbbc") * 50})
+    chunks = [data.iloc[i : i + 100] for i in range(0, len(data), 100)]
+    with profile.profiling():
+        result = frequency_chunked(chunks, ["A"], top_k=2)
+    root = result.profile
+    assert [s.name for s in root.children] == ["factorize"] * 3 + ["top_k"]
+    assert [s.rows_in for s in root.find("factorize")] == [100, 100, 100]
+    assert root.find("top_k")[0].rows_out == root.rows_out == 3
+    assert frequency_chunked(chunks, ["A"]).profile is None
+
+
+def test_frequency_merge():
+    rng = np.random.default_rng(2)
+    data = pd.DataFrame(
+        {"A": rng.choice(["a", "b", "c", None], 1000), "B": rng.integers(0, 3, 1000)}
+    )
+    expected = frequency(PandasDataset(data), ["A", "B"])
+    history = frequency(PandasDataset(data[data["A"] != "c"]), ["A", "B"])
+    batch = frequency(PandasDataset(data[data["A"] == "c"]), ["A", "B"])
+    assert_frame_equal(history.merge(batch).data, expected.data)
+
+    with pytest.raises(ValueError):
+        history.merge(batch.top(2))
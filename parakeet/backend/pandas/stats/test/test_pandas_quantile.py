@@ -0,0 +1,32 @@
+"""Test quantile sketches of chunked pandas data."""
+
+import numpy as np
+import pandas as pd
+
+from parakeet.backend.pandas.stats.quantile import quantile_sketch
+
+
+def test_quantile_sketch_chunks():
+    rng = np.random.default_rng(4)
+    n = 100_000
+    data = pd.DataFrame(
+        {
+            "A": rng.choice(["a", "b", None], n),
+            "B": rng.integers(0, 3, n),
+            "value": rng.normal(size=n),
+        }
+    )
+    data.loc[::13, "value"] = np.nan
+    chunks = [data.iloc[i : i + 10_000] for i in range(0, n, 10_000)]
+
+    sketch = quantile_sketch(chunks, ["A", "B"], "value")
+    expected = data.groupby(["A", "B"], dropna=False)["value"].median()
+    assert len(sketch.keys) == len(expected)
+    # Missing keys are matched as values, whichever way the index stores them.
+    compared = sketch.median().reset_index().merge(expected.reset_index())
+    assert len(compared) == len(expected)
+    assert np.allclose(compared["median"], compared["value"], atol=0.02)
+
+    total = quantile_sketch(chunks, [], "value")
+    assert total.count().item() == data["value"].count()
+    assert np.isclose(total.median().item(), data["value"].median(), atol=0.02)
@@ -0,0 +1,78 @@
+"""Test score summaries with the pandas backend."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+from scipy.stats import ks_2samp, mannwhitneyu
+
+from parakeet.backend.pandas.dataset import PandasDataset
+from parakeet.backend.pandas.stats.score import score_summary
+
+
+@pytest.fixture
+def sample_data():
+    rng = np.random.default_rng(4)
+    n = 5000
+    data = pd.DataFrame(
+        {
+            "A": rng.choice(["a", "b", None], n),
+            "B": rng.integers(0, 3, n),
+            "label": rng.integers(0, 2, n).astype(float),
+        }
+    )
+    # Rounded, so that many scores are tied.
+    data["score"] = (rng.normal(size=n) + data["label"]).round(1)
+    data.loc[::97, "score"] = np.nan
+    data.loc[::89, "label"] = np.nan
+    return data
+
+
+def test_score_summary(sample_data):
+    result = score_summary(sample_data, "score", "label", by=["A", "B"])
+    data = sample_data.dropna()
+    assert len(result.summary) == 6
+    for (a, b), stratum in data.groupby(["A", "B"]):
+        positives = stratum.loc[stratum["label"] == 1, "score"]
+        negatives = stratum.loc[stratum["label"] == 0, "score"]
+        summary = result.summary.loc[(a, b)]
+        auc = mannwhitneyu(positives, negatives).statistic
+        assert summary["auc"] == pytest.approx(auc / len(positives) / len(negatives))
+        assert summary["ks"] == pytest.approx(ks_2samp(positives, negatives).statistic)
+        assert summary["count"] == len(stratum)
+
+
+def test_score_summary_binned(sample_data):
+    exact = score_summary(sample_data, "score", "label", by=["B"]).summary
+    binned = score_summary(sample_data, "score", "label", by=["B"], bins=20).summary
+    assert (abs(binned["auc"] - exact["auc"]) <= binned["auc_error"]).all()
+    assert (abs(binned["ks"] - exact["ks"]) <= binned["ks_error"]).all()
+
+    # Cached groups of a dataset give the same result.
+    dataset = PandasDataset(sample_data)
+    assert_frame_equal(
+        score_summary(dataset, "score", "label", by=["B"]).summary, exact
+    )
+
+
+def test_score_summary_single_stratum(sample_data):
+    result = score_summary(sample_data, "score", "label", points=5)
+    assert result.summary.index.tolist() == ["__all__"]
+    assert result.lorenz()["population"].tolist() == [0, 0.25, 0.5, 0.75, 1]
+
+
+@pytest.mark.parametrize("bins", [None, 10])
+def test_score_summary_no_scores(sample_data, bins):
+    data = sample_data.assign(score=np.nan)
+    result = score_summary(data, "score", "label", by=["B"], bins=bins)
+    assert (result.summary["count"] == 0).all()
+    assert result.summary["auc"].isna().all()
+    assert result.summary["ks"].isna().all()
+
+
+@pytest.mark.parametrize("bins", [None, 4])
+@pytest.mark.parametrize("value", [2, -1])
+def test_score_summary_non_binary_label(sample_data, bins, value):
+    sample_data.loc[3, "label"] = value
+    with pytest.raises(ValueError, match="not 0 or 1"):
+        score_summary(sample_data, "score", "label", by=["A"], bins=bins)
@@ -0,0 +1,113 @@
+"""Test stratified stability over time."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from parakeet.backend.pandas.dataset import PandasDataset
+from parakeet.backend.pandas.stats.stability import stability
+from parakeet.backend.pandas.stats.stratification import stratification
+from parakeet.stats.stability import PeriodCache, stability_index
+
+
+@pytest.fixture
+def sample_data():
+    rng = np.random.default_rng(5)
+    n = 12_000
+    data = pd.DataFrame(
+        {
+            "A": rng.choice(["a", "b", "c"], n),
+            "B": rng.integers(0, 3, n),
+            "label": rng.integers(0, 2, n),
+            "time": pd.Timestamp("2024-01-01")
+            + pd.to_timedelta(rng.integers(0, 181, n), unit="D"),
+        }
+    )
+    # The distribution of A shifts in the last month.
+    shifted = data["time"] >= "2024-06-01"
+    data.loc[shifted, "A"] = rng.choice(["a", "c"], shifted.sum())
+    return data
+
+
+def test_stability(sample_data):
+    result = stability(PandasDataset(sample_data, time="time"), ["A", "B"], "label")
+    months = sample_data["time"].dt.to_period("M")
+    assert result.periods == sorted(months.unique())
+    assert result.reference == result.periods[0]
+
+    june = pd.Period("2024-06", "M")
+    expected = stratification(sample_data[months == june], ["A", "B"], "label")
+    assert_frame_equal(result[june].data, expected.data)
+    assert result.data.loc[june].equals(expected.data)
+
+    assert result.psi.iloc[0] == 0
+    assert (result.psi.iloc[1:-1] < 0.02).all()
+    assert result.psi[june] > 0.25
+    assert result.csi.loc[june, "A"] > 0.25
+    assert result.csi.loc[june, "B"] < 0.02
+
+
+def test_stability_incremental(sample_data, tmp_path):
+    months = sample_data["time"].dt.to_period("M")
+    history = sample_data[months < pd.Period("2024-06", "M")]
+    full = stability(sample_data, ["A"], "label", time="time", stats=["woe"])
+
+    cache = PeriodCache(str(tmp_path))
+    first = stability(history, ["A"], "label", time="time", cache=cache)
+    assert len(first.scanned) == 5
+
+    # A later run only scans the new month, from a cache read back from disk.
+    latest = sample_data[months == pd.Period("2024-06", "M")]
+    cache = PeriodCache(str(tmp_path))
+    result = stability(latest, ["A"], "label", time="time", stats=["woe"], cache=cache)
+    assert result.scanned == [pd.Period("2024-06", "M")]
+    assert_frame_equal(result.data, full.data)
+    pd.testing.assert_series_equal(result.psi, full.psi)
+
+    refreshed = stability(
+        sample_data, ["A"], "label", time="time", cache=cache, refresh=result.periods
+    )
+    assert refreshed.scanned == result.periods
+    assert len(cache) == 6
+
+
+def test_stability_cache_options(sample_data, tmp_path):
+    cache = PeriodCache(str(tmp_path))
+    first = stability(sample_data, ["A", "B"], "label", time="time", cache=cache)
+    assert len(first.scanned) == 6
+
+    # Analyses with other cube options do not read each other's periods.
+    for kwargs in [{"grouping_sets": [["A"]]}, {"min_count": 5}]:
+        other = stability(
+            sample_data, ["A", "B"], "label", time="time", cache=cache, **kwargs
+        )
+        assert other.scanned == first.periods
+
+    # Periods are persisted as Parquet files with a JSON index.
+    files = {
+        name.rsplit(".", 1)[-1] for _, _, names in os.walk(tmp_path) for name in names
+    }
+    assert files == {"json", "parquet"}
+    cache = PeriodCache(str(tmp_path))
+    again = stability(sample_data, ["A", "B"], "label", time="time", cache=cache)
+    assert again.scanned == []
+    assert_frame_equal(again.data, first.data)
+
+    cache.clear()
+    assert os.listdir(tmp_path) == []
+
+
+def test_stability_index():
+    assert stability_index([10, 20, 30], [1, 2, 3]) == 0
+    assert np.isclose(stability_index([50, 50], [25, 75]), 0.25 * np.log(3), rtol=1e-12)
+    assert stability_index([50, 50, 0], [50, 49, 1]) > 0
+
+
+def test_stability_errors(sample_data):
+    with pytest.raises(ValueError):
+        stability(sample_data, ["A"], "label")
+    with pytest.raises(ValueError):
+        stability(sample_data, ["A"], "label", time="time", reference="2023-01")
@@ -0,0 +1,239 @@
+"""Test stratification with the pandas backend."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal, assert_series_equal
+
+from parakeet.backend.pandas.stats.stratification import (
+    stratification,
+    stratification_chunked,
+    stratification_many,
+)
+from parakeet.core import profile
+from parakeet.stats.cube import _INTERNAL_MARGINAL, CubeStrategy, GroupingSets
+from parakeet.stats.graph import Stat
+
+
+@pytest.fixture
+def sample_data():
+    rng = np.random.default_rng(42)
+    n = 1000
+    return pd.DataFrame(
+        {
+            "A": rng.choice(["a", "b", "c"], n),
+            "B": rng.integers(0, 4, n),
+            "label": rng.integers(0, 2, n),
+        }
+    )
+
+
+def test_stratification_totals(sample_data):
+    result = stratification(sample_data, ["A", "B"], "label")
+    total = result.data.loc[(_INTERNAL_MARGINAL, _INTERNAL_MARGINAL)]
+    assert total["count"] == len(sample_data)
+    assert total["ones"] == sample_data["label"].sum()
+    assert total["zeros_pct"] == 1.0
+    assert total["ones_pct"] == 1.0
+
+
+def test_stratification_chunked(sample_data):
+    expected = stratification(sample_data, ["A", "B"], "label")
+    chunks = (sample_data.iloc[i : i + 128] for i in range(0, len(sample_data), 128))
+    result = stratification_chunked(chunks, ["A", "B"], "label")
+    assert_frame_equal(result.data, expected.data)
+
+
+@pytest.mark.parametrize("strategy", [CubeStrategy.MATRIX, CubeStrategy.LATTICE])
+def test_stratification_profile(sample_data, strategy):
+    assert stratification(sample_data, ["A", "B"], "label").profile is None
+
+    roots = []
+    with profile.profiling(callback=roots.append):
+        result = stratification(sample_data, ["A", "B"], "label", strategy=strategy)
+    assert roots == [result.profile]
+    root = result.profile
+    assert root.name == "stratification"
+    assert [s.name for s in root.children] == ["base_stats", "cube", "derived"]
+    assert root.rows_in == len(sample_data)
+    assert root.rows_out == len(result.data)
+    (cube,) = root.find("cube")
+    assert cube.rows_in == root.find("base_stats")[0].rows_out == 12
+    assert cube.rows_out == 20
+    assert sum(s.seconds for s in root.children) <= root.seconds
+    assert_frame_equal(
+        result.data, stratification(sample_data, ["A", "B"], "label").data
+    )
+
+
+@pytest.mark.parametrize("n_jobs", [None, 2])
+def test_stratification_many(sample_data, n_jobs):
+    result = stratification_many(sample_data, ["A", "B", ["A", "B"]], "label", n_jobs)
+
+    assert set(result.summary.index) == {"A", "B", "A, B"}
+    assert result.summary["iv"].is_monotonic_decreasing
+    for dims in [["A"], ["B"]]:
+        expected = stratification(sample_data, dims, "label")
+        assert_frame_equal(result[dims[0]].data, expected.data, check_index_type=False)
+        assert result.summary.loc[dims[0], "iv"] == pytest.approx(
+            expected.information_value()
+        )
+
+
+def test_stratification_requested_stats(sample_data):
+    expected = stratification(sample_data, ["A"], "label").data
+    bad_rate = Stat("bad_rate", ("zeros", "count"), lambda _, z, c: z / c)
+    result = stratification(sample_data, ["A"], "label", stats=["iv", bad_rate])
+
+    assert list(result.data.columns) == ["iv", "bad_rate"]
+    assert_series_equal(result.data["iv"], expected["iv"])
+    assert_series_equal(
+        result.data["bad_rate"],
+        expected["zeros"] / expected["count"],
+        check_names=False,
+    )
+
+
+@pytest.mark.parametrize(
+    "kwargs", [{}, {"sparse": True}, {"grouping_sets": [["A"]], "stats": ["woe"]}]
+)
+def test_stratification_merge(sample_data, kwargs):
+    expected = stratification(sample_data, ["A", "B"], "label", **kwargs)
+    # The new batch has a value of B that the history does not have.
+    history = sample_data[sample_data["B"] < 3].iloc[:600]
+    batch = sample_data.drop(history.index)
+
+    result = stratification(history, ["A", "B"], "label", **kwargs)
+    merged = result.merge(stratification(batch, ["A", "B"], "label", **kwargs))
+    assert_frame_equal(merged.data, expected.data)
+
+    pruned = stratification(history, ["A", "B"], "label", min_count=5)
+    with pytest.raises(ValueError):
+        pruned.merge(pruned)
+
+    rollup = stratification(
+        batch, ["A", "B"], "label", grouping_sets=GroupingSets.rollup(["A", "B"])
+    )
+    with pytest.raises(ValueError):
+        result.merge(rollup)
+    assert rollup.merge(rollup).grouping_sets == {("A", "B"), ("A",), ()}
+
+
+def test_stratification_multiclass(sample_data):
+    data = sample_data.assign(
+        label=np.random.default_rng(0).choice(["x", "y", "z"], len(sample_data))
+    )
+    data.loc[::13, "label"] = None
+    result = stratification(data, ["A", "B"], "label", label_type="multiclass")
+
+    assert result.classes == ("x", "y", "z")
+    assert list(result.data.columns[:6]) == [
+        "count",
+        "count_x",
+        "share_x",
+        "pct_x",
+        "woe_x",
+        "iv_x",
+    ]
+    cells = result.data.loc[("a", 2)]
+    rows = data[(data["A"] == "a") & (data["B"] == 2)]
+    assert cells["count"] == rows["label"].notna().sum()
+    for value in result.classes:
+        ones = (rows["label"] == value).sum()
+        assert cells[f"count_{value}"] == ones
+        assert cells[f"share_{value}"] == pytest.approx(ones / cells["count"])
+    assert result.information_value() == pytest.approx(
+        sum(np.nansum(result.cube.finest(f"iv_{value}")) for value in ["x", "y", "z"])
+    )
+    chunks = (data.iloc[i : i + 128] for i in range(0, len(data), 128))
+    assert_frame_equal(
+        stratification_chunked(
+            chunks,
+            ["A", "B"],
+            "label",
+            label_type="multiclass",
+            classes=["x", "y", "z"],
+        ).data,
+        result.data,
+    )
+
+    with pytest.raises(ValueError):
+        stratification(
+            data, ["A"], "label", label_type="multiclass", classes=["x", "y"]
+        )
+    with pytest.raises(ValueError):
+        stratification_chunked([data], ["A"], "label", label_type="multiclass")
+
+
+def test_stratification_multiclass_matches_binary(sample_data):
+    expected = stratification(sample_data, ["A", "B"], "label").data
+    result = stratification(sample_data, ["A", "B"], "label", label_type="multiclass")
+
+    assert result.classes == (0, 1)
+    assert_series_equal(result.data["count_1"], expected["ones"], check_names=False)
+    assert_series_equal(result.data["pct_1"], expected["ones_pct"], check_names=False)
+    assert_series_equal(result.data["woe_1"], expected["woe"], check_names=False)
+    assert_series_equal(result.data["iv_1"], expected["iv"], check_names=False)
+    # Both classes have the same information value against each other.
+    assert_series_equal(result.data["iv_0"], expected["iv"], check_names=False)
+
+
+def test_stratification_continuous(sample_data):
+    data = sample_data.assign(
+        value=np.random.default_rng(1).normal(size=len(sample_data))
+    )
+    data.loc[::17, "value"] = np.nan
+    result = stratification(data, ["A", "B"], "value", label_type="continuous")
+
+    assert list(result.data.columns) == ["count", "sum", "sum_sq", "mean", "std"]
+    grouped = data.groupby(["A", "B"])["value"]
+    cells = result.data.loc[grouped.mean().index]
+    assert np.allclose(cells["count"], grouped.count())
+    assert np.allclose(cells["sum_sq"], grouped.apply(lambda v: (v**2).sum()))
+    assert np.allclose(cells["mean"], grouped.mean())
+    assert np.allclose(cells["std"], grouped.std())
+    total = result.data.loc[(_INTERNAL_MARGINAL, _INTERNAL_MARGINAL)]
+    assert total["mean"] == pytest.approx(data["value"].mean())
+    assert total["std"] == pytest.approx(data["value"].std())
+
+    history, batch = data.iloc[:600], data.iloc[600:]
+    merged = stratification(
+        history, ["A", "B"], "value", label_type="continuous"
+    ).merge(stratification(batch, ["A", "B"], "value", label_type="continuous"))
+    assert_frame_equal(merged.data, result.data)
+    with pytest.raises(ValueError):
+        merged.merge(stratification(data, ["A", "B"], "label"))
+
+
+def test_stratification_continuous_large_offset(sample_data):
+    rng = np.random.default_rng(2)
+    data = sample_data.assign(value=1e9 + rng.normal(size=len(sample_data)))
+    result = stratification(data, ["A"], "value", label_type="continuous")
+
+    grouped = data.groupby("A")["value"]
+    cells = result.data.loc[grouped.std().index]
+    assert np.allclose(cells["std"], grouped.std(), rtol=1e-6)
+    assert np.allclose(cells["mean"], grouped.mean(), rtol=1e-12)
+    total = result.data.loc[(_INTERNAL_MARGINAL,), "std"].item()
+    assert total == pytest.approx(data["value"].std(), rel=1e-6)
+
+    # Parts shifted by different means are rebased before they are summed.
+    history, batch = data.iloc[:600], data.assign(value=data["value"] + 5).iloc[600:]
+    merged = stratification(
+        history, ["A"], "value", label_type="continuous", stats=["std"]
+    ).merge(
+        stratification(batch, ["A"], "value", label_type="continuous", stats=["std"])
+    )
+    both = pd.concat([history, batch])
+    assert np.allclose(
+        merged.data.loc[grouped.std().index, "std"],
+        both.groupby("A")["value"].std(),
+        rtol=1e-6,
+    )
+    chunks = (both.iloc[i : i + 128] for i in range(0, len(both), 128))
+    chunked = stratification_chunked(chunks, ["A"], "value", label_type="continuous")
+    assert np.allclose(
+        chunked.data.loc[grouped.std().index, "std"],
+        both.groupby("A")["value"].std(),
+        rtol=1e-6,
+    )
@@ -0,0 +1,183 @@
+"""Test pandas datasets."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from parakeet.backend.pandas.dataset import PandasDataset
+from parakeet.backend.pandas.ops.aggregations.numeric1d import PandasNumeric1d
+from parakeet.backend.pandas.stats.frequency import frequency
+from parakeet.backend.pandas.stats.stratification import (
+    stratification,
+    stratification_many,
+)
+from parakeet.core import profile
+from parakeet.core.dataset import DType
+from parakeet.core.ops.agg import Agg
+from parakeet.core.ops.aggregations.numeric1d import Numeric1dAggFn
+from parakeet.core.ops.groupby import GroupBy
+from parakeet.core.ops.op import Seq
+from parakeet.stats.cube import CubeStrategy
+
+
+@pytest.fixture
+def sample_data():
+    rng = np.random.default_rng(7)
+    n = 2000
+    return pd.DataFrame(
+        {
+            "A": rng.choice(["a", "b", "c"], n),
+            "B": rng.choice(["x", "y"], n).astype(object),
+            "C": rng.integers(0, 4, n),
+            "label": rng.integers(0, 2, n),
+        }
+    )
+
+
+def _decoded(data: pd.DataFrame) -> pd.DataFrame:
+    """Decode categorical columns, to compare with results of plain data."""
+    return data.astype(
+        {c: str for c in data if isinstance(data[c].dtype, pd.CategoricalDtype)}
+    )
+
+
+def test_encode(sample_data):
+    encoded = PandasDataset(sample_data).encode()
+    assert [f.dtype for f in encoded.schema] == [
+        DType.CATEGORICAL,
+        DType.CATEGORICAL,
+        DType.INT64,
+        DType.INT64,
+    ]
+    assert encoded.data["A"].cat.codes.dtype == np.int8
+    assert list(encoded.dictionary["A"]) == ["a", "b", "c"]
+    assert encoded.data.memory_usage(deep=True)["A"] < (
+        sample_data.memory_usage(deep=True)["A"] / 4
+    )
+
+
+def test_encode_keeps_cache_budget(sample_data):
+    encoded = PandasDataset(sample_data, cache_bytes=0).encode()
+    assert encoded.cache.max_bytes == 0
+    encoded.group_index(["A"])
+    assert encoded.cache.nbytes == 0
+
+
+def test_encode_shared_dictionary(sample_data):
+    first = PandasDataset(sample_data[sample_data["A"] != "c"]).encode(["A"])
+    second = PandasDataset(sample_data[sample_data["A"] != "a"]).encode(
+        ["A"], dictionary=first.dictionary
+    )
+    assert list(second.dictionary["A"]) == ["a", "b", "c"]
+    b = second.data["A"] == "b"
+    assert (second.data["A"].cat.codes[b] == 1).all()
+
+
+def test_encoded_frequency(sample_data):
+    expected = frequency(PandasDataset(sample_data), ["A", "B"])
+    result = frequency(PandasDataset(sample_data).encode(), ["A", "B"])
+    assert_frame_equal(_decoded(result.data), _decoded(expected.data))
+
+
+@pytest.mark.parametrize("strategy", list(CubeStrategy))
+def test_encoded_stratification(sample_data, strategy):
+    expected = stratification(sample_data, ["A", "B", "C"], "label", strategy=strategy)
+    result = stratification(
+        PandasDataset(sample_data).encode(), ["A", "B", "C"], "label", strategy=strategy
+    )
+    assert_frame_equal(
+        result.data, expected.data, check_index_type=False, check_categorical=False
+    )
+
+
+def test_encoded_stratification_many(sample_data):
+    encoded = PandasDataset(sample_data).encode().data
+    expected = stratification_many(sample_data, ["A", ["A", "B"]], "label")
+    result = stratification_many(encoded, ["A", ["A", "B"]], "label")
+    assert_frame_equal(result.summary, expected.summary)
+
+
+def test_group_index_cache(sample_data):
+    dataset = PandasDataset(sample_data)
+    frequency(dataset, ["A", "B"])
+    assert ("column", "A") in dataset.cache and ("column", "B") in dataset.cache
+    misses = dataset.cache.misses
+
+    # A subset of the dimensions reuses their factorizations.
+    stratification(dataset, ["A"], "label")
+    assert dataset.cache.misses == misses + 1
+    frequency(dataset, ["A", "B"])
+    assert dataset.cache.misses == misses + 1
+
+    dataset.data = sample_data.assign(A="z")
+    assert len(dataset.cache) == 0
+    assert frequency(dataset, ["A"]).data["A"].to_list() == ["z"]
+
+
+def test_group_index_cache_budget(sample_data):
+    dataset = PandasDataset(sample_data, cache_bytes=20000)
+    frequency(dataset, ["A", "B"])
+    frequency(dataset, ["B", "C"])
+    assert 0 < dataset.cache.nbytes <= 20000
+    assert ("groups", ("A", "B"), False) not in dataset.cache
+
+    disabled = PandasDataset(sample_data, cache_bytes=0)
+    frequency(disabled, ["A"])
+    assert len(disabled.cache) == 0
+
+
+@pytest.mark.parametrize("by", [["A"], ["B", "A"]])
+def test_groupby_agg_cached_keys(sample_data, by):
+    data = sample_data.assign(value=np.arange(len(sample_data), dtype=float))
+    data.loc[::9, "B"] = None
+    plan = Seq(
+        [
+            GroupBy(by),
+            Agg(
+                [
+                    PandasNumeric1d("value", Numeric1dAggFn.SUM),
+                    PandasNumeric1d("value", Numeric1dAggFn.MEDIAN),
+                ]
+            ),
+        ]
+    )
+    expected = data.groupby(by).agg(
+        **{"SUM(value)": ("value", "sum"), "MEDIAN(value)": ("value", "median")}
+    )
+    dataset = PandasDataset(data)
+    assert_frame_equal(plan.transform(dataset).data, expected)
+    unfused = Seq(plan.ops, optimize=False)
+    assert_frame_equal(unfused.transform(dataset).data, expected)
+
+
+def test_seq_reuses_cached_keys(sample_data):
+    plan = Seq([GroupBy(["A"]), Agg([PandasNumeric1d("C", Numeric1dAggFn.SUM)])])
+    dataset = PandasDataset(sample_data)
+    plan.transform(dataset)
+    misses, hits = dataset.cache.misses, dataset.cache.hits
+
+    # The plan projects the dataset first, which keeps its cache.
+    plan.transform(dataset)
+    assert dataset.cache.misses == misses
+    assert dataset.cache.hits > hits
+
+
+def test_seq_profile(sample_data):
+    plan = Seq(
+        [
+            GroupBy(["A"]),
+            Agg([PandasNumeric1d("label", Numeric1dAggFn.SUM)]),
+        ]
+    )
+    dataset = PandasDataset(sample_data)
+    roots = []
+    with profile.profiling(callback=roots.append):
+        result = plan.transform(dataset)
+    (root,) = roots
+    assert root.name == "Seq"
+    assert [s.name for s in root.children] == [type(op).__name__ for op in plan.plan]
+    assert root.rows_in == len(sample_data)
+    assert root.rows_out == len(result.data) == 3
+    # Without profiling, the plan runs as it is.
+    assert_frame_equal(plan.transform(dataset).data, result.data)
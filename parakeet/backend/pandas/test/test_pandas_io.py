@@ -0,0 +1,61 @@
+"""Test chunked readers against analyses of the data in memory."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from parakeet.backend.pandas.dataset import PandasDataset
+from parakeet.backend.pandas.io import read_csv_chunks, read_parquet_chunks
+from parakeet.backend.pandas.stats.frequency import frequency, frequency_chunked
+from parakeet.backend.pandas.stats.stratification import (
+    stratification,
+    stratification_chunked,
+)
+
+
+@pytest.fixture
+def sample_data():
+    rng = np.random.default_rng(3)
+    n = 1000
+    return pd.DataFrame(
+        {
+            "A": rng.choice(["a", "b", "c"], n),
+            "B": rng.integers(0, 4, n),
+            "label": rng.integers(0, 2, n),
+            "value": rng.normal(size=n),
+        }
+    )
+
+
+@pytest.fixture(params=["csv", "parquet"])
+def read_chunks(request, sample_data, tmp_path):
+    """Write the sample data and return a reader of its chunks."""
+    path = str(tmp_path / f"data.{request.param}")
+    if request.param == "csv":
+        sample_data.to_csv(path, index=False)
+        return lambda columns: read_csv_chunks(path, columns, chunksize=128)
+    pytest.importorskip("pyarrow")
+    sample_data.to_parquet(path, index=False, row_group_size=100)
+    return lambda columns: read_parquet_chunks(path, columns, batch_size=128)
+
+
+def test_chunks(read_chunks, sample_data):
+    chunks = list(read_chunks(["B", "A"]))
+    assert all(len(chunk) <= 128 for chunk in chunks)
+    data = pd.concat(chunks, ignore_index=True)
+    assert_frame_equal(data[["A", "B"]], sample_data[["A", "B"]], check_dtype=False)
+
+
+def test_stratification_chunked_from_file(read_chunks, sample_data):
+    expected = stratification(sample_data, ["A", "B"], "label")
+    result = stratification_chunked(
+        read_chunks(["A", "B", "label"]), ["A", "B"], "label"
+    )
+    assert_frame_equal(result.data, expected.data)
+
+
+def test_frequency_chunked_from_file(read_chunks, sample_data):
+    expected = frequency(PandasDataset(sample_data), ["A", "B"], top_k=5)
+    result = frequency_chunked(read_chunks(["A", "B"]), ["A", "B"], top_k=5)
+    assert_frame_equal(result.data, expected.data)
@@ -0,0 +1,138 @@
+from typing import List, Optional, Union
+
+import polars as pl
+from polars.lazyframe.group_by import LazyGroupBy
+
+from parakeet.core.dataset import Dataset, DesiredSchema, DType, Field, Fn, Schema
+
+
+class PolarsDataset(Dataset):
+    """Dataset backed by a Polars `LazyFrame`.
+
+    Operations only build a query. It is optimized and executed when the data
+    is collected, which pushes projections and predicates down to the source.
+    """
+
+    def __init__(
+        self, data: Union[pl.DataFrame, pl.LazyFrame], time: Optional[str] = None
+    ):
+        self._data = data.lazy()
+        self._time = time
+        self._schema: Optional[Schema] = None
+
+    @classmethod
+    def scan_parquet(cls, path: str, time: Optional[str] = None) -> "PolarsDataset":
+        """Lazily read a Parquet file, or a glob of Parquet files."""
+        return cls(pl.scan_parquet(path), time)
+
+    @property
+    def data(self) -> pl.LazyFrame:
+        return self._data
+
+    @property
+    def schema(self) -> Schema:
+        if self._schema is None:
+            self._schema = Schema(
+                Field(name, _dtype_from_polars(dtype))
+                for (name, dtype) in self._data.collect_schema().items()
+            )
+        return self._schema
+
+    def shape(self):
+        n_rows = self._data.select(pl.len()).collect().item()
+        return (n_rows, len(self.schema))
+
+    @property
+    def time(self):
+        return self._time
+
+    def filter(self, predicate: pl.Expr) -> "PolarsDataset":
+        """Filter the rows of the dataset."""
+        return PolarsDataset(self._data.filter(predicate), self._time)
+
+    def collect(self) -> pl.DataFrame:
+        """Execute the query and return the data."""
+        return self._data.collect()
+
+    def groupby(self, by: List[str]) -> "Dataset":
+        return PolarsGroupByDataset(
+            self._data.group_by(by), self._time, self.schema, by
+        )
+
+    def agg(self, desired: DesiredSchema) -> "Dataset":
+        return PolarsDataset(self._data.select(_to_polars_aggregations(desired)))
+
+    def select(self, columns: List[str]) -> "Dataset":
+        return PolarsDataset(self._data.select(columns), self._time)
+
+    def groupby_agg(self, by: List[str], desired: DesiredSchema) -> "Dataset":
+        return PolarsDataset(
+            self._data.group_by(by)
+            .agg(_to_polars_aggregations(desired))
+            .sort(by, nulls_last=True),
+            self._time,
+        )
+
+
+class PolarsGroupByDataset(Dataset):
+    def __init__(
+        self,
+        data: LazyGroupBy,
+        time: str,
+        schema: Schema,
+        groups: List[str],
+    ) -> None:
+        self._data = data
+        self._time = time
+        self._schema = schema
+        self.groups: List[str] = groups
+
+    @property
+    def data(self):
+        return self._data
+
+    @property
+    def schema(self) -> Schema:
+        return self._schema
+
+    def shape(self):
+        raise NotImplementedError("shape is not supported for grouped dataset.")
+
+    @property
+    def time(self):
+        return self._time
+
+    def groupby(self, _: List[str]) -> "Dataset":
+        raise NotImplementedError("groupby is not supported for grouped dataset.")
+
+    def agg(self, desired: DesiredSchema) -> "Dataset":
+        aggregations = _to_polars_aggregations(desired)
+        return PolarsDataset(
+            self._data.agg(aggregations).sort(self.groups, nulls_last=True),
+            self._time,
+        )
+
+
+def _dtype_from_polars(dtype: pl.DataType) -> DType:
+    if dtype == pl.Int32:
+        return DType.INT32
+    elif dtype == pl.Int64:
+        return DType.INT64
+    elif dtype == pl.Float32:
+        return DType.FLOAT32
+    elif dtype == pl.Float64:
+        return DType.FLOAT64
+    elif dtype == pl.String:
+        return DType.STRING
+    elif dtype in (pl.Categorical, pl.Enum):
+        return DType.CATEGORICAL
+    elif dtype == pl.Boolean:
+        return DType.BOOL
+    elif isinstance(dtype, pl.Datetime):
+        return DType.DATETIME
+    else:
+        raise ValueError(f"Unknown dtype {dtype}")
+
+
+def _to_polars_aggregations(sch: Schema) -> List[pl.Expr]:
+    return [f.fn for f in sch if isinstance(f, Fn)]
@@ -0,0 +1,269 @@
+"""Computation engine for Polars datasets."""
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+import polars as pl
+
+from parakeet.backend.polars.dataset import PolarsDataset
+from parakeet.core.engine import Engine
+from parakeet.stats import frequency, stability, stratification
+from parakeet.stats.score import DEFAULT_POINTS
+from parakeet.stats.score import Result as ScoreResult
+from parakeet.stats.score import check_binary, single_stratum, summarize
+from parakeet.stats.stratification import LabelType, plan_stats, stratify
+
+_BASE_STATS = {
+    "count": lambda label: label.count(),
+    "zeros": lambda label: (label == 0).sum(),
+    "ones": lambda label: (label == 1).sum(),
+}
+"""Polars expression of each base statistic, given the label column."""
+
+_TRUNCATE = {"D": "1d", "W": "1w", "M": "1mo", "Q": "1q", "Y": "1y"}
+"""Polars interval truncating datetimes to the start of each pandas period."""
+
+_PERIOD = "__period"
+_RUN = "__run"
+
+
+class PolarsEngine(Engine):
+    """Calculate analyses with lazy Polars queries.
+
+    Grouped aggregations run as a single multithreaded Polars query, with
+    projection and predicate pushdown down to the source. Only the aggregated
+    cells are converted to pandas, where marginals are filled by the cube.
+    """
+
+    def frequency(
+        self, dataset: PolarsDataset, dims: List[str], top_k: Optional[int] = None
+    ) -> frequency.Result:
+        """Calculate a frequency table for the given dimensions.
+
+        Parameters
+        ----------
+        dataset : PolarsDataset
+            Input data set.
+        dims : list[str]
+            List of dimensions to calculate the frequency of.
+        top_k : int, optional
+            Number of most frequent cells to keep, by default every cell. The
+            other cells are folded into a single "Other" row.
+
+        Returns
+        -------
+        frequency.Result
+            Frequency result.
+
+        """
+        freq = (
+            dataset.data.group_by(dims)
+            .agg(pl.len().alias("Frequency"))
+            .sort(dims, nulls_last=True)
+            .collect()
+            .to_pandas()
+        )
+        freq["Frequency"] = freq["Frequency"].astype("int64")
+        freq["Percentage"] = freq["Frequency"] / freq["Frequency"].sum()
+        if top_k is not None:
+            freq = frequency.select_top_k(freq, dims, top_k)
+        return frequency.Result(freq, dims)
+
+    def stratified(
+        self,
+        dataset: PolarsDataset,
+        dims: List[str],
+        label: str,
+        stats=None,
+        label_type: LabelType = LabelType.BINARY,
+        **kwargs,
+    ) -> stratification.Result:
+        """Calculate the stratification of a data set.
+
+        Parameters
+        ----------
+        dataset : PolarsDataset
+            Input data set.
+        dims : list[str]
+            List of dimensions to stratify.
+        label : str
+            Label of the stratification.
+        stats : list[str | Stat], optional
+            Statistics to calculate, by default every available statistic.
+        label_type : LabelType, optional
+            Type of the label. Only binary labels are supported.
+        **kwargs
+            Cube options, see `parakeet.stats.stratification.stratify`.
+
+        Returns
+        -------
+        stratification.Result
+            Stratification result.
+
+        """
+        if label_type != LabelType.BINARY:
+            raise ValueError(
+                f"PolarsEngine only stratifies binary labels, not {label_type}."
+            )
+        graph, outputs, base = plan_stats(stats, kwargs.get("min_count", 0))
+        basic_stats = _basic_stats(dataset.data, dims, label, base)
+        return stratify(basic_stats.set_index(dims), dims, graph, outputs, **kwargs)
+
+    def stability(
+        self,
+        dataset: PolarsDataset,
+        dims: List[str],
+        label: str,
+        time: Optional[str] = None,
+        freq: str = "M",
+        reference: Optional[stability.Period] = None,
+        stats=None,
+        cache: Optional[stability.PeriodCache] = None,
+        refresh: Iterable[stability.Period] = (),
+        epsilon: float = stability.DEFAULT_EPSILON,
+        **kwargs,
+    ) -> stability.Result:
+        """Calculate the stratification of each period and its drift over time.
+
+        Base statistics of the periods that are not cached are calculated in
+        a single query, filtered on those periods and grouped by the
+        dimensions and the period. Parameters are as in
+        `parakeet.backend.pandas.stats.stability.stability`; datetime time
+        columns support the frequencies "D", "W", "M", "Q" and "Y".
+
+        Returns
+        -------
+        stability.Result
+            Stratification of each period, and its population and
+            characteristic stability indices against the reference period.
+
+        """
+        time = dataset.time if time is None else time
+        if time is None:
+            raise ValueError("A time column is needed to calculate stability.")
+        graph, outputs, base = stability.plan_stability(
+            stats, kwargs.get("min_count", 0)
+        )
+        cache = stability.PeriodCache() if cache is None else cache
+        key = stability.cache_key(
+            time,
+            freq,
+            dims,
+            label,
+            base,
+            grouping_sets=kwargs.get("grouping_sets"),
+            min_count=kwargs.get("min_count", 0),
+        )
+
+        period = pl.col(time)
+        if dataset.data.collect_schema()[time].is_temporal():
+            if freq not in _TRUNCATE:
+                raise ValueError(f"Unsupported frequency {freq}.")
+            period = period.dt.truncate(_TRUNCATE[freq])
+        values = dataset.data.select(period.unique()).collect().to_series()
+        periods = stability.to_periods(values.to_pandas(), freq)
+        scan = stability.periods_to_scan(cache, key, periods, base, refresh)
+        if len(scan) > 0:
+            selected = [v for v, p in zip(values.to_list(), periods) if p in scan]
+            data = dataset.data.filter(period.is_in(selected))
+            basic_stats = _basic_stats(
+                data.with_columns(period.alias(_PERIOD)), dims + [_PERIOD], label, base
+            )
+            basic_stats[_PERIOD] = stability.to_periods(basic_stats[_PERIOD], freq)
+            cache.put(
+                key,
+                {
+                    p: frame.drop(columns=_PERIOD).set_index(dims)
+                    for p, frame in basic_stats.groupby(_PERIOD, sort=False)
+                },
+            )
+        return stability.stabilize(
+            stability.cached_stats(cache, key, base),
+            dims,
+            graph,
+            outputs,
+            reference=reference,
+            epsilon=epsilon,
+            scanned=scan,
+            **kwargs,
+        )
+
+    def score_summary(
+        self,
+        dataset: PolarsDataset,
+        score: str,
+        label: str,
+        by: Optional[List[str]] = None,
+        bins: Optional[int] = None,
+        points: int = DEFAULT_POINTS,
+    ) -> ScoreResult:
+        """Calculate the AUC, Gini, KS and Lorenz curve of a score, per stratum.
+
+        Rows are reduced to runs in a single query: the positives and
+        negatives of each distinct score, or of each quantile bin of the
+        score with `bins`, per stratum. Only the runs are fetched.
+        Parameters are as in
+        `parakeet.backend.pandas.stats.score.score_summary`.
+
+        Returns
+        -------
+        ScoreResult
+            Metrics and curves of each stratum.
+
+        """
+        by = [] if by is None else list(by)
+        data = dataset.data.drop_nulls(by + [score, label])
+        value = pl.col(score).cast(pl.Float64)
+        edges = None
+        if bins is not None:
+            quantiles = pl.Series(np.linspace(0, 1, bins + 1)[:-1])
+            positions = (pl.lit(quantiles) * (pl.len() - 1)).round().cast(pl.Int64)
+            edges = data.select(value.sort().gather(positions)).collect()
+            edges = np.unique(edges.to_series().to_numpy())
+            if len(edges) == 0:
+                edges = np.zeros(1)
+            bin_ = pl.lit(pl.Series(edges)).search_sorted(value, side="right") - 1
+            value = bin_.clip(lower_bound=0).cast(pl.Int64)
+
+        labels = data.select(pl.col(label).unique()).collect().to_series()
+        check_binary(labels.cast(pl.Float64, strict=False).to_numpy())
+        runs = (
+            data.group_by(by + [value.alias(_RUN)])
+            .agg(
+                pl.len().alias("count"),
+                (pl.col(label) == 1).sum().alias("positives"),
+            )
+            .sort(by + [_RUN], descending=[False] * len(by) + [True], nulls_last=True)
+            .collect()
+        )
+        run_score = runs[_RUN].to_numpy()
+        if edges is not None:
+            run_score = edges[run_score]
+        if len(by) > 0:
+            group = runs.select(pl.struct(by).rle_id()).to_series().to_numpy()
+            keys = pd.MultiIndex.from_frame(
+                runs.select(by).unique(maintain_order=True).to_pandas()
+            )
+        else:
+            group, keys = np.zeros(len(runs), dtype=np.int64), single_stratum()
+        positives = runs["positives"].to_numpy().astype(np.int64)
+        negatives = runs["count"].to_numpy().astype(np.int64) - positives
+        return summarize(
+            (group, run_score, positives, negatives),
+            keys,
+            by,
+            points,
+            binned=bins is not None,
+        )
+
+
+def _basic_stats(data: pl.LazyFrame, dims: List[str], label: str, base: List[str]):
+    """Base statistics of each group, fetched as a pandas frame."""
+    unknown = [name for name in base if name not in _BASE_STATS]
+    if len(unknown) > 0:
+        raise ValueError(f"Base statistics {unknown} are not supported.")
+
+    aggregations = [_BASE_STATS[name](pl.col(label)).alias(name) for name in base]
+    basic_stats = data.group_by(dims).agg(aggregations).collect().to_pandas()
+    basic_stats[base] = basic_stats[base].astype("int64")
+    return basic_stats
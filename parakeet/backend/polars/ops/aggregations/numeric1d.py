@@ -0,0 +1,27 @@
+import polars as pl
+
+from parakeet.core.ops.aggregations import Numeric1dAggFn, _Numeric1dAgg
+
+_POLARS_METHODS = {
+    Numeric1dAggFn.COUNT: "count",
+    Numeric1dAggFn.CUMSUM: "cum_sum",
+    Numeric1dAggFn.MAX: "max",
+    Numeric1dAggFn.MEAN: "mean",
+    Numeric1dAggFn.MEDIAN: "median",
+    Numeric1dAggFn.MIN: "min",
+    Numeric1dAggFn.MODE: "mode",
+    Numeric1dAggFn.NUNIQUE: "n_unique",
+    Numeric1dAggFn.STD: "std",
+    Numeric1dAggFn.SUM: "sum",
+    Numeric1dAggFn.VAR: "var",
+}
+
+
+class PolarsNumeric1d(_Numeric1dAgg):
+    def __init__(self, input_col: str, op: Numeric1dAggFn) -> None:
+        super().__init__(input_col, op)
+
+    @property
+    def fn(self) -> pl.Expr:
+        method = getattr(pl.col(self.input_column), _POLARS_METHODS[self.op])
+        return method().alias(self.name)
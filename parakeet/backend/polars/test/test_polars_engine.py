@@ -0,0 +1,132 @@
+"""Test the Polars engine against the pandas implementation."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+pl = pytest.importorskip("polars")
+
+from parakeet.backend.pandas.dataset import PandasDataset  # noqa: E402
+from parakeet.backend.pandas.stats.frequency import frequency  # noqa: E402
+from parakeet.backend.pandas.stats.score import score_summary  # noqa: E402
+from parakeet.backend.pandas.stats.stability import stability  # noqa: E402
+from parakeet.backend.pandas.stats.stratification import (  # noqa: E402
+    stratification,
+)
+from parakeet.backend.polars.dataset import PolarsDataset  # noqa: E402
+from parakeet.backend.polars.engine import PolarsEngine  # noqa: E402
+from parakeet.backend.polars.ops.aggregations.numeric1d import (  # noqa: E402
+    PolarsNumeric1d,
+)
+from parakeet.core.dataset import DType, Field  # noqa: E402
+from parakeet.core.ops.agg import Agg  # noqa: E402
+from parakeet.core.ops.aggregations import Numeric1dAggFn  # noqa: E402
+from parakeet.core.ops.groupby import GroupBy  # noqa: E402
+from parakeet.core.ops.op import Seq  # noqa: E402
+
+
+@pytest.fixture
+def sample_data():
+    rng = np.random.default_rng(3)
+    n = 1000
+    return pd.DataFrame(
+        {
+            "A": rng.choice(["a", "b", "c"], n),
+            "B": rng.integers(0, 4, n),
+            "label": rng.integers(0, 2, n),
+            "value": rng.normal(size=n),
+        }
+    )
+
+
+def test_polars_schema(sample_data):
+    dataset = PolarsDataset(pl.from_pandas(sample_data))
+    assert dataset.schema == [
+        Field("A", DType.STRING),
+        Field("B", DType.INT64),
+        Field("label", DType.INT64),
+        Field("value", DType.FLOAT64),
+    ]
+    assert dataset.shape() == (1000, 4)
+
+
+def test_polars_frequency(sample_data):
+    dataset = PolarsDataset(pl.from_pandas(sample_data))
+    result = PolarsEngine().frequency(dataset, ["A", "B"])
+    expected = frequency(PandasDataset(sample_data), ["A", "B"])
+    assert_frame_equal(result.data, expected.data, check_dtype=False)
+    assert_frame_equal(result.display().data, expected.display().data)
+
+    result = PolarsEngine().frequency(dataset, ["A", "B"], top_k=4)
+    expected = frequency(PandasDataset(sample_data), ["A", "B"], top_k=4)
+    assert_frame_equal(result.data, expected.data, check_dtype=False)
+
+
+def test_polars_stratified(sample_data, tmp_path):
+    path = tmp_path / "data.parquet"
+    sample_data.to_parquet(path)
+    dataset = PolarsDataset.scan_parquet(str(path))
+
+    result = PolarsEngine().stratified(dataset, ["A", "B"], "label")
+    expected = stratification(sample_data, ["A", "B"], "label")
+    assert_frame_equal(result.data, expected.data, check_index_type=False)
+
+    filtered = PolarsEngine().stratified(
+        dataset.filter(pl.col("B") > 1), ["A"], "label", stats=["woe"]
+    )
+    expected = stratification(sample_data[sample_data["B"] > 1], ["A"], "label")
+    assert_frame_equal(filtered.data, expected.data[["woe"]], check_index_type=False)
+    with pytest.raises(ValueError):
+        PolarsEngine().stratified(dataset, ["A"], "label", label_type="multiclass")
+
+
+def test_polars_groupby_agg(sample_data):
+    plan = Seq(
+        [
+            GroupBy(["A"]),
+            Agg(
+                [
+                    PolarsNumeric1d("value", Numeric1dAggFn.SUM),
+                    PolarsNumeric1d("value", Numeric1dAggFn.MEDIAN),
+                ]
+            ),
+        ]
+    )
+    result = plan.transform(PolarsDataset(pl.from_pandas(sample_data))).collect()
+    expected = sample_data.groupby("A")["value"].agg(["sum", "median"])
+    assert result["A"].to_list() == ["a", "b", "c"]
+    assert np.allclose(result["SUM(value)"].to_numpy(), expected["sum"])
+    assert np.allclose(result["MEDIAN(value)"].to_numpy(), expected["median"])
+
+
+def test_polars_stability(sample_data):
+    data = sample_data.assign(
+        time=pd.Timestamp("2024-01-01") + pd.to_timedelta(sample_data["B"] * 40, "D")
+    )
+    result = PolarsEngine().stability(
+        PolarsDataset(pl.from_pandas(data), time="time"), ["A"], "label"
+    )
+    expected = stability(data, ["A"], "label", time="time")
+    assert result.periods == expected.periods
+    assert_frame_equal(result.data, expected.data, check_dtype=False)
+    assert_frame_equal(result.csi, expected.csi)
+
+
+@pytest.mark.parametrize("bins", [None, 50])
+@pytest.mark.parametrize("by", [None, ["A", "B"]])
+def test_polars_score_summary(sample_data, by, bins):
+    data = sample_data.assign(value=sample_data["value"].round(1))
+    result = PolarsEngine().score_summary(
+        PolarsDataset(pl.from_pandas(data)), "value", "label", by=by, bins=bins
+    )
+    expected = score_summary(data, "value", "label", by=by, bins=bins)
+    assert_frame_equal(result.summary, expected.summary, check_index_type=False)
+    assert_frame_equal(result.curves, expected.curves, check_index_type=False)
+
+
+@pytest.mark.parametrize("label", [[0, 1, 2], ["True", "False", "True"]])
+def test_polars_score_summary_non_binary_label(label):
+    data = pl.DataFrame({"value": [0.1, 0.5, 0.9], "label": label})
+    with pytest.raises(ValueError, match="not 0 or 1"):
+        PolarsEngine().score_summary(PolarsDataset(data), "value", "label")
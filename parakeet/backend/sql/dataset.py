@@ -0,0 +1,149 @@
+from typing import List, Optional
+
+import pandas as pd
+
+from parakeet.backend.sql.dialect import Dialect
+from parakeet.core.dataset import Dataset, DesiredSchema, Field, Fn, Schema
+
+
+class SQLDataset(Dataset):
+    """Dataset defined by a table or a query in a SQL database.
+
+    Operations compose queries, which are only executed when results are
+    fetched, so that data stays in the database.
+
+    Parameters
+    ----------
+    connection
+        DB-API connection, e.g. from `sqlite3` or `duckdb`.
+    query : str
+        Query selecting the dataset.
+    dialect : Dialect
+        SQL dialect of the database.
+    time : str, optional
+        Time column of the dataset.
+    """
+
+    def __init__(
+        self, connection, query: str, dialect: Dialect, time: Optional[str] = None
+    ):
+        self.connection = connection
+        self.query = query
+        self.dialect = dialect
+        self._time = time
+        self._schema: Optional[Schema] = None
+        dialect.prepare(connection)
+
+    @classmethod
+    def from_table(
+        cls, connection, table: str, dialect: Dialect, time: Optional[str] = None
+    ) -> "SQLDataset":
+        return cls(connection, f"SELECT * FROM {dialect.quote(table)}", dialect, time)
+
+    @property
+    def source(self) -> str:
+        """Dataset as a subquery, to be used in a `FROM` clause."""
+        return f"({self.query}) AS src"
+
+    @property
+    def schema(self) -> Schema:
+        # Describing a query runs it against the database, so do it only once.
+        if self._schema is None:
+            columns = self.dialect.describe(self.execute, self.query)
+            self._schema = Schema(
+                Field(name, self.dialect.dtype(dtype)) for name, dtype in columns
+            )
+        return self._schema
+
+    def shape(self):
+        n_rows = self.execute(f"SELECT COUNT(*) FROM {self.source}")[0][0]
+        return (n_rows, len(self.schema))
+
+    @property
+    def time(self):
+        return self._time
+
+    def execute(self, query: str) -> list:
+        """Run a query on the connection and fetch every row."""
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(query)
+            return cursor.fetchall() if cursor.description is not None else []
+        finally:
+            cursor.close()
+
+    def fetch(self, query: str, dtype=None) -> pd.DataFrame:
+        """Run a query on the connection and fetch the result as a frame."""
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(query)
+            columns = [d[0] for d in cursor.description]
+            return pd.DataFrame(cursor.fetchall(), columns=columns, dtype=dtype)
+        finally:
+            cursor.close()
+
+    def to_pandas(self) -> pd.DataFrame:
+        return self.fetch(self.query)
+
+    def groupby(self, by: List[str]) -> "Dataset":
+        return SQLGroupByDataset(self, by)
+
+    def select(self, columns: List[str]) -> "Dataset":
+        select = ", ".join(self.dialect.quote(c) for c in columns)
+        return SQLDataset(
+            self.connection,
+            f"SELECT {select} FROM {self.source}",
+            self.dialect,
+            self._time,
+        )
+
+    def agg(self, desired: DesiredSchema) -> "Dataset":
+        select = ", ".join(_to_sql_aggregations(desired, self.dialect))
+        return SQLDataset(
+            self.connection,
+            f"SELECT {select} FROM {self.source}",
+            self.dialect,
+            self._time,
+        )
+
+
+class SQLGroupByDataset(Dataset):
+    def __init__(self, dataset: SQLDataset, groups: List[str]) -> None:
+        self._dataset = dataset
+        self.groups: List[str] = groups
+
+    @property
+    def data(self) -> SQLDataset:
+        return self._dataset
+
+    @property
+    def schema(self) -> Schema:
+        return self._dataset.schema
+
+    def shape(self):
+        raise NotImplementedError("shape is not supported for grouped dataset.")
+
+    @property
+    def time(self):
+        return self._dataset.time
+
+    def groupby(self, _: List[str]) -> "Dataset":
+        raise NotImplementedError("groupby is not supported for grouped dataset.")
+
+    def agg(self, desired: DesiredSchema) -> "Dataset":
+        dialect = self._dataset.dialect
+        by = ", ".join(dialect.quote(g) for g in self.groups)
+        select = ", ".join([by] + _to_sql_aggregations(desired, dialect))
+        return SQLDataset(
+            self._dataset.connection,
+            f"SELECT {select} FROM {self._dataset.source} GROUP BY {by}"
+            f" ORDER BY {by}",
+            dialect,
+            self.time,
+        )
+
+
+def _to_sql_aggregations(sch: Schema, dialect: Dialect) -> List[str]:
+    return [
+        f"{f.fn(dialect)} AS {dialect.quote(f.name)}" for f in sch if isinstance(f, Fn)
+    ]
@@ -0,0 +1,166 @@
+"""SQL dialects supported by the SQL engine."""
+import math
+from typing import List, Tuple
+
+from parakeet.core.dataset import DType
+from parakeet.core.ops.aggregations import Numeric1dAggFn
+from parakeet.core.order import OrderBy
+
+_AGGREGATIONS = {
+    Numeric1dAggFn.COUNT: "COUNT({})",
+    Numeric1dAggFn.MAX: "MAX({})",
+    Numeric1dAggFn.MEAN: "AVG({})",
+    Numeric1dAggFn.MIN: "MIN({})",
+    Numeric1dAggFn.NUNIQUE: "COUNT(DISTINCT {})",
+    Numeric1dAggFn.STD: "STDDEV_SAMP({})",
+    Numeric1dAggFn.SUM: "SUM({})",
+    Numeric1dAggFn.VAR: "VAR_SAMP({})",
+}
+
+
+class Dialect:
+    """ANSI-like SQL dialect.
+
+    Divisions by zero and logarithms of zero yield signed infinities, as in
+    numpy, so that statistics of empty cells, e.g. the woe and iv of a cell
+    without ones, match the pandas backend. Undefined values, e.g. 0 / 0 or
+    logarithms of negative numbers, yield NULL, returned as missing values.
+    """
+
+    name = "ansi"
+    grouping_sets = True
+    """Whether `GROUP BY GROUPING SETS` is supported. Otherwise, each grouping
+       set is calculated by its own query, combined with `UNION ALL`."""
+    float_type = "DOUBLE"
+    infinity = "CAST('Infinity' AS DOUBLE)"
+    aggregations = _AGGREGATIONS
+
+    def prepare(self, connection) -> None:
+        """Prepare a connection before running queries on it."""
+
+    def quote(self, name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    def describe(self, execute, query: str) -> List[Tuple[str, str]]:
+        """Return the name and SQL type of each column of a query.
+
+        `execute` runs a statement and returns the fetched rows.
+        """
+        return [(r[0], r[1]) for r in execute(f"DESCRIBE {query}")]
+
+    def div(self, a: str, b: str) -> str:
+        inf = self.infinity
+        return (
+            f"CASE WHEN {b} = 0 THEN CASE WHEN {a} > 0 THEN {inf}"
+            f" WHEN {a} < 0 THEN -{inf} END"
+            f" ELSE CAST({a} AS {self.float_type}) / {b} END"
+        )
+
+    def ln(self, x: str) -> str:
+        return f"CASE WHEN {x} > 0 THEN LN({x}) WHEN {x} = 0 THEN -{self.infinity} END"
+
+    def total(self, expr: str) -> str:
+        """Value of an expression for the whole population.
+
+        Refers to the `__is_total` column, which flags the grand total row.
+        """
+        return f"SUM(CASE WHEN __is_total = 1 THEN {expr} END) OVER ()"
+
+    def grouping(self, dim: str) -> str:
+        """1 if the dimension is marginal in a grouping set row, 0 otherwise."""
+        return f"GROUPING({self.quote(dim)})"
+
+    def aggregate(self, op: Numeric1dAggFn, column: str) -> str:
+        if op not in self.aggregations:
+            raise ValueError(f"Aggregation {op} is not supported by {self.name}.")
+        return self.aggregations[op].format(self.quote(column))
+
+    def order_by(self, order_by: OrderBy) -> str:
+        return ", ".join(
+            f"{self.quote(d.dimension)} {'ASC' if d.ascending else 'DESC'} NULLS LAST"
+            for d in order_by.order_dims
+        )
+
+    def dtype(self, sql_type: str) -> DType:
+        sql_type = sql_type.upper()
+        if sql_type in ("INTEGER", "INT32", "INT"):
+            return DType.INT32
+        elif sql_type in ("BIGINT", "INT64"):
+            return DType.INT64
+        elif sql_type in ("REAL", "FLOAT", "FLOAT32"):
+            return DType.FLOAT32
+        elif sql_type in ("DOUBLE", "FLOAT64", "NUMERIC", "DECIMAL"):
+            return DType.FLOAT64
+        elif sql_type in ("VARCHAR", "TEXT", "STRING"):
+            return DType.STRING
+        elif sql_type in ("BOOLEAN", "BOOL"):
+            return DType.BOOL
+        elif sql_type.startswith("TIMESTAMP") or sql_type == "DATETIME":
+            return DType.DATETIME
+        else:
+            raise ValueError(f"Unknown dtype {sql_type}")
+
+
+class SQLiteDialect(Dialect):
+    """SQLite dialect, for in-process databases."""
+
+    name = "sqlite"
+    grouping_sets = False
+    float_type = "REAL"
+    # Literals too large for a double are read as infinity.
+    infinity = "9e999"
+    aggregations = {
+        op: fn
+        for op, fn in _AGGREGATIONS.items()
+        if op not in (Numeric1dAggFn.STD, Numeric1dAggFn.VAR)
+    }
+
+    def prepare(self, connection) -> None:
+        # LN is only built in when SQLite is compiled with math functions.
+        try:
+            connection.execute("SELECT LN(1)")
+        except Exception:
+            connection.create_function("LN", 1, math.log, deterministic=True)
+
+    def describe(self, execute, query: str) -> List[Tuple[str, str]]:
+        # Column types of a query are only available through a view.
+        view = "__parakeet_describe"
+        execute(f"DROP VIEW IF EXISTS {view}")
+        execute(f"CREATE TEMP VIEW {view} AS {query}")
+        try:
+            return [(r[1], r[2]) for r in execute(f"PRAGMA table_info({view})")]
+        finally:
+            execute(f"DROP VIEW IF EXISTS {view}")
+
+    def dtype(self, sql_type: str) -> DType:
+        # Follow SQLite's type affinity rules.
+        sql_type = sql_type.upper()
+        if "INT" in sql_type:
+            return DType.INT64
+        elif any(t in sql_type for t in ("CHAR", "CLOB", "TEXT")):
+            return DType.STRING
+        elif any(t in sql_type for t in ("REAL", "FLOA", "DOUB")):
+            return DType.FLOAT64
+        return super().dtype(sql_type)
+
+
+class DuckDBDialect(Dialect):
+    """DuckDB dialect, for in-process analytical databases."""
+
+    name = "duckdb"
+    aggregations = {
+        **_AGGREGATIONS,
+        Numeric1dAggFn.MEDIAN: "MEDIAN({})",
+        Numeric1dAggFn.MODE: "MODE({})",
+    }
+
+
+class BigQueryDialect(Dialect):
+    """BigQuery Standard SQL dialect."""
+
+    name = "bigquery"
+    float_type = "FLOAT64"
+    infinity = "CAST('inf' AS FLOAT64)"
+
+    def quote(self, name: str) -> str:
+        return "`" + name.replace("`", "\\`") + "`"
@@ -0,0 +1,283 @@
+"""Computation engine that pushes analyses down to SQL databases."""
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from parakeet.backend.sql.dataset import SQLDataset
+from parakeet.core.engine import Engine
+from parakeet.core.order import OrderBy, OrderDim
+from parakeet.stats import frequency, stratification
+from parakeet.stats.cube import _INTERNAL_MARGINAL, CubeArray, GroupingSets
+from parakeet.stats.stratification import LabelType, plan_stats
+
+_BASE_STATS = {
+    "count": lambda label: f"COUNT({label})",
+    "zeros": lambda label: f"SUM(CASE WHEN {label} = 0 THEN 1 ELSE 0 END)",
+    "ones": lambda label: f"SUM(CASE WHEN {label} = 1 THEN 1 ELSE 0 END)",
+}
+"""SQL expression of each base statistic, given the quoted label column."""
+
+_GROUPING = "__grouping"
+
+
+class SQLEngine(Engine):
+    """Calculate analyses with a single query on a SQL database.
+
+    Only the aggregated result is fetched. Marginals are calculated in the
+    database with `GROUPING SETS`, or with `UNION ALL` of one query per
+    grouping set for dialects without it. Derived statistics with a SQL
+    expression are calculated in outer `SELECT`s, and any other requested
+    statistic is calculated after fetching.
+    """
+
+    def frequency(
+        self,
+        dataset: SQLDataset,
+        dims: List[str],
+        order_by: Optional[OrderBy] = None,
+        top_k: Optional[int] = None,
+    ) -> frequency.Result:
+        """Calculate a frequency table for the given dimensions.
+
+        Parameters
+        ----------
+        dataset : SQLDataset
+            Input data set.
+        dims : list[str]
+            List of dimensions to calculate the frequency of.
+        order_by : OrderBy, optional
+            Order of the rows, by default ascending by each dimension, or by
+            decreasing frequency with `top_k`.
+        top_k : int, optional
+            Number of most frequent cells to fetch, by default every cell.
+            The other cells are folded into a single "Other" row, from totals
+            calculated in the database.
+
+        Returns
+        -------
+        frequency.Result
+            Frequency result.
+
+        """
+        data = dataset.fetch(self.compile_frequency(dataset, dims, order_by, top_k))
+        if top_k is not None:
+            n_cells, total = dataset.execute(self.compile_cells(dataset, dims))[0]
+            if n_cells > len(data):
+                rest = total - data["Frequency"].sum()
+                data = frequency.fold_other(data, dims, rest, rest / total)
+        return frequency.Result(data, dims)
+
+    def compile_frequency(
+        self,
+        dataset: SQLDataset,
+        dims: List[str],
+        order_by: Optional[OrderBy] = None,
+        top_k: Optional[int] = None,
+    ) -> str:
+        """Return the query calculating a frequency table."""
+        dialect = dataset.dialect
+        cols = ", ".join(dialect.quote(d) for d in dims)
+        count = "COUNT(*)"
+        percentage = dialect.div(count, f"SUM({count}) OVER ()")
+        query = (
+            f"SELECT {cols}, {count} AS {dialect.quote('Frequency')},"
+            f" {percentage} AS {dialect.quote('Percentage')}"
+            f" FROM {dataset.source} GROUP BY {cols}"
+        )
+        if top_k is None:
+            if order_by is None:
+                order_by = OrderBy.from_dimensions(dims, True)
+            return f"{query} ORDER BY {dialect.order_by(order_by)}"
+
+        # Ties are broken by the dimensions, as in `select_top_k`.
+        ranking = OrderBy(
+            [OrderDim("Frequency", False)]
+            + OrderBy.from_dimensions(dims, True).order_dims
+        )
+        query = f"{query} ORDER BY {dialect.order_by(ranking)} LIMIT {int(top_k)}"
+        if order_by is None:
+            return query
+        return f"SELECT * FROM ({query}) AS top ORDER BY {dialect.order_by(order_by)}"
+
+    def compile_cells(self, dataset: SQLDataset, dims: List[str]) -> str:
+        """Return the query counting the cells and rows of a frequency table."""
+        cols = ", ".join(dataset.dialect.quote(d) for d in dims)
+        return (
+            "SELECT COUNT(*), SUM(n) FROM"
+            f" (SELECT COUNT(*) AS n FROM {dataset.source} GROUP BY {cols}) AS cells"
+        )
+
+    def stratified(
+        self,
+        dataset: SQLDataset,
+        dims: List[str],
+        label: str,
+        stats=None,
+        grouping_sets: Optional[Iterable[Iterable[str]]] = None,
+        min_count: int = 0,
+        label_type: LabelType = LabelType.BINARY,
+    ) -> stratification.Result:
+        """Calculate the stratification of a data set.
+
+        Parameters
+        ----------
+        dataset : SQLDataset
+            Input data set.
+        dims : list[str]
+            List of dimensions to stratify.
+        label : str
+            Label of the stratification.
+        stats : list[str | Stat], optional
+            Statistics to calculate, by default every available statistic.
+        grouping_sets : Iterable[Iterable[str]], optional
+            Grouping sets to calculate, by default every subset of `dims`.
+        min_count : int, optional
+            Minimum count for a cell to be kept in the result, by default 0.
+        label_type : LabelType, optional
+            Type of the label. Only binary labels are supported.
+
+        Returns
+        -------
+        stratification.Result
+            Stratification result.
+
+        """
+        if label_type != LabelType.BINARY:
+            raise ValueError(
+                f"SQLEngine only stratifies binary labels, not {label_type}."
+            )
+        graph, outputs, base = plan_stats(stats, min_count)
+        query = self.compile_stratified(
+            dataset, dims, label, stats, grouping_sets, min_count
+        )
+        cube = _to_cube(dataset.fetch(query, dtype=object), dims)
+        # Base statistics are kept, so that results can be merged.
+        base = cube.select(base)
+        if grouping_sets is None:
+            grouping_sets = GroupingSets.cube(dims)
+        grouping_sets = frozenset(
+            tuple(d for d in dims if d in gset)
+            for gset in GroupingSets(tuple(map(tuple, grouping_sets))).with_total()
+        )
+        return stratification.Result(
+            graph.evaluate(cube, outputs),
+            base,
+            outputs,
+            min_count,
+            grouping_sets=grouping_sets,
+        )
+
+    def compile_stratified(
+        self,
+        dataset: SQLDataset,
+        dims: List[str],
+        label: str,
+        stats=None,
+        grouping_sets: Optional[Iterable[Iterable[str]]] = None,
+        min_count: int = 0,
+    ) -> str:
+        """Return the query calculating a stratification."""
+        dialect = dataset.dialect
+        q = dialect.quote
+        graph, outputs, base = plan_stats(stats, min_count)
+        unknown = [name for name in base if name not in _BASE_STATS]
+        if len(unknown) > 0:
+            raise ValueError(f"Base statistics {unknown} are not supported.")
+
+        if grouping_sets is None:
+            grouping_sets = GroupingSets.cube(dims)
+        grouping_sets = GroupingSets(tuple(map(tuple, grouping_sets))).with_total()
+        missing = {d for gset in grouping_sets for d in gset} - set(dims)
+        if len(missing) > 0:
+            raise ValueError(f"Grouping set dimensions {missing} are not dimensions.")
+
+        # Base statistics, for each grouping set.
+        k = len(dims)
+        aggs = ", ".join(f"{_BASE_STATS[n](q(label))} AS {q(n)}" for n in base)
+        having = ""
+        if min_count > 0:
+            having = f" HAVING {_BASE_STATS['count'](q(label))} >= {min_count}"
+        if dialect.grouping_sets:
+            # Dimensions outside every grouping set are always marginal.
+            grouped = {d for gset in grouping_sets for d in gset}
+            cols = ", ".join(q(d) if d in grouped else f"NULL AS {q(d)}" for d in dims)
+            grouping = " + ".join(
+                f"{dialect.grouping(d) if d in grouped else 1} * {1 << (k - 1 - i)}"
+                for i, d in enumerate(dims)
+            )
+            sets = ", ".join(
+                "(" + ", ".join(q(d) for d in gset) + ")" for gset in grouping_sets
+            )
+            query = (
+                f"SELECT {cols}, {grouping} AS {_GROUPING}, {aggs}"
+                f" FROM {dataset.source} GROUP BY GROUPING SETS ({sets}){having}"
+            )
+        else:
+            branches = []
+            for gset in grouping_sets:
+                cols = ", ".join(q(d) if d in gset else f"NULL AS {q(d)}" for d in dims)
+                mask = sum(
+                    1 << (k - 1 - i) for i, d in enumerate(dims) if d not in gset
+                )
+                group_by = ""
+                if len(gset) > 0:
+                    group_by = " GROUP BY " + ", ".join(q(d) for d in gset)
+                branches.append(
+                    f"SELECT {cols}, {mask} AS {_GROUPING}, {aggs}"
+                    f" FROM {dataset.source}{group_by}{having}"
+                )
+            query = " UNION ALL ".join(branches)
+
+        total = (1 << k) - 1
+        query = (
+            f"SELECT *, CASE WHEN {_GROUPING} = {total} THEN 1 ELSE 0 END"
+            f" AS __is_total FROM ({query}) AS t0"
+        )
+
+        # Derived statistics, one outer SELECT for each depth of the graph.
+        depth = {name: 0 for name in base}
+        layers = {}
+        for stat in graph.resolve(outputs):
+            if stat.is_base or stat.sql is None:
+                continue
+            if not all(i in depth for i in stat.inputs):
+                continue
+            depth[stat.name] = 1 + max((depth[i] for i in stat.inputs), default=0)
+            layers.setdefault(depth[stat.name], []).append(stat)
+        for d in sorted(layers):
+            cols = ", ".join(
+                f"{s.sql(dialect, *[q(i) for i in s.inputs])} AS {q(s.name)}"
+                for s in layers[d]
+            )
+            query = f"SELECT *, {cols} FROM ({query}) AS t{d}"
+
+        # Missing values are only kept as marginals, as in the cube.
+        select = ", ".join([q(d) for d in dims] + [_GROUPING] + [q(n) for n in depth])
+        where = " AND ".join(
+            f"({q(d)} IS NOT NULL OR ({_GROUPING} & {1 << (k - 1 - i)}) != 0)"
+            for i, d in enumerate(dims)
+        )
+        return f"SELECT {select} FROM ({query}) AS t WHERE {where}"
+
+
+def _to_cube(frame: pd.DataFrame, dims: List[str]) -> CubeArray:
+    """Convert grouping set rows to a cube, marking marginals."""
+    grouping = frame.pop(_GROUPING).to_numpy().astype(np.int64)
+    k = len(dims)
+    levels, codes = [], []
+    for i, dim in enumerate(dims):
+        marginal = (grouping >> (k - 1 - i)) & 1 == 1
+        values = pd.Series(frame.pop(dim).to_numpy()[~marginal]).infer_objects()
+        c, uniques = pd.factorize(values, sort=True)
+        code = np.full(len(frame), len(uniques), dtype=np.int64)
+        code[~marginal] = c
+        levels.append(pd.Index(list(uniques) + [_INTERNAL_MARGINAL], name=dim))
+        codes.append(code)
+
+    index = pd.MultiIndex(levels=levels, codes=codes, names=dims)
+    values = frame.infer_objects().set_axis(index)
+    for col in values.columns:
+        if values[col].dtype == object:
+            values[col] = values[col].astype(float)
+    return CubeArray.from_frame(values)
@@ -0,0 +1,11 @@
+from parakeet.core.ops.aggregations import Numeric1dAggFn, _Numeric1dAgg
+
+
+class SQLNumeric1d(_Numeric1dAgg):
+    def __init__(self, input_col: str, op: Numeric1dAggFn) -> None:
+        super().__init__(input_col, op)
+
+    @property
+    def fn(self) -> callable:
+        """Return a function building the SQL expression for a dialect."""
+        return lambda dialect: dialect.aggregate(self.op, self.input_column)
@@ -0,0 +1,163 @@
+"""Test the SQL engine on in-process databases against the pandas implementation."""
+
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from parakeet.backend.pandas.dataset import PandasDataset
+from parakeet.backend.pandas.stats.frequency import frequency
+from parakeet.backend.pandas.stats.stratification import stratification
+from parakeet.backend.sql.dataset import SQLDataset
+from parakeet.backend.sql.dialect import DuckDBDialect, SQLiteDialect
+from parakeet.backend.sql.engine import SQLEngine
+from parakeet.backend.sql.ops.aggregations.numeric1d import SQLNumeric1d
+from parakeet.core.dataset import DType, Field
+from parakeet.core.ops.agg import Agg
+from parakeet.core.ops.aggregations import Numeric1dAggFn
+from parakeet.core.ops.groupby import GroupBy
+from parakeet.core.ops.op import Seq
+from parakeet.core.order import OrderBy
+
+
+@pytest.fixture
+def sample_data():
+    rng = np.random.default_rng(5)
+    n = 1000
+    return pd.DataFrame(
+        {
+            "A": rng.choice(["a", "b", "c"], n),
+            "B": rng.integers(0, 4, n),
+            "label": rng.integers(0, 2, n),
+            "value": rng.normal(size=n),
+        }
+    )
+
+
+def _dataset(dialect: str, data: pd.DataFrame) -> SQLDataset:
+    """Load data into an in-process database of the given dialect."""
+    if dialect == "sqlite":
+        connection = sqlite3.connect(":memory:")
+        data.to_sql("data", connection, index=False)
+        return SQLDataset.from_table(connection, "data", SQLiteDialect())
+
+    duckdb = pytest.importorskip("duckdb")
+    connection = duckdb.connect()
+    connection.register("frame", data)
+    connection.execute("CREATE TABLE data AS SELECT * FROM frame")
+    return SQLDataset.from_table(connection, "data", DuckDBDialect())
+
+
+@pytest.fixture(params=["sqlite", "duckdb"])
+def dataset(request, sample_data):
+    return _dataset(request.param, sample_data)
+
+
+def test_sql_schema(dataset):
+    assert dataset.shape() == (1000, 4)
+    assert [f.name for f in dataset.schema] == ["A", "B", "label", "value"]
+    assert dataset.schema[0] == Field("A", DType.STRING)
+
+
+def test_sql_frequency(dataset, sample_data):
+    expected = frequency(PandasDataset(sample_data), ["A", "B"])
+    result = SQLEngine().frequency(dataset, ["A", "B"])
+    assert_frame_equal(result.data, expected.data, check_dtype=False)
+
+    order_by = OrderBy.from_str("Frequency desc")
+    result = SQLEngine().frequency(dataset, ["A", "B"], order_by)
+    assert result.data["Frequency"].is_monotonic_decreasing
+
+
+def test_sql_frequency_top_k(dataset, sample_data):
+    expected = frequency(PandasDataset(sample_data), ["A", "B"], top_k=5)
+    result = SQLEngine().frequency(dataset, ["A", "B"], top_k=5)
+    assert len(result.data) == 6
+    assert_frame_equal(result.data, expected.data, check_dtype=False)
+
+    result = SQLEngine().frequency(dataset, ["A"], OrderBy.from_str("A desc"), 3)
+    assert result.data["A"].to_list() == ["c", "b", "a"]
+
+
+def test_sql_stratified(dataset, sample_data):
+    expected = stratification(sample_data, ["A", "B"], "label")
+    result = SQLEngine().stratified(dataset, ["A", "B"], "label")
+    assert_frame_equal(result.data, expected.data, check_index_type=False)
+    with pytest.raises(ValueError):
+        SQLEngine().stratified(dataset, ["A"], "value", label_type="continuous")
+
+
+def test_sql_stratified_merge(sample_data):
+    history, batch = sample_data.iloc[:600], sample_data.iloc[600:]
+    expected = stratification(sample_data, ["A", "B"], "label")
+    result = SQLEngine().stratified(_dataset("sqlite", history), ["A", "B"], "label")
+    merged = result.merge(
+        SQLEngine().stratified(_dataset("sqlite", batch), ["A", "B"], "label")
+    )
+    assert_frame_equal(merged.data, expected.data, check_index_type=False)
+    # Results of both engines describe the same grouping sets.
+    assert merged.grouping_sets == expected.grouping_sets
+    pandas = stratification(batch, ["A", "B"], "label")
+    assert_frame_equal(result.merge(pandas).data, expected.data, check_index_type=False)
+
+    pruned = SQLEngine().stratified(
+        _dataset("sqlite", history), ["A"], "label", min_count=3
+    )
+    assert pruned.min_count == 3
+    with pytest.raises(ValueError):
+        pruned.merge(pruned)
+
+
+def test_sql_stratified_grouping_sets(dataset, sample_data):
+    expected = stratification(
+        sample_data, ["A", "B"], "label", grouping_sets=[["A"]], min_count=300
+    )
+    result = SQLEngine().stratified(
+        dataset, ["A", "B"], "label", ["woe"], grouping_sets=[["A"]], min_count=300
+    )
+    assert_frame_equal(result.data, expected.data[["woe"]], check_index_type=False)
+
+
+@pytest.mark.parametrize("dialect", ["sqlite", "duckdb"])
+def test_sql_stratified_empty_cells(sample_data, dialect):
+    # Some cells have no zeros or no ones, so their woe and iv are infinite.
+    data = sample_data.copy()
+    data.loc[(data["A"] == "a") & (data["B"] == 0), "label"] = 1
+    data.loc[(data["A"] == "b") & (data["B"] == 1), "label"] = 0
+    expected = stratification(data, ["A", "B"], "label")
+    assert np.isinf(expected.data["woe"]).any()
+
+    result = SQLEngine().stratified(_dataset(dialect, data), ["A", "B"], "label")
+    assert_frame_equal(result.data, expected.data, check_index_type=False)
+
+
+def test_sql_compile_grouping_sets():
+    # Compiling does not run anything, so no database is needed.
+    dataset = SQLDataset(None, 'SELECT * FROM "data"', DuckDBDialect())
+    query = SQLEngine().compile_stratified(
+        dataset, ["A", "B"], "label", ["woe"], grouping_sets=[["A", "B"], ["B"]]
+    )
+    assert 'GROUP BY GROUPING SETS (("A", "B"), ("B"), ())' in query
+    assert 'GROUPING("A") * 2 + GROUPING("B") * 1 AS' in query
+    assert "UNION ALL" not in query
+
+
+def test_sql_groupby_agg(dataset, sample_data):
+    plan = Seq(
+        [
+            GroupBy(["A"]),
+            Agg(
+                [
+                    SQLNumeric1d("value", Numeric1dAggFn.SUM),
+                    SQLNumeric1d("value", Numeric1dAggFn.COUNT),
+                ]
+            ),
+        ]
+    )
+    result = plan.transform(dataset).to_pandas()
+    expected = sample_data.groupby("A")["value"].agg(["sum", "count"])
+    assert result["A"].to_list() == ["a", "b", "c"]
+    assert np.allclose(result["SUM(value)"], expected["sum"])
+    assert result["COUNT(value)"].to_list() == expected["count"].to_list()
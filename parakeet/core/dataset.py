@@ -1,7 +1,7 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from enum import Enum
-from typing import List, Tuple
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
 
 
 class DType(Enum):
@@ -14,9 +14,11 @@ class DType(Enum):
     STRING = 5
     BOOL = 6
     DATETIME = 7
+    CATEGORICAL = 8
+    """Dictionary-encoded values: integer codes into a dictionary of values."""
 
 
-@dataclass
+@dataclass(frozen=True)
 class Field:
     """Field of a dataset."""
 
@@ -24,7 +26,83 @@ class Field:
     dtype: DType
 
 
-Schema = List[Field]
+class Schema(Sequence[Field]):
+    """Immutable sequence of fields, indexed by position and by name.
+
+    Schemas are hashable, so that work derived from a schema, such as a
+    compiled plan, can be cached across datasets sharing it.
+
+    Parameters
+    ----------
+    fields : iterable of Field
+        Fields of the schema. Their names must be unique.
+    """
+
+    __slots__ = ("_fields", "_index", "_hash")
+
+    def __init__(self, fields: Iterable[Field] = ()) -> None:
+        self._fields = tuple(fields)
+        self._index = {f.name: i for i, f in enumerate(self._fields)}
+        if len(self._index) != len(self._fields):
+            raise ValueError("Schema contains duplicate names.")
+        self._hash = hash(self._fields)
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        return tuple(self._index)
+
+    def get(self, name: str) -> Optional[Field]:
+        """Return the field with the given name, if any."""
+        i = self._index.get(name)
+        return None if i is None else self._fields[i]
+
+    def select(self, names: Iterable[str]) -> "Schema":
+        """Return the schema of the given columns, in the given order."""
+        return Schema(self[name] for name in names)
+
+    def with_field(self, field: Field) -> "Schema":
+        """Return the schema with `field` replacing its namesake, or appended."""
+        fields = list(self._fields)
+        i = self._index.get(field.name)
+        if i is None:
+            fields.append(field)
+        else:
+            fields[i] = field
+        return Schema(fields)
+
+    def __getitem__(self, key: Union[int, slice, str]):
+        if isinstance(key, str):
+            return self._fields[self._index[key]]
+        if isinstance(key, slice):
+            return Schema(self._fields[key])
+        return self._fields[key]
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __contains__(self, item: Union[str, Field]) -> bool:
+        if isinstance(item, str):
+            return item in self._index
+        return item in self._fields
+
+    def __add__(self, other: Iterable[Field]) -> "Schema":
+        return Schema(self._fields + tuple(other))
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Schema):
+            return self._hash == other._hash and self._fields == other._fields
+        if isinstance(other, (list, tuple)):
+            return self._fields == tuple(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __repr__(self) -> str:
+        return f"Schema({list(self._fields)!r})"
 
 
 class Fn(ABC):
@@ -58,6 +136,15 @@ class Fn(ABC):
     def output_dtype(self, input_schema: Schema) -> DType:
         """Output data type returned by the function."""
 
+    def state(self) -> type:
+        """Type of the mergeable state of the function, an `AggState`.
+
+        States let an aggregation run over parts of a dataset, whose results
+        are merged (see `parakeet.core.ops.partial`). Functions without a
+        mergeable state raise a `ValueError`.
+        """
+        raise ValueError(f"Aggregation {self.name} has no mergeable state.")
+
 
 DesiredSchema = List[Fn | Field]
 """Describes the desired schema of a dataset, allowing some fields to be
@@ -86,3 +173,26 @@ class Dataset(ABC):
     @abstractmethod
     def agg(self, desired: DesiredSchema) -> "Dataset":
         """Aggregate the dataset."""
+
+    def select(self, columns: List[str]) -> "Dataset":
+        """Keep only the given columns.
+
+        Backends that can avoid reading or copying the remaining columns
+        should override this. By default, the dataset is returned as is.
+        """
+        return self
+
+    def groupby_agg(self, by: List[str], desired: DesiredSchema) -> "Dataset":
+        """Group by the given columns and aggregate them in a single call."""
+        return self.groupby(by).agg(desired)
+
+    def partial_agg(self, by: List[str], desired: DesiredSchema):
+        """Reduce the dataset to mergeable states of the aggregations.
+
+        Returns a `parakeet.core.ops.partial.PartialAgg`, with the states
+        of the functions of `desired` per group of `by`. Backends that can
+        split aggregations across chunks should override this.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support partial aggregations."
+        )
@@ -1,14 +1,56 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 
 from parakeet.core.dataset import Dataset
 
 
 class Engine(ABC):
     @abstractmethod
-    def frequency(self, dataset: Dataset, dims: List[str]):
-        """Calculate a frequency table for the given dimensions."""
+    def frequency(self, dataset: Dataset, dims: List[str], top_k: Optional[int] = None):
+        """Calculate a frequency table for the given dimensions.
+
+        With `top_k`, only the `top_k` most frequent cells are kept, and the
+        others are folded into a single "Other" row.
+        """
 
     @abstractmethod
-    def stratified(self, dataset: Dataset, dims: List[str], schema):
-        """Calculate a set of metrics stratified by the given dimensions."""
+    def stratified(
+        self,
+        dataset: Dataset,
+        dims: List[str],
+        label: str,
+        stats: Optional[List] = None,
+    ):
+        """Calculate a set of metrics stratified by the given dimensions.
+
+        `stats` lists the metrics to calculate, by default every metric
+        available for the label.
+        """
+
+    def stability(self, dataset: Dataset, dims: List[str], label: str, **kwargs):
+        """Calculate the stratification of each period and its drift over time.
+
+        Periods are taken from the time column of the dataset, and compared
+        with a reference period by population and characteristic stability
+        indices. See `parakeet.stats.stability`.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support stability over time."
+        )
+
+    def score_summary(
+        self,
+        dataset: Dataset,
+        score: str,
+        label: str,
+        by: Optional[List[str]] = None,
+        **kwargs,
+    ):
+        """Summarize a continuous score against a binary label, per stratum.
+
+        Calculates the AUC, Gini, KS and Lorenz curve of each stratum of `by`.
+        See `parakeet.stats.score`.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} does not support score summaries."
+        )
@@ -1,7 +1,7 @@
-from typing import List
+from typing import List, Optional, Set, Tuple
 
-from parakeet.core.dataset import Dataset, Field, Fn, Schema
-from parakeet.core.ops.op import Op
+from parakeet.core.dataset import Dataset, DesiredSchema, Field, Fn, Schema
+from parakeet.core.ops.op import Op, Step
 
 
 class Agg(Op):
@@ -21,10 +21,28 @@ class Agg(Op):
 
         return dataset.agg(self._output_schema(dataset.schema, by))
 
-    def _output_schema(self, input_schema: Schema, by: List[str]) -> Schema:
+    def partial(self, dataset: Dataset, by: Optional[List[str]] = None):
+        """Reduce part of a dataset to mergeable states of each function.
+
+        This is the partial phase of the aggregation: states of the parts
+        of a dataset are merged with `PartialAgg.merge`, and turned into the
+        aggregated dataset with `PartialAgg.result`. Grouped datasets are
+        reduced per group, as is the dataset grouped by `by`, if given.
+        """
+        if by is None:
+            by = getattr(dataset, "groups", [])
+        return dataset.partial_agg(by, self._output_schema(dataset.schema, by))
+
+    def bind(self, schema: Schema) -> Tuple[Step, Optional[Schema]]:
+        desired = self._output_schema(schema, [])
+        return (lambda dataset: dataset.agg(desired)), resolve(desired, schema)
+
+    def required_columns(self, needed: Optional[Set[str]]) -> Optional[Set[str]]:
+        return {fn.input_column for fn in self.agg}
+
+    def _output_schema(self, input_schema: Schema, by: List[str]) -> DesiredSchema:
         if len(by) > 0:
-            cols = [f.name for f in input_schema]
-            not_contained = [c for c in by if c not in cols]
+            not_contained = [c for c in by if c not in input_schema]
             if len(not_contained) > 0:
                 raise ValueError(
                     f"Aggregation columns {not_contained} are not contained in the dataset"
@@ -36,3 +54,14 @@ class Agg(Op):
 
         by_fields = [f for f in input_schema if f.name in by]
         return by_fields + self.agg
+
+    def __repr__(self) -> str:
+        return f"Agg({', '.join(fn.name for fn in self.agg)})"
+
+
+def resolve(desired: DesiredSchema, input_schema: Schema) -> Schema:
+    """Schema of the dataset produced from `input_schema` by `desired`."""
+    return Schema(
+        Field(f.name, f.output_dtype(input_schema)) if isinstance(f, Fn) else f
+        for f in desired
+    )
@@ -1,6 +1,8 @@
 from enum import StrEnum, auto
+from typing import Type
 
 from parakeet.core.dataset import DType, Fn, Schema
+from parakeet.core.ops.aggregations.state import AggState, state_type
 
 
 class Numeric1dAggFn(StrEnum):
@@ -39,21 +41,11 @@ class _Numeric1dAgg(Fn):
         return self._input_col
 
     def valid(self, input_schema: Schema) -> bool:
-        idx = _find(input_schema, self._input_col)
-        supported_type = input_schema[idx].dtype in {
-            DType.INT64,
-            DType.FLOAT64,
-        }
-        return idx >= 0 and supported_type
+        field = input_schema.get(self._input_col)
+        return field is not None and field.dtype in {DType.INT64, DType.FLOAT64}
 
     def output_dtype(self, input_schema: Schema) -> DType:
-        idx = _find(input_schema, self._input_col)
-        return input_schema[idx].dtype
+        return input_schema[self._input_col].dtype
 
-
-def _find(iterable, value) -> int:
-    """Find the index of the first occurence of value in iterable."""
-    for i, v in enumerate(iterable):
-        if v.name == value:
-            return i
-    return -1
+    def state(self) -> Type[AggState]:
+        return state_type(str(self.op))
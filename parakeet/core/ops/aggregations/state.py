@@ -0,0 +1,342 @@
+"""Mergeable states of aggregation functions, for many groups at once.
+
+An aggregation split across chunks or processes runs in two phases: each
+part of the data is reduced to a state per group (partial phase), states of
+the parts are merged, and the merged states are turned into the aggregated
+values (final phase). States only depend on group positions, not on keys;
+see `parakeet.core.ops.partial` to match groups by key.
+"""
+from abc import ABC, abstractmethod
+from typing import Type
+
+import numpy as np
+import pandas as pd
+
+from parakeet.stats.quantile import QuantileSketch
+
+
+class AggState(ABC):
+    """State of an aggregation function, for each of `n_groups` groups."""
+
+    n_groups: int
+
+    @classmethod
+    @abstractmethod
+    def of(cls, values: np.ndarray, ids: np.ndarray, n_groups: int) -> "AggState":
+        """State of values, given the position of the group of each value.
+
+        Missing values are ignored.
+        """
+
+    @abstractmethod
+    def merge(self, other: "AggState") -> "AggState":
+        """Merge the state of disjoint values of the same groups."""
+
+    @abstractmethod
+    def take(self, positions: np.ndarray, n_groups: int) -> "AggState":
+        """Move group `i` to position `positions[i]` among `n_groups` groups.
+
+        Groups at other positions are empty.
+        """
+
+    @abstractmethod
+    def finalize(self) -> np.ndarray:
+        """Aggregated value of each group."""
+
+    def update(self, values: np.ndarray, ids: np.ndarray) -> "AggState":
+        """Add values, given the position of the group of each value."""
+        return self.merge(type(self).of(values, ids, self.n_groups))
+
+
+def _present(values: np.ndarray, ids: np.ndarray):
+    values = np.asarray(values)
+    ids = np.asarray(ids, dtype=np.int64)
+    if values.dtype.kind == "f":
+        present = ~np.isnan(values)
+        values, ids = values[present], ids[present]
+    return values, ids
+
+
+def _scatter(values: np.ndarray, positions: np.ndarray, n: int, fill) -> np.ndarray:
+    result = np.full(n, fill, dtype=values.dtype)
+    result[positions] = values
+    return result
+
+
+class _Reduction(AggState):
+    """Count of values, and their reduction by a ufunc, e.g. a sum."""
+
+    ufunc: np.ufunc
+
+    def __init__(self, count: np.ndarray, value: np.ndarray) -> None:
+        self.n_groups = len(count)
+        self.count = count
+        self.value = value
+
+    @classmethod
+    def identity(cls, dtype: np.dtype):
+        return 0
+
+    @classmethod
+    def of(cls, values, ids, n_groups):
+        values, ids = _present(values, ids)
+        count = np.bincount(ids, minlength=n_groups)
+        dtype = np.int64 if values.dtype.kind in "biu" else np.float64
+        value = np.full(n_groups, cls.identity(np.dtype(dtype)), dtype=dtype)
+        cls.ufunc.at(value, ids, values.astype(dtype, copy=False))
+        return cls(count, value)
+
+    def merge(self, other):
+        # Parts may have different dtypes, e.g. int and float chunks of a
+        # column, so the merge does not depend on their order.
+        dtype = np.result_type(self.value, other.value)
+        value = self.ufunc(self._values_as(dtype), other._values_as(dtype))
+        return type(self)(self.count + other.count, value)
+
+    def _values_as(self, dtype: np.dtype) -> np.ndarray:
+        """Values cast to `dtype`, with its identity in empty groups."""
+        if dtype == self.value.dtype:
+            return self.value
+        return np.where(
+            self.count > 0, self.value.astype(dtype), self.identity(np.dtype(dtype))
+        )
+
+    def take(self, positions, n_groups):
+        fill = self.identity(self.value.dtype)
+        return type(self)(
+            _scatter(self.count, positions, n_groups, 0),
+            _scatter(self.value, positions, n_groups, fill),
+        )
+
+    def finalize(self):
+        # Groups without values are missing, as floats for integer values.
+        if self.value.dtype.kind != "f" and (self.count > 0).all():
+            return self.value
+        return np.where(self.count > 0, self.value, np.nan)
+
+
+class CountState(_Reduction):
+    """Number of non-missing values."""
+
+    ufunc = np.add
+
+    def finalize(self):
+        return self.count
+
+
+class SumState(_Reduction):
+    """Sum of values, 0 for groups without values."""
+
+    ufunc = np.add
+
+    def finalize(self):
+        return self.value
+
+
+class MinState(_Reduction):
+    """Minimum of values."""
+
+    ufunc = np.minimum
+
+    @classmethod
+    def identity(cls, dtype):
+        return np.iinfo(dtype).max if dtype.kind in "iu" else np.inf
+
+
+class MaxState(_Reduction):
+    """Maximum of values."""
+
+    ufunc = np.maximum
+
+    @classmethod
+    def identity(cls, dtype):
+        return np.iinfo(dtype).min if dtype.kind in "iu" else -np.inf
+
+
+class MomentState(AggState):
+    """Count, mean and sum of squared deviations from the mean.
+
+    Moments of each part are calculated in two passes, and merged with the
+    pairwise update of Chan et al. ("Updating Formulae and a Pairwise
+    Algorithm for Computing Sample Variances", 1979), which is numerically
+    stable, unlike merging sums of squares.
+    """
+
+    def __init__(self, count: np.ndarray, mean: np.ndarray, m2: np.ndarray):
+        self.n_groups = len(count)
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    @classmethod
+    def of(cls, values, ids, n_groups):
+        values, ids = _present(values, ids)
+        values = values.astype(np.float64, copy=False)
+        count = np.bincount(ids, minlength=n_groups).astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.bincount(ids, values, minlength=n_groups) / count
+        mean[count == 0] = 0
+        m2 = np.bincount(ids, (values - mean[ids]) ** 2, minlength=n_groups)
+        return cls(count, mean, m2)
+
+    def merge(self, other):
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = np.where(count > 0, other.count / count, 0)
+        mean = self.mean + delta * share
+        m2 = self.m2 + other.m2 + delta**2 * self.count * share
+        return type(self)(count, mean, m2)
+
+    def take(self, positions, n_groups):
+        return type(self)(
+            _scatter(self.count, positions, n_groups, 0),
+            _scatter(self.mean, positions, n_groups, 0),
+            _scatter(self.m2, positions, n_groups, 0),
+        )
+
+    def finalize(self):
+        return np.where(self.count > 0, self.mean, np.nan)
+
+    def var(self) -> np.ndarray:
+        """Sample variance of each group, missing with fewer than 2 values."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 1, self.m2 / (self.count - 1), np.nan)
+
+
+class VarState(MomentState):
+    """Sample variance of values."""
+
+    def finalize(self):
+        return self.var()
+
+
+class StdState(MomentState):
+    """Sample standard deviation of values."""
+
+    def finalize(self):
+        return np.sqrt(self.var())
+
+
+class _ValueCounts(AggState):
+    """Count of each distinct value of each group.
+
+    Memory grows with the number of distinct values of each group.
+    """
+
+    def __init__(self, n_groups: int, group, value, count) -> None:
+        self.n_groups = n_groups
+        self.group = group
+        self.value = value
+        self.count = count
+
+    @classmethod
+    def _counted(cls, n_groups, group, value, count) -> "_ValueCounts":
+        if len(group) == 0:
+            return cls(n_groups, group, value, count)
+        order = np.lexsort((value, group))
+        group, value, count = group[order], value[order], count[order]
+        starts = np.flatnonzero(
+            np.r_[True, (group[1:] != group[:-1]) | (value[1:] != value[:-1])]
+        )
+        return cls(
+            n_groups,
+            group[starts],
+            value[starts],
+            np.add.reduceat(count, starts),
+        )
+
+    @classmethod
+    def of(cls, values, ids, n_groups):
+        values, ids = _present(values, ids)
+        return cls._counted(n_groups, ids, values, np.ones(len(ids), dtype=np.int64))
+
+    def merge(self, other):
+        return self._counted(
+            self.n_groups,
+            np.concatenate([self.group, other.group]),
+            np.concatenate([self.value, other.value]),
+            np.concatenate([self.count, other.count]),
+        )
+
+    def take(self, positions, n_groups):
+        group = positions[self.group]
+        return self._counted(n_groups, group, self.value, self.count)
+
+
+class DistinctState(_ValueCounts):
+    """Number of distinct values."""
+
+    def finalize(self):
+        return np.bincount(self.group, minlength=self.n_groups)
+
+
+class ModeState(_ValueCounts):
+    """Most frequent value, the smallest one in case of ties."""
+
+    def finalize(self):
+        result = np.full(self.n_groups, np.nan)
+        # Sorted by group then decreasing count, ties by increasing value.
+        order = np.lexsort((self.value, -self.count, self.group))
+        group = self.group[order]
+        first = np.flatnonzero(np.r_[True, group[1:] != group[:-1]])
+        result[group[first]] = self.value[order][first]
+        return result
+
+
+class MedianState(AggState):
+    """Approximate median of values, from a t-digest of each group.
+
+    See `parakeet.stats.quantile.QuantileSketch` for its accuracy.
+    """
+
+    def __init__(self, sketch) -> None:
+        self.n_groups = len(sketch.keys)
+        self.sketch = sketch
+
+    @classmethod
+    def of(cls, values, ids, n_groups):
+        keys = pd.RangeIndex(n_groups)
+        return cls(QuantileSketch.from_values(values, ids, keys))
+
+    def merge(self, other):
+        return MedianState(self.sketch.merge(other.sketch))
+
+    def take(self, positions, n_groups):
+        sketch = self.sketch
+        return MedianState(
+            QuantileSketch(
+                pd.RangeIndex(n_groups),
+                positions[sketch.group],
+                sketch.mean,
+                sketch.weight,
+                _scatter(sketch.minimum, positions, n_groups, np.inf),
+                _scatter(sketch.maximum, positions, n_groups, -np.inf),
+                sketch.compression,
+            )
+        )
+
+    def finalize(self):
+        return self.sketch.median().to_numpy()
+
+
+def state_type(fn: str) -> Type[AggState]:
+    """State of the numeric aggregation function named `fn`, e.g. "sum"."""
+    try:
+        return _STATES[fn]
+    except KeyError:
+        raise ValueError(f"Aggregation {fn} has no mergeable state.") from None
+
+
+_STATES = {
+    "count": CountState,
+    "max": MaxState,
+    "mean": MomentState,
+    "median": MedianState,
+    "min": MinState,
+    "mode": ModeState,
+    "nunique": DistinctState,
+    "std": StdState,
+    "sum": SumState,
+    "var": VarState,
+}
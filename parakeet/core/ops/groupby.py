@@ -1,7 +1,8 @@
-from typing import List
+from typing import List, Optional, Set, Tuple
 
 from parakeet.core.dataset import Dataset, Schema
-from parakeet.core.ops.op import Op
+from parakeet.core.ops.agg import Agg, resolve
+from parakeet.core.ops.op import Op, Step
 
 
 class GroupBy(Op):
@@ -13,14 +14,60 @@ class GroupBy(Op):
         self.by = by
 
     def transform(self, dataset: Dataset) -> Dataset:
-        cols = [f.name for f in dataset.schema]
-        not_contained = [c for c in self.by if c not in cols]
+        step, _ = self.bind(dataset.schema)
+        return step(dataset)
+
+    def bind(self, schema: Schema) -> Tuple[Step, Optional[Schema]]:
+        not_contained = [c for c in self.by if c not in schema]
         if len(not_contained) > 0:
             raise ValueError(
                 f"Columns {not_contained} are not contained in the dataset."
             )
 
-        return dataset.groupby(self.by)
+        by = self.by
+        # Grouped datasets have no schema of their own to thread along.
+        return (lambda dataset: dataset.groupby(by)), None
+
+    def required_columns(self, needed: Optional[Set[str]]) -> Optional[Set[str]]:
+        return None if needed is None else needed | set(self.by)
 
     def _output_schema(self, input_schema: Schema) -> Schema:
         return input_schema
+
+    def __repr__(self) -> str:
+        return f"GroupBy({', '.join(self.by)})"
+
+
+class GroupByAgg(Op):
+    """Group By operation followed by an aggregation, in a single call.
+
+    The optimizer fuses a `GroupBy` directly followed by an `Agg` into this
+    operation, so that backends never materialize the grouped dataset.
+    """
+
+    def __init__(self, by: List[str], agg: Agg) -> None:
+        assert len(by) > 0
+        assert len(by) == len(set(by))
+        self.by = by
+        self.agg = agg
+
+    def transform(self, dataset: Dataset) -> Dataset:
+        step, _ = self.bind(dataset.schema)
+        return step(dataset)
+
+    def bind(self, schema: Schema) -> Tuple[Step, Optional[Schema]]:
+        by = self.by
+        desired = self.agg._output_schema(schema, by)
+        return (lambda dataset: dataset.groupby_agg(by, desired)), resolve(
+            desired, schema
+        )
+
+    def required_columns(self, needed: Optional[Set[str]]) -> Optional[Set[str]]:
+        return set(self.by) | self.agg.required_columns(needed)
+
+    def _output_schema(self, input_schema: Schema) -> Schema:
+        return resolve(self.agg._output_schema(input_schema, self.by), input_schema)
+
+    def __repr__(self) -> str:
+        names = ", ".join(fn.name for fn in self.agg.agg)
+        return f"GroupByAgg({', '.join(self.by)}; {names})"
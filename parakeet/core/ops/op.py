@@ -1,8 +1,15 @@
 from abc import ABC, abstractmethod
-from typing import List
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
+from parakeet.core import profile
 from parakeet.core.dataset import Dataset, Schema
 
+Step = Callable[[Dataset], Dataset]
+"""Operation bound to a schema, which runs without validating it again."""
+
+_MAX_COMPILED = 64
+
 
 class Op(ABC):
     """Base operation performed on datasets."""
@@ -15,21 +22,148 @@ class Op(ABC):
     def _output_schema(self, input_schema: Schema) -> Schema:
         """Return the schema of the output dataset."""
 
+    def bind(self, schema: Schema) -> Tuple[Step, Optional[Schema]]:
+        """Validate the operation against the schema of its input, once.
+
+        Returns the step applying the operation to datasets with this schema,
+        and the schema of its output, or `None` when it is not known ahead of
+        execution. The default step is `transform`, which validates each run.
+        """
+        return self.transform, None
+
+    def required_columns(self, needed: Optional[Set[str]]) -> Optional[Set[str]]:
+        """Columns read by the operation, given the columns needed downstream.
+
+        `None` stands for every column of the dataset, which is the default
+        for operations that do not declare what they read.
+        """
+        return None
+
+    def unused(self, needed: Optional[Set[str]]) -> bool:
+        """Whether the output of the operation is never read downstream."""
+        return False
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
+
+
+@dataclass(frozen=True)
+class CompiledPlan:
+    """Plan validated against a schema.
+
+    It runs on any dataset with this schema without planning or validation.
+    When profiling is enabled, each step runs in a span named after its
+    operation.
+    """
+
+    schema: Schema
+    steps: Tuple[Step, ...]
+    output_schema: Optional[Schema]
+    names: Tuple[str, ...] = ()
+
+    def transform(self, dataset: Dataset) -> Dataset:
+        if not profile.is_enabled():
+            for step in self.steps:
+                dataset = step(dataset)
+            return dataset
+        for name, step in zip(self.names, self.steps):
+            with profile.span(name, rows_in=profile.rows(dataset)) as span:
+                dataset = step(dataset)
+                span.rows_out = profile.rows(dataset)
+        return dataset
+
 
 class Seq(Op):
-    """Sequence of operations."""
+    """Sequence of operations.
+
+    The operations form a logical plan, which is optimized the first time it
+    is executed (see `parakeet.core.ops.optimizer`), and compiled once per
+    input schema. Use `explain` to inspect the optimized plan.
 
-    def __init__(self, ops: List[Op]) -> None:
+    Parameters
+    ----------
+    ops : list of Op
+        Operations, applied in order.
+    optimize : bool, default True
+        Whether to optimize the plan before executing it.
+    """
+
+    def __init__(self, ops: List[Op], optimize: bool = True) -> None:
         self._ops = ops
+        self._optimize = optimize
+        self._plan: Optional[List[Op]] = None
+        self._compiled: Dict[Schema, CompiledPlan] = {}
+
+    @property
+    def ops(self) -> List[Op]:
+        return self._ops
+
+    @property
+    def plan(self) -> List[Op]:
+        """Operations that are actually executed."""
+        if self._plan is None:
+            # Imported here since the optimizer builds on the operations.
+            from parakeet.core.ops.optimizer import optimize
+
+            self._plan = optimize(self._ops) if self._optimize else list(self._ops)
+        return self._plan
+
+    def compile(self, schema: Schema) -> CompiledPlan:
+        """Compile the plan for `schema`, reusing earlier compilations."""
+        compiled = self._compiled.get(schema)
+        if compiled is None:
+            if len(self._compiled) >= _MAX_COMPILED:
+                del self._compiled[next(iter(self._compiled))]
+            compiled = self._compiled[schema] = compile(self, schema)
+        return compiled
 
     def transform(self, dataset: Dataset) -> Dataset:
         """Apply operations sequentially."""
-        for op in self._ops:
-            dataset = op.transform(dataset)
+        with profile.span(type(self).__name__, rows_in=profile.rows(dataset)) as span:
+            if hasattr(dataset, "groups"):
+                # Grouped datasets are not described by their schema alone.
+                for op in self.plan:
+                    dataset = op.transform(dataset)
+            else:
+                dataset = self.compile(dataset.schema).transform(dataset)
+            span.rows_out = profile.rows(dataset)
         return dataset
 
+    def bind(self, schema: Schema) -> Tuple[Step, Optional[Schema]]:
+        compiled = self.compile(schema)
+        return compiled.transform, compiled.output_schema
+
+    def explain(self) -> str:
+        """Describe the optimized plan, one operation per line."""
+        return "\n".join([type(self).__name__] + [f"  {op!r}" for op in self.plan])
+
+    def required_columns(self, needed: Optional[Set[str]]) -> Optional[Set[str]]:
+        for op in reversed(self.plan):
+            needed = op.required_columns(needed)
+        return needed
+
     def _output_schema(self, input_schema: Schema) -> Schema:
         schema = input_schema[:]
         for op in self._ops:
             schema = op._output_schema(schema)
         return schema
+
+
+def compile(plan: Op, schema: Schema) -> CompiledPlan:
+    """Validate a plan against the schema of its input, once.
+
+    Operations are bound in order, threading their output schemas. Once an
+    output schema is not known ahead of execution, the remaining operations
+    fall back to validating on each run.
+    """
+    ops = plan.plan if isinstance(plan, Seq) else [plan]
+    steps = []
+    current = schema
+    for op in ops:
+        if current is None:
+            steps.append(op.transform)
+        else:
+            step, current = op.bind(current)
+            steps.append(step)
+    names = tuple(type(op).__name__ for op in ops)
+    return CompiledPlan(schema, tuple(steps), current, names)
@@ -0,0 +1,59 @@
+"""Rewrites of sequences of operations into cheaper, equivalent ones.
+
+The optimizer runs three passes over a plan:
+
+1. Nested `Seq` are flattened, so that rewrites see through them.
+2. A `GroupBy` directly followed by an `Agg` is fused into a `GroupByAgg`,
+   which backends execute as a single call.
+3. Walking the plan backwards, operations whose output is never read are
+   dropped, and the columns read by the remaining ones are collected. When
+   they are known, a `Project` is pushed down to the source, so that only
+   referenced columns are read or copied.
+"""
+
+from typing import List, Optional, Set, Tuple
+
+from parakeet.core.ops.agg import Agg
+from parakeet.core.ops.groupby import GroupBy, GroupByAgg
+from parakeet.core.ops.op import Op, Seq
+from parakeet.core.ops.project import Project
+
+
+def optimize(ops: List[Op]) -> List[Op]:
+    """Return an optimized plan equivalent to the given operations."""
+    plan, needed = _prune(_fuse(_flatten(ops)))
+    if needed and not (len(plan) > 0 and isinstance(plan[0], Project)):
+        plan = [Project(sorted(needed))] + plan
+    return plan
+
+
+def _flatten(ops: List[Op]) -> List[Op]:
+    flat = []
+    for op in ops:
+        if isinstance(op, Seq):
+            flat.extend(_flatten(op.ops))
+        else:
+            flat.append(op)
+    return flat
+
+
+def _fuse(ops: List[Op]) -> List[Op]:
+    fused = []
+    for op in ops:
+        if isinstance(op, Agg) and len(fused) > 0 and isinstance(fused[-1], GroupBy):
+            fused[-1] = GroupByAgg(fused[-1].by, op)
+        else:
+            fused.append(op)
+    return fused
+
+
+def _prune(ops: List[Op]) -> Tuple[List[Op], Optional[Set[str]]]:
+    # The output of the plan is returned, so every column is needed at the end.
+    needed = None
+    kept = []
+    for op in reversed(ops):
+        if op.unused(needed):
+            continue
+        needed = op.required_columns(needed)
+        kept.append(op)
+    return kept[::-1], needed
@@ -0,0 +1,118 @@
+"""Run aggregations over parts of a dataset, and merge their results.
+
+Aggregations run in a partial phase, reducing each chunk or partition of a
+dataset to mergeable states (see `parakeet.core.ops.aggregations.state`),
+and a final phase, once the states of every part are merged. Parts can be
+reduced in any order, in parallel, or as new data arrives.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from parakeet.core.dataset import Dataset
+from parakeet.core.ops.agg import Agg
+from parakeet.core.ops.aggregations.state import AggState
+from parakeet.core.ops.groupby import GroupBy, GroupByAgg
+from parakeet.core.ops.op import Op, Seq
+
+
+@dataclass(frozen=True)
+class PartialAgg:
+    """States of each aggregation function, per group, over part of a dataset.
+
+    Parameters
+    ----------
+    by : list[str]
+        Columns the dataset is grouped by, empty without groups.
+    keys : pd.Index, optional
+        Keys of the groups, as a `MultiIndex` with a level per column of
+        `by`, or `None` without groups.
+    states : dict[str, AggState]
+        State of each aggregation function, by name, in the order of the
+        output columns.
+    build : callable
+        Builds the aggregated dataset of the backend from the final phase.
+    """
+
+    by: List[str]
+    keys: Optional[Any]
+    states: Dict[str, AggState]
+    build: Callable[["PartialAgg"], Dataset] = field(compare=False)
+
+    def merge(self, other: "PartialAgg") -> "PartialAgg":
+        """Merge the states of a disjoint part of the dataset.
+
+        Groups are matched by key, and groups of either part are kept.
+        """
+        if other.by != self.by or other.states.keys() != self.states.keys():
+            raise ValueError("Cannot merge partial aggregations of other plans.")
+        if self.keys is None or self.keys.equals(other.keys):
+            keys = self.keys
+            states = {
+                name: state.merge(other.states[name])
+                for name, state in self.states.items()
+            }
+        else:
+            keys = self.keys.append(other.keys).unique()
+            left = keys.get_indexer(self.keys)
+            right = keys.get_indexer(other.keys)
+            states = {
+                name: state.take(left, len(keys)).merge(
+                    other.states[name].take(right, len(keys))
+                )
+                for name, state in self.states.items()
+            }
+        return PartialAgg(self.by, keys, states, self.build)
+
+    def finalize(self) -> Dict[str, np.ndarray]:
+        """Aggregated values of each function, by name, for each group."""
+        return {name: state.finalize() for name, state in self.states.items()}
+
+    def result(self) -> Dataset:
+        """Dataset of the aggregated values, as returned by `Agg`."""
+        return self.build(self)
+
+
+def aggregate_chunks(plan: Op, chunks: Iterable[Dataset]) -> Dataset:
+    """Run a plan ending with an aggregation over the chunks of a dataset.
+
+    The operations before the aggregation run on each chunk, which must
+    therefore not depend on other rows, e.g. projections.
+
+    Parameters
+    ----------
+    plan : Op
+        `Agg` or `GroupByAgg` operation, or sequence of operations ending
+        with one of them, or with a `GroupBy` followed by an `Agg`.
+    chunks : Iterable[Dataset]
+        Chunks of the dataset, with the same schema.
+
+    Returns
+    -------
+    Dataset
+        Same result as running the plan over the whole dataset, with
+        approximate medians.
+
+    """
+    ops = plan.plan if isinstance(plan, Seq) else [plan]
+    by = None
+    if isinstance(ops[-1], GroupByAgg):
+        agg, by, ops = ops[-1].agg, ops[-1].by, ops[:-1]
+    elif isinstance(ops[-1], Agg):
+        agg, ops = ops[-1], ops[:-1]
+        if len(ops) > 0 and isinstance(ops[-1], GroupBy):
+            by, ops = ops[-1].by, ops[:-1]
+    else:
+        raise ValueError("Plan must end with an aggregation.")
+    if any(isinstance(op, (Agg, GroupBy, GroupByAgg)) for op in ops):
+        raise ValueError("Only the last operation of the plan can aggregate.")
+
+    prefix = Seq(list(ops), optimize=False)
+    merged = None
+    for chunk in chunks:
+        partial = agg.partial(prefix.transform(chunk), by)
+        merged = partial if merged is None else merged.merge(partial)
+    if merged is None:
+        raise ValueError("Cannot aggregate an empty sequence of chunks.")
+    return merged.result()
@@ -0,0 +1,37 @@
+from typing import List, Optional, Set, Tuple
+
+from parakeet.core.dataset import Dataset, Schema
+from parakeet.core.ops.op import Op, Step
+
+
+class Project(Op):
+    """Projection operation: keep only the given columns."""
+
+    def __init__(self, columns: List[str]) -> None:
+        assert len(columns) > 0
+        assert len(columns) == len(set(columns))
+        self.columns = columns
+
+    def transform(self, dataset: Dataset) -> Dataset:
+        step, _ = self.bind(dataset.schema)
+        return step(dataset)
+
+    def bind(self, schema: Schema) -> Tuple[Step, Optional[Schema]]:
+        not_contained = [c for c in self.columns if c not in schema]
+        if len(not_contained) > 0:
+            raise ValueError(
+                f"Columns {not_contained} are not contained in the dataset."
+            )
+
+        # Keep the order of the dataset, so projecting never reorders columns.
+        columns = [c for c in schema.names if c in self.columns]
+        return (lambda dataset: dataset.select(columns)), schema.select(columns)
+
+    def required_columns(self, needed: Optional[Set[str]]) -> Optional[Set[str]]:
+        return set(self.columns)
+
+    def _output_schema(self, input_schema: Schema) -> Schema:
+        return Schema(f for f in input_schema if f.name in self.columns)
+
+    def __repr__(self) -> str:
+        return f"Project({', '.join(self.columns)})"
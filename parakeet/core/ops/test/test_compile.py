@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from parakeet.backend.pandas.dataset import PandasDataset
+from parakeet.backend.pandas.ops.aggregations.numeric1d import PandasNumeric1d
+from parakeet.core.dataset import DType, Field, Schema
+from parakeet.core.ops.agg import Agg
+from parakeet.core.ops.aggregations.numeric1d import Numeric1dAggFn
+from parakeet.core.ops.groupby import GroupBy
+from parakeet.core.ops.op import Seq, compile
+
+
+class _CountingNumeric1d(PandasNumeric1d):
+    validations = 0
+
+    def valid(self, input_schema):
+        _CountingNumeric1d.validations += 1
+        return super().valid(input_schema)
+
+
+def _partition(seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "A": rng.choice(["a", "b"], size=50),
+            "value": rng.normal(size=50),
+            "other": rng.normal(size=50),
+        }
+    )
+
+
+def _plan():
+    return Seq(
+        [
+            GroupBy(["A"]),
+            Agg([_CountingNumeric1d("value", Numeric1dAggFn.SUM)]),
+        ]
+    )
+
+
+def test_compile_once_per_schema():
+    plan = _plan()
+    _CountingNumeric1d.validations = 0
+    for seed in range(5):
+        data = _partition(seed)
+        result = plan.transform(PandasDataset(data)).data
+        expected = data.groupby("A").agg(**{"SUM(value)": ("value", "sum")})
+        assert_frame_equal(result, expected)
+    assert _CountingNumeric1d.validations == 1
+
+    plan.transform(PandasDataset(_partition(0).drop(columns="other")))
+    assert _CountingNumeric1d.validations == 2
+
+
+def test_compile_output_schema():
+    schema = PandasDataset(_partition(0)).schema
+    compiled = compile(_plan(), schema)
+    assert compiled.schema == schema
+    assert compiled.output_schema == Schema(
+        [Field("A", DType.STRING), Field("SUM(value)", DType.FLOAT64)]
+    )
+
+
+def test_compile_validates():
+    schema = Schema([Field("A", DType.STRING), Field("value", DType.STRING)])
+    with pytest.raises(ValueError):
+        compile(_plan(), schema)
+    with pytest.raises(ValueError):
+        compile(_plan(), schema.select(["value"]))
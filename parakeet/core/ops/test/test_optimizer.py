@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from parakeet.backend.pandas.dataset import PandasDataset
+from parakeet.backend.pandas.ops.aggregations.numeric1d import PandasNumeric1d
+from parakeet.backend.pandas.ops.op import LambdaOp
+from parakeet.core.dataset import DType
+from parakeet.core.ops.agg import Agg
+from parakeet.core.ops.aggregations.numeric1d import Numeric1dAggFn
+from parakeet.core.ops.groupby import GroupBy, GroupByAgg
+from parakeet.core.ops.op import Seq
+from parakeet.core.ops.project import Project
+
+
+@pytest.fixture
+def wide_data():
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(
+        rng.normal(size=(200, 50)), columns=[f"x{i}" for i in range(50)]
+    )
+    data["A"] = rng.choice(["a", "b", "c"], size=len(data))
+    data["value"] = rng.integers(0, 10, size=len(data))
+    return data
+
+
+class _SpyDataset(PandasDataset):
+    selected = []
+
+    def select(self, columns):
+        _SpyDataset.selected.append(columns)
+        return PandasDataset(self._data[columns], self._time)
+
+
+def _double(dataset, input_column, output_column):
+    data = dataset.data.assign(**{output_column: dataset.data[input_column] * 2})
+    return PandasDataset(data, dataset.time)
+
+
+def _plan(*ops, optimize=True):
+    return Seq(
+        [
+            *ops,
+            GroupBy(["A"]),
+            Agg(
+                [
+                    PandasNumeric1d("value", Numeric1dAggFn.SUM),
+                    PandasNumeric1d("value", Numeric1dAggFn.MEDIAN),
+                ]
+            ),
+        ],
+        optimize=optimize,
+    )
+
+
+def test_fuse_and_project(wide_data):
+    plan = _plan()
+    assert [type(op) for op in plan.plan] == [Project, GroupByAgg]
+    assert plan.explain() == (
+        "Seq\n  Project(A, value)\n  GroupByAgg(A; SUM(value), MEDIAN(value))"
+    )
+
+    _SpyDataset.selected = []
+    result = plan.transform(_SpyDataset(wide_data)).data
+    assert _SpyDataset.selected == [["A", "value"]]
+
+    expected = _plan(optimize=False).transform(PandasDataset(wide_data)).data
+    assert_frame_equal(result, expected)
+
+
+def test_prune_lambda_ops(wide_data):
+    used = LambdaOp(_double, "x0", DType.FLOAT64, "value", reads=[])
+    unused = LambdaOp(_double, "x1", DType.FLOAT64, "unused")
+    overwritten = LambdaOp(_double, "x2", DType.FLOAT64, "value")
+    plan = _plan(Seq([overwritten, used]), unused)
+    assert plan.explain() == (
+        "Seq\n"
+        "  Project(A, x0)\n"
+        "  LambdaOp(_double: x0 -> value)\n"
+        "  GroupByAgg(A; SUM(value), MEDIAN(value))"
+    )
+
+    expected = _plan(overwritten, used, unused, optimize=False)
+    assert_frame_equal(
+        plan.transform(PandasDataset(wide_data)).data,
+        expected.transform(PandasDataset(wide_data)).data,
+    )
+
+
+def test_no_projection_past_undeclared_reads(wide_data):
+    def _add(dataset, input_column, output_column):
+        data = dataset.data
+        return PandasDataset(
+            data.assign(**{output_column: data[input_column] + data["x1"]})
+        )
+
+    plan = _plan(LambdaOp(_add, "x0", DType.FLOAT64, "value"))
+    assert not any(isinstance(op, Project) for op in plan.plan)
+    expected = _plan(LambdaOp(_add, "x0", DType.FLOAT64, "value"), optimize=False)
+    assert_frame_equal(
+        plan.transform(PandasDataset(wide_data)).data,
+        expected.transform(PandasDataset(wide_data)).data,
+    )
+
+    declared = _plan(LambdaOp(_add, "x0", DType.FLOAT64, "value", reads=["x1"]))
+    assert declared.plan[0].columns == ["A", "x0", "x1"]
+
+
+def test_no_projection_without_known_columns(wide_data):
+    op = LambdaOp(_double, "x0", DType.FLOAT64, "y")
+    plan = Seq([op])
+    assert plan.plan == [op]
+    result = plan.transform(PandasDataset(wide_data)).data
+    assert result.shape == (200, 53)
+
+
+def test_missing_columns(wide_data):
+    with pytest.raises(ValueError):
+        _plan().transform(PandasDataset(wide_data.drop(columns="value")))
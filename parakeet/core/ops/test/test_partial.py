@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+from parakeet.backend.pandas.dataset import PandasDataset
+from parakeet.backend.pandas.ops.aggregations.numeric1d import PandasNumeric1d
+from parakeet.core.ops.agg import Agg
+from parakeet.core.ops.aggregations.numeric1d import Numeric1dAggFn
+from parakeet.core.ops.aggregations.state import MinState, MomentState
+from parakeet.core.ops.groupby import GroupBy
+from parakeet.core.ops.op import Seq
+from parakeet.core.ops.partial import aggregate_chunks
+from parakeet.core.ops.project import Project
+
+EXACT = [
+    Numeric1dAggFn.COUNT,
+    Numeric1dAggFn.SUM,
+    Numeric1dAggFn.MIN,
+    Numeric1dAggFn.MAX,
+    Numeric1dAggFn.MEAN,
+    Numeric1dAggFn.VAR,
+    Numeric1dAggFn.STD,
+    Numeric1dAggFn.NUNIQUE,
+]
+
+
+@pytest.fixture
+def data():
+    rng = np.random.default_rng(3)
+    n = 20_000
+    data = pd.DataFrame(
+        {
+            "A": rng.choice(["x", "y", "z", None], n),
+            "B": rng.integers(0, 4, n),
+            "value": rng.normal(1e6, 1, n),
+            "count": rng.integers(0, 50, n),
+            "other": rng.normal(size=n),
+        }
+    )
+    data.loc[::7, "value"] = np.nan
+    return data
+
+
+def _chunks(data, size=3000):
+    return [PandasDataset(data.iloc[i : i + size]) for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("by", [["A"], ["A", "B"]])
+def test_aggregate_chunks(data, by):
+    fns = [PandasNumeric1d(c, f) for c in ("value", "count") for f in EXACT]
+    plan = Seq([Project(by + ["value", "count"]), GroupBy(by), Agg(fns)])
+    expected = plan.transform(PandasDataset(data)).data
+
+    result = aggregate_chunks(plan, _chunks(data)).data
+    assert_frame_equal(result, expected, check_exact=False, rtol=1e-9)
+    # Chunks are merged in any order.
+    shuffled = aggregate_chunks(plan, _chunks(data)[::-1]).data
+    assert_frame_equal(shuffled, expected, check_exact=False, rtol=1e-9)
+
+
+@pytest.mark.parametrize("reverse", [False, True])
+def test_aggregate_chunks_mixed_dtypes(reverse):
+    # A float chunk of an integer column, e.g. read with missing values.
+    chunks = [
+        PandasDataset(pd.DataFrame({"B": [0, 1], "v": [1, 3]})),
+        PandasDataset(pd.DataFrame({"B": [0, 1], "v": [0.5, np.nan]})),
+    ]
+    fns = [
+        PandasNumeric1d("v", f)
+        for f in (Numeric1dAggFn.SUM, Numeric1dAggFn.MIN, Numeric1dAggFn.MAX)
+    ]
+    plan = Seq([GroupBy(["B"]), Agg(fns)])
+    chunks = chunks[::-1] if reverse else chunks
+    result = aggregate_chunks(plan, chunks).data
+    assert result["SUM(v)"].tolist() == [1.5, 3]
+    assert result["MIN(v)"].tolist() == [0.5, 3]
+    assert result["MAX(v)"].tolist() == [1, 3]
+
+    total = aggregate_chunks(Agg(fns), chunks).data
+    assert total.iloc[0].tolist() == [4.5, 0.5, 3]
+
+
+def test_empty_groups_are_missing():
+    state = MinState.of(np.array([3, 1]), np.array([0, 0]), 2)
+    assert state.finalize()[0] == 1 and np.isnan(state.finalize()[1])
+
+
+def test_aggregate_chunks_median(data):
+    agg = Agg([PandasNumeric1d("other", Numeric1dAggFn.MEDIAN)])
+    result = aggregate_chunks(Seq([GroupBy(["B"]), agg]), _chunks(data)).data
+    expected = data.groupby("B")["other"].median()
+    assert np.allclose(result["MEDIAN(other)"], expected, atol=0.02)
+
+    total = aggregate_chunks(agg, _chunks(data)).data
+    assert total.shape == (1, 1)
+    assert np.isclose(total.iloc[0, 0], data["other"].median(), atol=0.02)
+
+
+def test_partial_merge_disjoint_groups(data):
+    agg = Agg([PandasNumeric1d("count", Numeric1dAggFn.MODE)])
+    left = agg.partial(PandasDataset(data[data["B"] < 2]), ["B"])
+    right = agg.partial(PandasDataset(data[data["B"] >= 1]), ["B"])
+    result = left.merge(right).result().data
+    expected = data.groupby("B")["count"].agg(lambda s: s.mode().iloc[0])
+    assert result["MODE(count)"].tolist() == expected.tolist()
+
+
+def test_moments_stable():
+    values = 1e9 + np.arange(10, dtype=float)
+    ids = np.zeros(10, dtype=np.int64)
+    state = MomentState.of(values[:3], ids[:3], 1).update(values[3:], ids[3:])
+    assert np.isclose(state.var()[0], np.var(values, ddof=1))
+
+
+def test_unmergeable(data):
+    agg = Agg([PandasNumeric1d("value", Numeric1dAggFn.CUMSUM)])
+    with pytest.raises(ValueError):
+        agg.partial(PandasDataset(data))
+    with pytest.raises(ValueError):
+        aggregate_chunks(Seq([Project(["value"])]), _chunks(data))
@@ -0,0 +1,228 @@
+"""Lightweight profiling of the stages of analyses and plans.
+
+Stages run inside `span`s, which record their wall time, the rows they read
+and produce and, optionally, the memory they allocate. Spans nest into a
+tree per analysis, which is attached to its result as `profile` and passed
+to a callback, e.g. to forward it to a metrics system.
+
+Profiling is disabled by default, in which case a span costs a context
+variable lookup. Enable it for a block of code with `profiling`::
+
+    with profiling(callback=print):
+        result = stratification(data, dims, label)
+    print(result.profile)
+"""
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, List, Optional, Tuple
+
+Callback = Callable[["Span"], None]
+
+
+@dataclass
+class Span:
+    """Stage of a computation, and the stages it ran.
+
+    Attributes
+    ----------
+    name : str
+        Name of the stage.
+    rows_in : int, optional
+        Number of rows read by the stage, if known.
+    rows_out : int, optional
+        Number of rows produced by the stage, if known.
+    seconds : float
+        Wall time of the stage.
+    bytes : int, optional
+        Memory allocated by the stage and still in use at its end, when
+        memory is profiled.
+    peak_bytes : int, optional
+        Peak memory allocated by the stage, when memory is profiled.
+    children : list[Span]
+        Stages run by the stage, in order.
+    """
+
+    name: str
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    seconds: float = 0.0
+    bytes: Optional[int] = None
+    peak_bytes: Optional[int] = None
+    children: List["Span"] = field(default_factory=list)
+
+    def walk(self, depth: int = 0) -> Iterator[Tuple[int, "Span"]]:
+        """Every span of the tree, depth first, with its depth."""
+        yield depth, self
+        for child in self.children:
+            yield from child.walk(depth + 1)
+
+    def find(self, name: str) -> List["Span"]:
+        """Every span of the tree with the given name."""
+        return [s for _, s in self.walk() if s.name == name]
+
+    def to_records(self) -> List[dict]:
+        """Flat records of the spans, with the path of names to each one."""
+        records, path = [], []
+        for depth, span in self.walk():
+            path[depth:] = [span.name]
+            records.append(
+                {
+                    "path": "/".join(path),
+                    "seconds": span.seconds,
+                    "rows_in": span.rows_in,
+                    "rows_out": span.rows_out,
+                    "bytes": span.bytes,
+                    "peak_bytes": span.peak_bytes,
+                }
+            )
+        return records
+
+    def __str__(self) -> str:
+        lines = []
+        for depth, span in self.walk():
+            rows = ""
+            if span.rows_in is not None or span.rows_out is not None:
+                rows = f"  rows {_count(span.rows_in)} -> {_count(span.rows_out)}"
+            memory = ""
+            if span.peak_bytes is not None:
+                memory = f"  peak {span.peak_bytes / 2**20:.1f} MB"
+            name = "  " * depth + span.name
+            lines.append(f"{name:<32} {span.seconds * 1e3:10.2f} ms{rows}{memory}")
+        return "\n".join(lines)
+
+
+def _count(rows: Optional[int]) -> str:
+    return "?" if rows is None else f"{rows:,}"
+
+
+class _NullSpan:
+    """Span of disabled profiling, which ignores everything."""
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value) -> None:
+        pass
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *_) -> None:
+        pass
+
+
+_NULL = _NullSpan()
+
+
+class _Recorder:
+    def __init__(self, callback: Optional[Callback], memory: bool) -> None:
+        self.callback = callback
+        self.memory = memory
+        self.stack: List[Tuple[Span, int, int]] = []
+
+
+_recorder: ContextVar[Optional[_Recorder]] = ContextVar("recorder", default=None)
+
+
+def is_enabled() -> bool:
+    """Whether profiling is enabled in the current context."""
+    return _recorder.get() is not None
+
+
+def enable(callback: Optional[Callback] = None, memory: bool = False) -> None:
+    """Enable profiling in the current context, until `disable` is called.
+
+    Parameters
+    ----------
+    callback : callable, optional
+        Function called with each finished tree of spans, i.e. each span
+        not nested in another one.
+    memory : bool, optional
+        Whether to record allocated memory, by default False. Memory is
+        traced with `tracemalloc`, which slows allocations down.
+    """
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _recorder.set(_Recorder(callback, memory))
+
+
+def disable() -> None:
+    """Disable profiling in the current context."""
+    _recorder.set(None)
+
+
+@contextmanager
+def profiling(callback: Optional[Callback] = None, memory: bool = False):
+    """Enable profiling within a block. See `enable` for the parameters."""
+    token = _recorder.set(None)
+    started = memory and not tracemalloc.is_tracing()
+    try:
+        enable(callback, memory)
+        yield
+    finally:
+        _recorder.reset(token)
+        if started:
+            tracemalloc.stop()
+
+
+def span(name: str, rows_in: Optional[int] = None):
+    """Context manager recording a stage, yielding its `Span`.
+
+    The stage can set `rows_out` on the span. When profiling is disabled, a
+    span that ignores everything and is falsy is yielded instead, so that
+    `span or None` is the span only when it is recorded.
+    """
+    recorder = _recorder.get()
+    if recorder is None:
+        return _NULL
+    return _record(recorder, Span(name, rows_in))
+
+
+@contextmanager
+def _record(recorder: _Recorder, current: Span):
+    parent = recorder.stack[-1][0] if len(recorder.stack) > 0 else None
+    if parent is not None:
+        parent.children.append(current)
+    allocated = 0
+    if recorder.memory:
+        allocated, peak = tracemalloc.get_traced_memory()
+        if len(recorder.stack) > 0:
+            # Resetting the peak for this span hides it from its parents.
+            entry = recorder.stack[-1]
+            recorder.stack[-1] = (*entry[:2], max(entry[2], peak))
+        tracemalloc.reset_peak()
+    recorder.stack.append((current, allocated, 0))
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        current.seconds = time.perf_counter() - start
+        _, allocated, seen_peak = recorder.stack.pop()
+        if recorder.memory:
+            now, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, seen_peak)
+            current.bytes = now - allocated
+            current.peak_bytes = peak - allocated
+            if len(recorder.stack) > 0:
+                entry = recorder.stack[-1]
+                recorder.stack[-1] = (*entry[:2], max(entry[2], peak))
+        if parent is None and recorder.callback is not None:
+            recorder.callback(current)
+
+
+def rows(data) -> Optional[int]:
+    """Number of rows of a frame or dataset, if known without computing it.
+
+    Lazy data, e.g. a Polars query, has no known number of rows.
+    """
+    shape = getattr(data, "shape", None)
+    if isinstance(shape, tuple):
+        return shape[0]
+    data = getattr(data, "data", None)
+    shape = getattr(data, "shape", None)
+    return shape[0] if isinstance(shape, tuple) else None
@@ -0,0 +1,37 @@
+import pytest
+
+from parakeet.core.dataset import DType, Field, Schema
+
+
+@pytest.fixture
+def schema():
+    return Schema([Field("A", DType.STRING), Field("value", DType.FLOAT64)])
+
+
+def test_schema_lookup(schema):
+    assert len(schema) == 2
+    assert schema.names == ("A", "value")
+    assert schema[0] == Field("A", DType.STRING)
+    assert schema["value"] == Field("value", DType.FLOAT64)
+    assert schema.get("missing") is None
+    assert "A" in schema and "missing" not in schema
+    assert schema[1:] == [Field("value", DType.FLOAT64)]
+    with pytest.raises(KeyError):
+        schema["missing"]
+
+
+def test_schema_hashable(schema):
+    same = Schema([Field("A", DType.STRING), Field("value", DType.FLOAT64)])
+    assert schema == same and hash(schema) == hash(same)
+    assert {schema: 1}[same] == 1
+    assert schema != schema.with_field(Field("value", DType.INT64))
+    with pytest.raises(ValueError):
+        Schema([Field("A", DType.STRING), Field("A", DType.INT64)])
+
+
+def test_schema_with_field(schema):
+    replaced = schema.with_field(Field("A", DType.INT64))
+    assert replaced.names == ("A", "value")
+    assert replaced["A"].dtype == DType.INT64
+    assert schema.with_field(Field("B", DType.BOOL)).names == ("A", "value", "B")
+    assert schema.select(["value"]) == [Field("value", DType.FLOAT64)]
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from parakeet.core import profile
+
+
+def test_span_disabled():
+    assert not profile.is_enabled()
+    with profile.span("stage", rows_in=3) as span:
+        span.rows_out = 1
+    assert not span
+    assert (span or None) is None
+
+
+def test_span_tree():
+    roots = []
+    with profile.profiling(callback=roots.append):
+        assert profile.is_enabled()
+        with profile.span("outer", rows_in=10) as outer:
+            with profile.span("first"):
+                pass
+            with profile.span("second", rows_in=10) as inner:
+                inner.rows_out = 2
+            outer.rows_out = 2
+        with profile.span("other"):
+            pass
+    assert not profile.is_enabled()
+
+    # The callback gets every root span, once it is finished.
+    assert [s.name for s in roots] == ["outer", "other"]
+    assert [s.name for _, s in outer.walk()] == ["outer", "first", "second"]
+    assert outer.find("second") == [inner]
+    assert inner.rows_in == 10 and inner.rows_out == 2
+    assert outer.seconds >= inner.seconds >= 0
+    assert outer.bytes is None
+    records = outer.to_records()
+    assert [r["path"] for r in records] == ["outer", "outer/first", "outer/second"]
+    assert "second" in str(outer)
+
+
+def test_span_memory():
+    with profile.profiling(memory=True):
+        with profile.span("outer") as outer:
+            with profile.span("allocate") as inner:
+                array = np.ones(1_000_000)
+            del array
+    assert inner.bytes >= 8_000_000
+    assert inner.peak_bytes >= 8_000_000
+    # The peak of a stage includes the peaks of its children.
+    assert outer.peak_bytes >= inner.peak_bytes
+    assert outer.bytes < inner.bytes
+
+
+def test_span_error():
+    roots = []
+    with profile.profiling(callback=roots.append):
+        with pytest.raises(ValueError):
+            with profile.span("failing"):
+                raise ValueError()
+    assert [s.name for s in roots] == ["failing"]
+
+
+def test_rows():
+    assert profile.rows(np.zeros((3, 2))) == 3
+    assert profile.rows(object()) is None
+
+
+def test_span_memory_siblings():
+    with profile.profiling(memory=True):
+        with profile.span("outer") as outer:
+            with profile.span("first") as first:
+                array = np.ones(1_000_000)
+                del array
+            with profile.span("second"):
+                pass
+    # The peak of an earlier child is kept after later children run.
+    assert outer.peak_bytes >= first.peak_bytes >= 8_000_000
@@ -1,9 +1,27 @@
-from itertools import product
+import math
+from dataclasses import dataclass
+from enum import StrEnum, auto
+from itertools import combinations, product
+from typing import Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
+from scipy import sparse as sp
 from scipy.linalg import khatri_rao
 
+from parakeet.core import profile
+
 _INTERNAL_MARGINAL = "__all__"
+_ROWS = "__rows__"
+
+
+class CubeStrategy(StrEnum):
+    """Strategy used to calculate the cube."""
+
+    MATRIX = auto()
+    """Linear algebra cube operator, as a dense or sparse matrix."""
+    LATTICE = auto()
+    """Grouping-set lattice, where each grouping set is rolled up from a parent."""
 
 
 class Cube:
@@ -18,7 +36,17 @@ class Cube:
         https://doi.org/10.1007/s00165-014-0316-9
     """
 
-    def __init__(self, data: pd.DataFrame, dims: list, agg: str = "sum"):
+    def __init__(
+        self,
+        data: pd.DataFrame,
+        dims: list,
+        agg: str = "sum",
+        sparse: bool = False,
+        strategy: CubeStrategy = CubeStrategy.MATRIX,
+        grouping_sets: Optional[Iterable[Iterable[str]]] = None,
+        min_count: int = 0,
+        count_column: Optional[str] = None,
+    ):
         """Constructor method.
 
         Parameters
@@ -29,25 +57,622 @@ class Cube:
             List of dimensions to cube.
         agg : str, optional
             Aggregation function, by default "sum".
+        sparse : bool, optional
+            Whether to build the cube operator as a sparse matrix, by default False.
+            In sparse mode, only cells that contain at least one input row are
+            kept in the output, so memory grows with the number of rows instead
+            of with the size of the cartesian product of all dimensions.
+        strategy : CubeStrategy, optional
+            Strategy used to calculate the cube, by default `CubeStrategy.MATRIX`.
+            The lattice strategy aggregates every grouping set from its smallest
+            parent and, like the sparse mode, only outputs non-empty cells.
+        grouping_sets : Iterable[Iterable[str]], optional
+            Grouping sets to calculate, by default every subset of `dims`.
+            See `GroupingSets` for common presets.
+        min_count : int, optional
+            Minimum count for a cell to be kept in the output, by default 0.
+        count_column : str, optional
+            Column holding the counts compared against `min_count`.
+            By default, the number of input rows in each cell is used.
         """
         self.dims = dims
         self.agg = agg
+        self.sparse = sparse
+        self.strategy = CubeStrategy(strategy)
+        if grouping_sets is None:
+            grouping_sets = GroupingSets.cube(dims)
+        self.grouping_sets = [_positions(dims, gset) for gset in grouping_sets]
+        self.min_count = min_count
+        self.count_column = count_column
+
+        if self.strategy == CubeStrategy.LATTICE:
+            self._init_lattice(data)
+            return
+        if sparse:
+            self._init_sparse(data)
+            return
 
         # Calculate the cube operator from input data dimensions
+        with profile.span("occurrence_matrices", rows_in=len(data)):
+            matrices = [_occurrence_matrix(data[dim]) for dim in self.dims]
+        self.levels = [pd.Index(m.index) for m in matrices]
         cube = None
-        occurrence_matrices = {dim: _occurrence_matrix(data[dim]) for dim in dims}
-        dims = self.dims[::-1]
-        for dim in dims:
-            m = occurrence_matrices[dim]
-            if cube is None:
-                cube = m
-            else:
-                cube = indexed_khatri_rao(m, cube)
-        self.cube = cube
+        with profile.span("khatri_rao") as span:
+            for m in matrices[::-1]:
+                m = m.to_numpy()
+                cube = m if cube is None else khatri_rao(m, cube)
+            span.rows_out = len(cube)
+
+        # Rows of the product follow the cartesian product of the levels.
+        shape = [len(level) for level in self.levels]
+        codes = np.indices(shape).reshape(len(shape), -1)
+        margins = [c == n - 1 for c, n in zip(codes, shape)]
+        keep = _grouping_set_mask(margins, self.grouping_sets)
+        self.cells = codes[:, keep]
+        self.matrix = cube[keep]
+        self._cube = None
+
+    def _init_sparse(self, data: pd.DataFrame):
+        """Build the cube operator as a sparse matrix.
+
+        Each column of the cube has exactly 2^k non-zero entries, one for each
+        combination of a dimension value and its marginal. After each product,
+        rows that have no entries are dropped, so that row ids stay bounded by
+        the number of non-zero entries instead of the size of the cartesian
+        product, which can exceed 64 bits with many dimensions.
+        """
+        with profile.span("occurrence_matrices", rows_in=len(data)):
+            matrices = [_sparse_occurrence_matrix(data[dim]) for dim in self.dims]
+        levels = [uniques for _, uniques in matrices]
+        cube, codes = None, None
+        with profile.span("khatri_rao") as span:
+            for m, _ in matrices[::-1]:
+                if cube is None:
+                    cube, codes = _compact_rows(sp.csc_matrix(m))
+                    codes = codes[np.newaxis]
+                    continue
+                radix = cube.shape[0]
+                cube, cells = _compact_rows(sparse_khatri_rao(m, cube))
+                # Row ids of the product are `row of m * radix + row of cube`,
+                # so compacted rows stay sorted by their codes.
+                codes = np.vstack([cells // radix, codes[:, cells % radix]])
+            span.rows_out = cube.shape[0]
+
+        margins = [c == len(level) - 1 for c, level in zip(codes, levels)]
+        keep = _grouping_set_mask(margins, self.grouping_sets)
+        self.levels = levels
+        self.cells = codes[:, keep]
+        self.matrix = cube.tocsr()[keep]
+
+    def _init_lattice(self, data: pd.DataFrame):
+        """Factorize the dimensions for the grouping-set lattice.
+
+        Missing values are given the code of the marginal, and cells holding
+        them are dropped from every grouping set that keeps their dimension.
+        """
+        self.codes = []
+        self.levels = []
+        with profile.span("factorize", rows_in=len(data)):
+            for dim in self.dims:
+                codes, uniques = _factorize(data[dim])
+                codes[codes < 0] = len(uniques)
+                self.codes.append(codes)
+                self.levels.append(
+                    pd.Index(list(uniques) + [_INTERNAL_MARGINAL], name=dim)
+                )
+
+    def _rollup(self, data: pd.DataFrame) -> "CubeArray":
+        """Calculate the grouping sets by walking down the lattice.
+
+        The finest grouping set is aggregated from the input data. Every coarser
+        grouping set is then aggregated from its smallest already computed
+        parent. Cells below `min_count` are pruned as soon as a grouping set is
+        computed, and unpruned parents are released once no remaining grouping
+        set can be rolled up from them.
+        """
+        count_column = self.count_column
+        if self.min_count > 0 and count_column is None:
+            count_column = _ROWS
+            data = data.assign(**{_ROWS: 1})
+
+        finest = tuple(sorted(set().union(*self.grouping_sets)))
+        if len(finest) == 0:
+            # Only the total is requested, in a single cell.
+            computed = {finest: data.sum().to_frame().T}
+        else:
+            computed = {
+                finest: data.groupby(
+                    [pd.Index(self.codes[d]) for d in finest], sort=False
+                ).sum()
+            }
+
+        pending = sorted(self.grouping_sets, key=len, reverse=True)
+        output = {}
+        for i, gset in enumerate(pending):
+            if gset not in computed:
+                parents = [p for p in computed if set(gset) <= set(p)]
+                parent = min(parents, key=lambda p: len(computed[p]))
+                computed[gset] = _rollup_from(computed[parent], parent, gset)
+
+            agg = computed[gset]
+            if self.min_count > 0:
+                agg = agg[agg[count_column] >= self.min_count]
+            output[gset] = agg
+
+            remaining = pending[i + 1 :]
+            for p in list(computed):
+                if not any(set(r) <= set(p) for r in remaining):
+                    del computed[p]
+
+        out = self._assemble(output)
+        if count_column == _ROWS:
+            out = out.select([c for c in out.columns if c != _ROWS])
+        return out
+
+    def _assemble(self, computed: dict) -> "CubeArray":
+        """Stack grouping sets into a single cube ordered like the matrix cube."""
+        shape = [len(level) for level in self.levels]
+        codes, values = [], []
+        for gset, agg in computed.items():
+            cell_codes = []
+            keep = np.ones(len(agg), dtype=bool)
+            for d, n in enumerate(shape):
+                margin = n - 1
+                if d in gset:
+                    c = np.asarray(agg.index.get_level_values(gset.index(d)))
+                    keep &= c != margin
+                else:
+                    c = np.full(len(agg), margin, dtype=np.int64)
+                cell_codes.append(c)
+            codes.append(np.stack(cell_codes)[:, keep])
+            values.append(agg[keep])
+
+        codes = np.concatenate(codes, axis=1)
+        # Sort lexicographically rather than by mixed-radix ids, which overflow
+        # with many dimensions of high cardinality.
+        order = np.lexsort(codes[::-1])
+        out = pd.concat(values, ignore_index=True)
+        return CubeArray(
+            self.levels,
+            {c: out[c].to_numpy()[order] for c in out.columns},
+            codes=codes[:, order],
+        )
+
+    @property
+    def index(self) -> pd.MultiIndex:
+        """Cells of the matrix cube, one for each row of the cube operator."""
+        return pd.MultiIndex(
+            levels=self.levels,
+            codes=list(self.cells),
+            names=self.dims,
+            verify_integrity=False,
+        )
+
+    @property
+    def cube(self):
+        """Cube operator, as a sparse matrix or a frame indexed by the cells."""
+        if self.sparse:
+            return self.matrix
+        if self._cube is None:
+            self._cube = pd.DataFrame(self.matrix, index=self.index)
+        return self._cube
 
     def __call__(self, data: pd.DataFrame) -> pd.DataFrame:
+        return self.array(data).to_frame()
+
+    def array(self, data: pd.DataFrame) -> "CubeArray":
+        """Apply the cube and return the result as a `CubeArray`.
+
+        The frame representation, indexed by the cells, is only built on
+        request by `CubeArray.to_frame`.
+        """
         # Open question: how can this be applied to other operations that not sum?
-        return self.cube @ data
+        if self.strategy == CubeStrategy.LATTICE:
+            with profile.span("rollup", rows_in=len(data)) as span:
+                out = self._rollup(data)
+                span.rows_out = len(out)
+            return out
+        with profile.span("matmul", rows_in=len(data)) as span:
+            out = np.asarray(self.matrix @ data.to_numpy())
+            span.rows_out = len(out)
+
+        cells = self.cells
+        if self.min_count > 0:
+            if self.count_column is None:
+                counts = np.asarray(self.matrix.sum(axis=1)).reshape(-1)
+            else:
+                counts = out[:, data.columns.get_loc(self.count_column)]
+            keep = counts >= self.min_count
+            out, cells = out[keep], cells[:, keep]
+
+        values = dict(zip(data.columns, np.ascontiguousarray(out.T)))
+        if cells.shape[1] == math.prod(len(level) for level in self.levels):
+            # Every cell is stored, in order.
+            return CubeArray(self.levels, values)
+        return CubeArray(self.levels, values, codes=cells)
+
+
+class CubeArray:
+    """Cube measures stored as arrays addressed by the codes of their cells.
+
+    Each dimension is encoded as integer codes into its level, with the
+    marginal as the last code. Cells are ordered by their codes, with the
+    first dimension being the most significant, matching the order of the
+    matrix cube.
+
+    Measures are 1d arrays stored either densely, with one entry for every
+    cell of the cartesian product, or sparsely, with one entry for each
+    occupied cell, whose codes are in `codes`. Sparse cubes never number the
+    cells of the cartesian product, whose size can exceed 64 bits with many
+    dimensions of high cardinality. The frame representation is only built
+    when requested.
+    """
+
+    def __init__(
+        self,
+        levels: List[pd.Index],
+        values: Dict[str, np.ndarray],
+        cells: Optional[np.ndarray] = None,
+        codes: Optional[np.ndarray] = None,
+    ):
+        """Constructor method.
+
+        Parameters
+        ----------
+        levels : list[pd.Index]
+            Labels of each dimension, with the marginal as the last label.
+        values : dict[str, np.ndarray]
+            Measures, aligned with `cells` or `codes`.
+        cells : np.ndarray, optional
+            Sorted mixed-radix ids of the stored cells. By default, every
+            cell of the cube is stored, unless `codes` are given.
+        codes : np.ndarray, optional
+            Codes of the stored cells, one row per dimension, in the order of
+            the cells. Prefer them to `cells` for large cubes.
+        """
+        self.levels = levels
+        self.shape = tuple(len(level) for level in levels)
+        if cells is not None:
+            codes = np.stack(np.unravel_index(cells, self.shape))
+        if codes is not None:
+            codes = np.asarray(codes, dtype=np.int64).reshape(len(levels), -1)
+        self.codes = codes
+        self._values = {}
+        self._frame = None
+        for name, v in values.items():
+            self[name] = v
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> "CubeArray":
+        """Create a cube array from the output of a `Cube`."""
+        index = frame.index
+        if not isinstance(index, pd.MultiIndex):
+            index = pd.MultiIndex.from_arrays([index])
+
+        levels, codes = [], []
+        for level, code in zip(index.levels, index.codes):
+            # Move the marginal to the last position of the level.
+            others = np.flatnonzero(level != _INTERNAL_MARGINAL)
+            mapping = np.full(len(level), len(others), dtype=np.int64)
+            mapping[others] = np.arange(len(others))
+            levels.append(
+                pd.Index(list(level[others]) + [_INTERNAL_MARGINAL], name=level.name)
+            )
+            codes.append(mapping[code])
+
+        codes = np.stack(codes)
+        order = np.lexsort(codes[::-1])
+        values = {c: frame[c].to_numpy()[order] for c in frame.columns}
+        if len(frame) == math.prod(len(level) for level in levels):
+            # Every cell is stored, in order.
+            return cls(levels, values)
+        return cls(levels, values, codes=codes[:, order])
+
+    @property
+    def dims(self) -> List[str]:
+        return [level.name for level in self.levels]
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._values)
+
+    @property
+    def is_dense(self) -> bool:
+        return self.codes is None
+
+    @property
+    def cells(self) -> Optional[np.ndarray]:
+        """Mixed-radix ids of the stored cells, or None if the cube is dense."""
+        if self.is_dense:
+            return None
+        return np.ravel_multi_index(self.codes, self.shape)
+
+    def __len__(self) -> int:
+        return math.prod(self.shape) if self.is_dense else self.codes.shape[1]
+
+    def __contains__(self, measure: str) -> bool:
+        return measure in self._values
+
+    def __getitem__(self, measure: str) -> np.ndarray:
+        return self._values[measure]
+
+    def __setitem__(self, measure: str, values: np.ndarray):
+        values = np.asarray(values)
+        if values.shape != (len(self),):
+            raise ValueError(
+                f"Measure {measure} has shape {values.shape}, expected ({len(self)},)."
+            )
+        self._values[measure] = values
+        self._frame = None
+
+    def cell_id(self, *labels) -> int:
+        """Return the mixed-radix id of the cell with the given labels."""
+        return _ravel(self._codes_of(labels), self.shape)
+
+    def position(self, cell: int) -> int:
+        """Return the position of a cell id in the stored measures."""
+        codes = []
+        for n in self.shape[::-1]:
+            cell, code = divmod(int(cell), n)
+            codes.append(code)
+        return self._locate(codes[::-1])
+
+    def get(self, measure: str, *labels):
+        """Return the value of a measure at the cell with the given labels."""
+        return self[measure][self._locate(self._codes_of(labels))]
+
+    def total(self, measure: str):
+        """Return the value of a measure for the whole population."""
+        return self[measure][self._locate([n - 1 for n in self.shape])]
+
+    def ratio_to_total(self, measure: str) -> np.ndarray:
+        """Return a measure divided by its value for the whole population."""
+        return self[measure] / self.total(measure)
+
+    def marginal(self, measure: str, dims: List[str], fill_value=np.nan) -> np.ndarray:
+        """Return the slice of a measure over `dims`, marginalizing every other dim.
+
+        Dense cubes return a view of the measure. Sparse cubes return a new
+        array, with `fill_value` in unoccupied cells.
+        """
+        missing = [d for d in dims if d not in self.dims]
+        if len(missing) > 0:
+            raise ValueError(f"Dimensions {missing} are not cube dimensions.")
+        if self.is_dense:
+            key = tuple(
+                slice(None) if dim in dims else n - 1
+                for dim, n in zip(self.dims, self.shape)
+            )
+            return self[measure].reshape(self.shape)[key]
+        kept = [d for d, dim in enumerate(self.dims) if dim in dims]
+        shape = tuple(self.shape[d] for d in kept)
+        keep = np.ones(len(self), dtype=bool)
+        for d, n in enumerate(self.shape):
+            if d not in kept:
+                keep &= self.codes[d] == n - 1
+        values = self[measure]
+        out = np.full(math.prod(shape), fill_value, np.result_type(values, fill_value))
+        out[np.ravel_multi_index(self.codes[kept][:, keep], shape)] = values[keep]
+        return out.reshape(shape)
+
+    def finest(self, measure: str) -> np.ndarray:
+        """Return a measure over the cells that are not marginal on any dimension.
+
+        Dense cubes return a view of the measure, shaped like the cube without
+        the marginals.
+        """
+        if self.is_dense:
+            key = (slice(0, -1),) * len(self.shape)
+            return self[measure].reshape(self.shape)[key]
+        keep = np.ones(len(self), dtype=bool)
+        for c, n in zip(self.codes, self.shape):
+            keep &= c != n - 1
+        return self[measure][keep]
+
+    def add(self, other: "CubeArray") -> "CubeArray":
+        """Sum the measures of a cube of disjoint data, cell by cell.
+
+        Measures must be summarizable by sum, e.g. base statistics, for the
+        marginals of the sum to be the sum of the marginals. Levels are the
+        sorted union of both levels, as if the cube was calculated over both
+        data at once. The sum is dense if both cubes are dense, and otherwise
+        stores the cells stored by either cube.
+        """
+        if self.dims != other.dims or set(self.columns) != set(other.columns):
+            raise ValueError("Cannot add cubes of different dimensions or measures.")
+        levels = [
+            pd.Index(list(a[:-1].union(b[:-1])) + [_INTERNAL_MARGINAL], name=a.name)
+            for a, b in zip(self.levels, other.levels)
+        ]
+        shape = tuple(len(level) for level in levels)
+        codes = [cube._codes_in(levels) for cube in (self, other)]
+        if self.is_dense and other.is_dense:
+            stored = None
+            positions = [np.ravel_multi_index(c, shape) for c in codes]
+        else:
+            stored, inverse = np.unique(
+                np.concatenate(codes, axis=1), axis=1, return_inverse=True
+            )
+            inverse = inverse.reshape(-1)
+            positions = [inverse[: len(self)], inverse[len(self) :]]
+
+        size = math.prod(shape) if stored is None else stored.shape[1]
+        values = {}
+        for name in self.columns:
+            dtype = np.result_type(self[name], other[name])
+            total = np.zeros(size, dtype=dtype)
+            total[positions[0]] += self[name]
+            total[positions[1]] += other[name]
+            values[name] = total
+        return CubeArray(levels, values, codes=stored)
+
+    def _all_codes(self) -> np.ndarray:
+        """Codes of every stored cell, one row per dimension."""
+        if self.is_dense:
+            return np.stack(np.unravel_index(np.arange(len(self)), self.shape))
+        return self.codes
+
+    def _codes_in(self, levels: List[pd.Index]) -> np.ndarray:
+        """Codes of the stored cells in a cube with more labels per level."""
+        return np.stack(
+            [
+                level.get_indexer(own)[code]
+                for level, own, code in zip(levels, self.levels, self._all_codes())
+            ]
+        )
+
+    def _codes_of(self, labels) -> List[int]:
+        if len(labels) != len(self.levels):
+            raise ValueError(f"Expected {len(self.levels)} labels, got {len(labels)}.")
+        return [level.get_loc(label) for level, label in zip(self.levels, labels)]
+
+    def _locate(self, codes: List[int]) -> int:
+        """Position of the cell with the given codes in the stored measures.
+
+        Sparse cells are sorted by their codes, so the cell is found by
+        narrowing the range of positions one dimension at a time.
+        """
+        if self.is_dense:
+            return _ravel(codes, self.shape)
+        lo, hi = 0, len(self)
+        for row, code in zip(self.codes, codes):
+            segment = row[lo:hi]
+            lo, hi = (
+                lo + int(np.searchsorted(segment, code, side="left")),
+                lo + int(np.searchsorted(segment, code, side="right")),
+            )
+            if lo == hi:
+                raise KeyError(tuple(codes))
+        return lo
+
+    def select(self, columns: List[str]) -> "CubeArray":
+        """Return a cube holding only the given measures, without copying them."""
+        return CubeArray(self.levels, {c: self[c] for c in columns}, codes=self.codes)
+
+    def fillna(self, value) -> "CubeArray":
+        """Replace missing values in every measure, in place."""
+        for name, v in self._values.items():
+            if v.dtype.kind == "f":
+                self[name] = np.where(np.isnan(v), value, v)
+        return self
+
+    def to_dense(self, fill_value=np.nan) -> "CubeArray":
+        """Return a dense copy of the cube, with `fill_value` in unoccupied cells."""
+        if self.is_dense:
+            return self
+        size = math.prod(self.shape)
+        values = {}
+        for name, v in self._values.items():
+            dense = np.full(size, fill_value, dtype=np.result_type(v, fill_value))
+            dense[self.cells] = v
+            values[name] = dense
+        return CubeArray(self.levels, values)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Convert to a frame indexed by the cube dimensions."""
+        if self._frame is None:
+            index = pd.MultiIndex(
+                levels=self.levels,
+                codes=list(self._all_codes()),
+                names=self.dims,
+                verify_integrity=False,
+            )
+            self._frame = pd.DataFrame(self._values, index=index)
+        return self._frame
+
+
+def _ravel(codes: List[int], shape: Tuple[int, ...]) -> int:
+    """Mixed-radix id of a cell, as a Python integer that cannot overflow."""
+    cell = 0
+    for code, n in zip(codes, shape):
+        cell = cell * n + int(code)
+    return cell
+
+
+@dataclass(frozen=True)
+class GroupingSets:
+    """Grouping sets calculated by a cube, as in SQL's `GROUPING SETS`."""
+
+    sets: Tuple[Tuple[str, ...], ...]
+
+    def __iter__(self):
+        return iter(self.sets)
+
+    def __len__(self) -> int:
+        return len(self.sets)
+
+    @classmethod
+    def cube(cls, dims: List[str]) -> "GroupingSets":
+        """Every subset of the dimensions, as in `GROUP BY CUBE`."""
+        return cls.up_to_order(dims, len(dims))
+
+    @classmethod
+    def rollup(cls, dims: List[str]) -> "GroupingSets":
+        """Every prefix of a dimension hierarchy, as in `GROUP BY ROLLUP`.
+
+        Dimensions are expected from the coarsest to the finest level,
+        e.g. `["region", "state", "city"]`.
+        """
+        return cls(tuple(tuple(dims[:i]) for i in range(len(dims), -1, -1)))
+
+    @classmethod
+    def up_to_order(cls, dims: List[str], order: int) -> "GroupingSets":
+        """Every subset of at most `order` dimensions, including the grand total."""
+        return cls(
+            tuple(
+                gset
+                for size in range(min(order, len(dims)), -1, -1)
+                for gset in combinations(dims, size)
+            )
+        )
+
+    def with_total(self) -> "GroupingSets":
+        """Add the grand total to the grouping sets if it is missing."""
+        if () in self.sets:
+            return self
+        return GroupingSets(self.sets + ((),))
+
+
+def _positions(dims: list, gset: Iterable[str]) -> Tuple[int, ...]:
+    """Convert a grouping set to the sorted positions of its dimensions."""
+    gset = tuple(gset)
+    missing = [d for d in gset if d not in dims]
+    if len(missing) > 0:
+        raise ValueError(f"Grouping set dimensions {missing} are not cube dimensions.")
+    return tuple(sorted(dims.index(d) for d in set(gset)))
+
+
+def _grouping_set_mask(margins: List[np.ndarray], grouping_sets: list) -> np.ndarray:
+    """Select the cells that belong to any of the grouping sets.
+
+    Parameters
+    ----------
+    margins : list[np.ndarray]
+        For each dimension, whether each cell is marginal on that dimension.
+    grouping_sets : list
+        Grouping sets, as positions of the dimensions they keep.
+
+    Returns
+    -------
+    np.ndarray
+        Boolean mask over the cells.
+    """
+    pattern = np.zeros(len(margins[0]) if margins else 1, dtype=np.int64)
+    for d, margin in enumerate(margins):
+        pattern |= np.asarray(margin, dtype=np.int64) << d
+    allowed = [
+        sum(1 << d for d in range(len(margins)) if d not in gset)
+        for gset in grouping_sets
+    ]
+    return np.isin(pattern, allowed)
+
+
+def _rollup_from(agg: pd.DataFrame, parent: tuple, child: tuple) -> pd.DataFrame:
+    """Aggregate a grouping set from one of its parents."""
+    if len(child) == 0:
+        return agg.sum().to_frame().T
+    levels = [parent.index(d) for d in child]
+    return agg.groupby(level=levels, sort=False).sum()
 
 
 def _occurrence_matrix(s: pd.Series) -> pd.DataFrame:
@@ -71,6 +696,115 @@ def _occurrence_matrix(s: pd.Series) -> pd.DataFrame:
     return m
 
 
+def _sparse_occurrence_matrix(s: pd.Series) -> tuple[sp.csc_matrix, pd.Index]:
+    """Calculate the sparse occurrence matrix for a dimension.
+
+    Rows follow the same order as `_occurrence_matrix`: sorted unique values
+    followed by the marginal. Missing values only contribute to the marginal.
+
+    Parameters
+    ----------
+    s : pd.Series
+        Input data series.
+
+    Returns
+    -------
+    sp.csc_matrix
+        Occurrence matrix.
+    pd.Index
+        Row labels of the occurrence matrix.
+    """
+    codes, uniques = _factorize(s)
+    n = len(s)
+    margin = len(uniques)
+
+    present = codes >= 0
+    counts = present.astype(np.int64) + 1
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+
+    indices = np.full(indptr[-1], margin, dtype=np.int64)
+    indices[indptr[:-1][present]] = codes[present]
+    m = sp.csc_matrix(
+        (np.ones(len(indices), dtype=np.int64), indices, indptr),
+        shape=(margin + 1, n),
+    )
+
+    labels = pd.Index(list(uniques) + [_INTERNAL_MARGINAL], name=s.name)
+    return m, labels
+
+
+def _factorize(s: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    """Factorize a series into sorted integer codes, with -1 for missing values."""
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return np.asarray(s.cat.codes, dtype=np.int64), pd.Index(s.cat.categories)
+    codes, uniques = pd.factorize(s, sort=True)
+    return codes.astype(np.int64), pd.Index(uniques)
+
+
+def sparse_khatri_rao(m1: sp.spmatrix, m2: sp.spmatrix) -> sp.csc_matrix:
+    """Calculate the column-wise Kronecker product of two sparse matrices.
+
+    Equivalent to `scipy.linalg.khatri_rao` for sparse inputs: column `j` of the
+    output is `kron(m1[:, j], m2[:, j])`. The cost is proportional to the number
+    of non-zero entries of the output.
+
+    Parameters
+    ----------
+    m1 : sp.spmatrix
+        First input matrix.
+    m2 : sp.spmatrix
+        Second input matrix.
+
+    Returns
+    -------
+    sp.csc_matrix
+        Khatri-Rao product.
+    """
+    m1 = sp.csc_matrix(m1)
+    m2 = sp.csc_matrix(m2)
+    if m1.shape[1] != m2.shape[1]:
+        raise ValueError("The number of columns of both matrices must match.")
+    m1.sort_indices()
+    m2.sort_indices()
+
+    n = m1.shape[1]
+    nnz1 = np.diff(m1.indptr)
+    nnz2 = np.diff(m2.indptr)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(nnz1 * nnz2, out=indptr[1:])
+
+    # Each entry of m1 is repeated once for every entry of m2 in the same column.
+    col1 = np.repeat(np.arange(n), nnz1)
+    repeats = nnz2[col1]
+    rows1 = np.repeat(m1.indices.astype(np.int64), repeats)
+    data1 = np.repeat(m1.data, repeats)
+
+    # Position of each output entry among the entries of its column in m2.
+    starts = np.repeat(np.cumsum(repeats) - repeats, repeats)
+    offsets = np.arange(indptr[-1], dtype=np.int64) - starts
+    idx2 = np.repeat(m2.indptr[col1], repeats) + offsets
+
+    indices = rows1 * m2.shape[0] + m2.indices[idx2]
+    data = data1 * m2.data[idx2]
+    return sp.csc_matrix((data, indices, indptr), shape=(m1.shape[0] * m2.shape[0], n))
+
+
+def _compact_rows(m: sp.csc_matrix) -> Tuple[sp.csc_matrix, np.ndarray]:
+    """Drop the empty rows of a sparse matrix.
+
+    Returns
+    -------
+    tuple[sp.csc_matrix, np.ndarray]
+        Matrix without empty rows, and the sorted ids of the kept rows.
+    """
+    rows, indices = np.unique(m.indices, return_inverse=True)
+    m = sp.csc_matrix(
+        (m.data, indices.reshape(-1), m.indptr), shape=(len(rows), m.shape[1])
+    )
+    return m, rows
+
+
 def indexed_khatri_rao(m1: pd.DataFrame, m2: pd.DataFrame) -> pd.DataFrame:
     """Calculate the indexed Khatri-Rao product of two matrices.
 
@@ -1,25 +1,111 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from typing import List, Optional
 
-from pandas import DataFrame
+import numpy as np
+from pandas import DataFrame, concat
 
 from parakeet.core.order import OrderBy
+from parakeet.core.profile import Span
+
+OTHER = "Other"
+"""Label of every dimension in the row folding the cells outside of the top k."""
+
+FOLDED = "Folded"
+"""Column flagging the row folding the cells outside of the top k.
+
+The row is flagged rather than recognized by its `OTHER` labels, which can be
+real values of the dimensions.
+"""
 
 
 @dataclass
 class Result:
+    """Frequency table.
+
+    Attributes
+    ----------
+    data : DataFrame
+        Frequency and percentage of each cell of the dimensions. Tables
+        keeping only the top cells flag the row of other cells in a `FOLDED`
+        column.
+    dims : list[str]
+        Dimensions of the table.
+    estimated : bool
+        Whether frequencies are estimates, e.g. from a `FrequencySketch`.
+        Estimated tables only contain the most frequent cells.
+    distinct : float, optional
+        Estimated number of distinct cells, for estimated tables.
+    error : int, optional
+        Maximum underestimation of each frequency, for estimated tables.
+    profile : Span, optional
+        Time spent in each stage of the calculation, when profiling is
+        enabled (see `parakeet.core.profile`).
+    """
+
     data: DataFrame
     dims: List[str]
+    estimated: bool = False
+    distinct: Optional[float] = None
+    error: Optional[int] = None
+    profile: Optional[Span] = field(default=None, repr=False, compare=False)
+
+    def merge(self, other: "Result") -> "Result":
+        """Merge the frequency table of a disjoint part of the data.
+
+        Frequencies are summed cell by cell and percentages are calculated
+        again, as if the table was calculated over both parts at once, e.g.
+        a history and a new batch of data. Estimated tables and tables with
+        a row of other cells cannot be merged exactly; merge their sketches
+        or full tables instead.
+        """
+        if other.dims != self.dims:
+            raise ValueError("Cannot merge frequency tables of other dimensions.")
+        for result in (self, other):
+            if result.estimated or _is_folded(result.data).any():
+                raise ValueError("Only exact and complete tables can be merged.")
+        data = (
+            concat([self.data, other.data])[self.dims + ["Frequency"]]
+            .groupby(self.dims, dropna=False, observed=False)
+            .sum()
+            .reset_index()
+        )
+        data["Percentage"] = data["Frequency"] / data["Frequency"].sum()
+        return Result(data, self.dims)
+
+    def top(self, k: int) -> "Result":
+        """Keep the `k` most frequent cells, folding the others into one row."""
+        return replace(self, data=select_top_k(self.data, self.dims, k))
 
-    def display(self, order_by: Optional[OrderBy] = None) -> str:
-        """Display the result with pretty formatting."""
-        if order_by is None:
-            order_by = OrderBy.from_dimensions(self.dims, True)
-        data = self.data.copy()
-        data.columns = data.columns.str.replace("_", " ").str.title()
+    def display(
+        self, order_by: Optional[OrderBy] = None, top_k: Optional[int] = None
+    ) -> str:
+        """Display the result with pretty formatting.
 
-        cols, ascending = order_by.to_pandas()
-        data = data.sort_values(by=cols, ascending=ascending)
+        With `top_k`, only the `top_k` most frequent cells are shown, by
+        default in decreasing frequency, followed by a row folding the others.
+        Only the shown rows are sorted.
+        """
+        if top_k is None:
+            if order_by is None:
+                order_by = OrderBy.from_dimensions(self.dims, True)
+            data = self.data
+        else:
+            data = select_top_k(self.data, self.dims, top_k)
+
+        if order_by is not None:
+            # The row of other cells, if any, stays last.
+            other = _is_folded(data)
+            cols, ascending = order_by.to_pandas()
+            cols = [_title(c) for c in cols]
+            data = _titled(data.drop(columns=FOLDED, errors="ignore"))
+            data = concat(
+                [
+                    data[~other].sort_values(by=cols, ascending=ascending),
+                    data[other],
+                ]
+            )
+        else:
+            data = _titled(data.drop(columns=FOLDED, errors="ignore"))
         data = data.reset_index(drop=True)
         data["Cumulative Frequency"] = data["Frequency"].cumsum()
         data["Cumulative Percentage"] = data["Percentage"].cumsum()
@@ -32,5 +118,100 @@ class Result:
                 "Cumulative Percentage": "{:.2%}",
             }
         )
+        if self.estimated:
+            data = data.set_caption(
+                f"Estimated frequencies, each up to {self.error:,} below the true"
+                f" value, of about {self.distinct:,.0f} distinct cells."
+            )
 
         return data
+
+
+def select_top_k(data: DataFrame, dims: List[str], k: int) -> DataFrame:
+    """Keep the `k` most frequent cells of a frequency table.
+
+    The top cells are found by partial selection, in linear time, and only
+    they are sorted, by decreasing frequency. Ties are broken by their order
+    in `data`. The other cells are folded into a last row, flagged by the
+    `FOLDED` column, whose dimensions are all `OTHER`, with their exact total
+    frequency and percentage.
+
+    Parameters
+    ----------
+    data : DataFrame
+        Frequency table, with "Frequency" and "Percentage" columns.
+    dims : list[str]
+        Dimensions of the table.
+    k : int
+        Number of cells to keep.
+
+    Returns
+    -------
+    DataFrame
+        Top cells, followed by the row of other cells if there are any.
+    """
+    if k < 0:
+        raise ValueError("The number of cells to keep must be non-negative.")
+    counts = data["Frequency"].to_numpy()
+    # A row of other cells from an earlier selection is never a top cell.
+    other = _is_folded(data)
+    candidates = np.flatnonzero(~other)
+    top = candidates[top_k_positions(counts[candidates], k)]
+    if len(top) == len(data):
+        return data.iloc[top].reset_index(drop=True)
+
+    rest = np.ones(len(data), dtype=bool)
+    rest[top] = False
+    return fold_other(
+        data.iloc[top],
+        dims,
+        counts[rest].sum(),
+        data["Percentage"].to_numpy()[rest].sum(),
+    )
+
+
+def fold_other(
+    top: DataFrame, dims: List[str], frequency: int, percentage: float
+) -> DataFrame:
+    """Append the row of other cells to the top cells of a frequency table."""
+    other = DataFrame(
+        {
+            **{dim: [OTHER] for dim in dims},
+            "Frequency": [frequency],
+            "Percentage": [percentage],
+            FOLDED: [True],
+        }
+    )
+    return concat([top.assign(**{FOLDED: False}), other], ignore_index=True)
+
+
+def top_k_positions(counts: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the `k` largest counts, by decreasing count.
+
+    Ties are broken by position, so the selection is deterministic.
+    """
+    n = len(counts)
+    if k >= n:
+        return np.lexsort((np.arange(n), -counts))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    kth = np.partition(counts, n - k)[n - k]
+    greater = np.flatnonzero(counts > kth)
+    ties = np.flatnonzero(counts == kth)[: k - len(greater)]
+    top = np.concatenate([greater, ties])
+    return top[np.lexsort((top, -counts[top]))]
+
+
+def _is_folded(data: DataFrame) -> np.ndarray:
+    """Whether each row is a row of other cells."""
+    if FOLDED not in data:
+        return np.zeros(len(data), dtype=bool)
+    return data[FOLDED].to_numpy(dtype=bool)
+
+
+def _title(column: str) -> str:
+    return column.replace("_", " ").title()
+
+
+def _titled(data: DataFrame) -> DataFrame:
+    return data.rename(columns=_title)
@@ -0,0 +1,127 @@
+"""Resolve derived statistics as a computation graph over base statistics.
+
+Base statistics are summarizable by sum, so they can be aggregated by the
+cube op. Derived statistics are functions of other statistics, and are
+calculated on the cube once all of their inputs are available.
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from parakeet.stats.cube import CubeArray
+
+
+@dataclass(frozen=True)
+class Stat:
+    """Statistic that can be requested from an analysis.
+
+    Attributes
+    ----------
+    name : str
+        Name of the output column.
+    inputs : tuple[str, ...]
+        Names of the statistics the calculation depends on.
+    fn : callable, optional
+        Function called with the cube and the arrays of each input, in order.
+        Base statistics, calculated by the backend before cubing, have no
+        function.
+    sql : callable, optional
+        Function called with a SQL dialect and the SQL expressions of each
+        input, in order, returning the SQL expression of the statistic.
+        Statistics without it are calculated after the query by SQL engines.
+    """
+
+    name: str
+    inputs: Tuple[str, ...] = ()
+    fn: Optional[Callable[..., np.ndarray]] = None
+    sql: Optional[Callable[..., str]] = None
+
+    @property
+    def is_base(self) -> bool:
+        return self.fn is None
+
+
+def ratio_to_total(name: str, measure: str) -> Stat:
+    """Statistic dividing a measure by its value for the whole population."""
+    return Stat(
+        name,
+        (measure,),
+        lambda cube, _: cube.ratio_to_total(measure),
+        lambda dialect, m: dialect.div(m, dialect.total(m)),
+    )
+
+
+class StatGraph:
+    """Graph of statistics, resolved from the requested outputs."""
+
+    def __init__(self, stats: Iterable[Stat]) -> None:
+        self._stats: Dict[str, Stat] = {}
+        for stat in stats:
+            self.add(stat)
+
+    def add(self, stat: Stat) -> None:
+        """Add or replace a statistic in the graph."""
+        self._stats[stat.name] = stat
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._stats
+
+    def resolve(self, outputs: Iterable[Union[str, Stat]]) -> List[Stat]:
+        """Return every statistic needed for the outputs, in dependency order.
+
+        Custom `Stat` outputs are added to the graph before resolving.
+        """
+        order: List[Stat] = []
+        visiting = set()
+        done = set()
+
+        def visit(name: str) -> None:
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Statistic {name} depends on itself.")
+            if name not in self._stats:
+                raise ValueError(f"Unknown statistic {name}.")
+            visiting.add(name)
+            for dep in self._stats[name].inputs:
+                visit(dep)
+            visiting.remove(name)
+            done.add(name)
+            order.append(self._stats[name])
+
+        for name in self._names(outputs):
+            visit(name)
+        return order
+
+    def base(self, outputs: Iterable[Union[str, Stat]]) -> List[str]:
+        """Return the base statistics needed for the outputs."""
+        return [s.name for s in self.resolve(outputs) if s.is_base]
+
+    def evaluate(
+        self, cube: CubeArray, outputs: Iterable[Union[str, Stat]]
+    ) -> CubeArray:
+        """Calculate the derived statistics needed for the outputs.
+
+        Each intermediate statistic is calculated once, and statistics that are
+        already in the cube are not calculated again. The returned cube only
+        holds the requested outputs, in the requested order.
+        """
+        outputs = self._names(outputs)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for stat in self.resolve(outputs):
+                if stat.name in cube:
+                    continue
+                if stat.is_base:
+                    raise ValueError(f"Missing base statistic {stat.name}.")
+                cube[stat.name] = stat.fn(cube, *[cube[i] for i in stat.inputs])
+        return cube.select(outputs)
+
+    def _names(self, outputs: Iterable[Union[str, Stat]]) -> List[str]:
+        names = []
+        for output in outputs:
+            if isinstance(output, Stat):
+                self.add(output)
+                output = output.name
+            names.append(output)
+        return names
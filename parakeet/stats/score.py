@@ -0,0 +1,312 @@
+"""Summary of a continuous score against a binary label: AUC, Gini, KS, Lorenz.
+
+Every metric is derived from the cumulative counts of positives and negatives
+above each threshold of the score. Rows are reduced to runs: the positives
+and negatives of each distinct score (exact) or of each bin of the score
+(binned), per stratum. Runs of every stratum are laid out in a single array,
+sorted by stratum and then by decreasing score, so that all strata are
+summarized together with segmented cumulative sums and reductions.
+"""
+from dataclasses import dataclass
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from parakeet.stats.cube import _INTERNAL_MARGINAL
+
+DEFAULT_POINTS = 101
+"""Default number of points of each curve."""
+
+EDGE_SAMPLE = 1 << 20
+"""Number of scores sampled to place the edges of the bins."""
+
+Runs = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+"""Stratum, score, positives and negatives of each run."""
+
+
+@dataclass
+class Result:
+    """Summary of a score against a binary label, per stratum.
+
+    Attributes
+    ----------
+    summary : DataFrame
+        Metrics of each stratum: `count`, `positives`, `auc`, `gini`, `ks`,
+        the score `ks_score` at which the KS is reached, and bounds on the
+        error of the AUC and KS, `auc_error` and `ks_error`, which are 0
+        unless binned.
+    curves : DataFrame
+        Points of the curves of each stratum, at evenly spaced shares of the
+        population ranked by decreasing score: the `population` share, the
+        share of positives above it (`tpr`, the Lorenz curve), the share of
+        negatives above it (`fpr`, with `tpr` the ROC curve) and the `score`
+        threshold.
+    by : list[str]
+        Dimensions of the strata, empty for a single stratum.
+    binned : bool
+        Whether metrics were calculated from bins of the score.
+    """
+
+    summary: pd.DataFrame
+    curves: pd.DataFrame
+    by: List[str]
+    binned: bool = False
+
+    def lorenz(self, stratum=_INTERNAL_MARGINAL) -> pd.DataFrame:
+        """Lorenz curve of a stratum, by default of the single stratum."""
+        return self.curves.loc[stratum, ["population", "tpr"]]
+
+    def roc(self, stratum=_INTERNAL_MARGINAL) -> pd.DataFrame:
+        """ROC curve of a stratum, by default of the single stratum."""
+        return self.curves.loc[stratum, ["fpr", "tpr"]]
+
+
+def runs(group: np.ndarray, score: np.ndarray, label: np.ndarray) -> Runs:
+    """Runs of equal scores, from a single sort of the rows.
+
+    Rows are sorted by group, then by decreasing score. Tied scores form a
+    single run, so that they count as one threshold.
+    """
+    check_binary(label)
+    if len(group) == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return group, score, empty, empty
+    order = np.argsort(-score)
+    # Stable sorts of 8 and 16-bit integers are radix sorts, in linear time.
+    codes = group[order].astype(np.min_scalar_type(group.max()))
+    order = order[np.argsort(codes, kind="stable")]
+    group, score, label = group[order], score[order], label[order]
+    starts = np.flatnonzero(
+        np.r_[True, (group[1:] != group[:-1]) | (score[1:] != score[:-1])]
+    )
+    positives = np.add.reduceat((label == 1).astype(np.int64), starts)
+    counts = np.diff(np.r_[starts, len(group)])
+    return group[starts], score[starts], positives, counts - positives
+
+
+def check_binary(label: np.ndarray) -> None:
+    """Raise a `ValueError` if a label holds values other than 0 and 1."""
+    other = np.unique(label[(label != 0) & (label != 1)])
+    if len(other) > 0:
+        raise ValueError(f"Label values {other.tolist()} are not 0 or 1.")
+
+
+def quantile_edges(score: np.ndarray, bins: int, seed: int = 0) -> np.ndarray:
+    """Lower edges of `bins` bins with about as many scores each.
+
+    Edges are quantiles of a sample of at most `EDGE_SAMPLE` scores, which
+    are fine enough for the bins to hold similar counts.
+    """
+    if len(score) > EDGE_SAMPLE:
+        rng = np.random.default_rng(seed)
+        score = score[rng.integers(0, len(score), EDGE_SAMPLE)]
+    return edges_of_sorted(np.sort(score), bins)
+
+
+def edges_of_sorted(sorted_scores: np.ndarray, bins: int) -> np.ndarray:
+    """Lower edges of `bins` quantile bins, from sorted scores."""
+    if bins < 1:
+        raise ValueError("The number of bins must be positive.")
+    if len(sorted_scores) == 0:
+        return np.zeros(1)
+    positions = np.linspace(0, len(sorted_scores) - 1, bins + 1)[:-1]
+    return np.unique(sorted_scores[positions.round().astype(np.int64)])
+
+
+def binned_runs(
+    group: np.ndarray,
+    score: np.ndarray,
+    label: np.ndarray,
+    edges: np.ndarray,
+    n_groups: int,
+) -> Runs:
+    """Runs of bins of the score, without sorting the rows.
+
+    Each score falls in the bin of the largest edge below it, and scores
+    below the first edge in the first bin. The score of a run is the lower
+    edge of its bin.
+    """
+    check_binary(label)
+    n_bins = len(edges)
+    bins = np.maximum(np.searchsorted(edges, score, side="right") - 1, 0)
+    # Bins in decreasing order of score within each group.
+    cells = group.astype(np.int64) * n_bins + (n_bins - 1 - bins)
+    counts = np.bincount(cells, minlength=n_groups * n_bins)
+    positives = np.bincount(cells[label == 1], minlength=n_groups * n_bins)
+    present = np.flatnonzero(counts)
+    return (
+        present // n_bins,
+        edges[n_bins - 1 - present % n_bins],
+        positives[present],
+        counts[present] - positives[present],
+    )
+
+
+def summarize(
+    runs: Runs,
+    keys: pd.Index,
+    by: List[str],
+    points: int = DEFAULT_POINTS,
+    binned: bool = False,
+) -> Result:
+    """Summarize the runs of every stratum at once.
+
+    Parameters
+    ----------
+    runs : Runs
+        Stratum (position in `keys`), score, positives and negatives of each
+        run, sorted by stratum and then by decreasing score, as returned by
+        `runs` or `binned_runs`.
+    keys : pd.Index
+        Keys of the strata.
+    by : list[str]
+        Dimensions of the strata.
+    points : int, optional
+        Number of points of each curve, by default `DEFAULT_POINTS`.
+    binned : bool, optional
+        Whether runs are bins, whose rows are not ordered by score. Errors
+        of the metrics are then bounded by assuming each bin is one tie.
+
+    Returns
+    -------
+    Result
+        Metrics and curves of each stratum. Strata without both positives
+        and negatives have missing metrics.
+
+    """
+    if points < 2:
+        raise ValueError("Curves need at least 2 points.")
+    group, score, positives, negatives = runs
+    group = np.asarray(group, dtype=np.int64)
+    p = np.asarray(positives, dtype=np.float64)
+    n = np.asarray(negatives, dtype=np.float64)
+    n_groups = len(keys)
+
+    total_p = np.bincount(group, p, minlength=n_groups)
+    total_n = np.bincount(group, n, minlength=n_groups)
+    starts = np.flatnonzero(np.r_[len(group) > 0, group[1:] != group[:-1]])
+
+    # Positives and negatives at or above the score of each run.
+    tp, fp = _segmented_cumsum(p, starts), _segmented_cumsum(n, starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pairs = total_p * total_n
+        # Trapezoids under the ROC curve; ties count as half.
+        auc = np.bincount(group, n * (2 * tp - p), minlength=n_groups) / (2 * pairs)
+        auc_error = np.bincount(group, p * n, minlength=n_groups) / (2 * pairs)
+        tpr, fpr = tp / total_p[group], fp / total_n[group]
+    gap = np.abs(tpr - fpr)
+    ks = np.full(n_groups, np.nan)
+    ks_score = np.full(n_groups, np.nan)
+    ks_error = np.zeros(n_groups)
+    if len(group) > 0:
+        ks[group[starts]] = np.fmax.reduceat(gap, starts)
+        # First run, i.e. highest score, reaching the KS of its stratum.
+        reached = np.flatnonzero(gap == ks[group])
+        first = np.unique(group[reached], return_index=True)[1]
+        ks_score[group[reached[first]]] = score[reached[first]]
+        if binned:
+            # Within a bin, the gap moves by at most the bin's share of either.
+            with np.errstate(invalid="ignore", divide="ignore"):
+                step = np.fmax(p / total_p[group], n / total_n[group])
+            ks_error[group[starts]] = np.fmax.reduceat(step, starts)
+    valid = (total_p > 0) & (total_n > 0)
+    ks[~valid] = np.nan
+    ks_score[~valid] = np.nan
+    if not binned:
+        auc_error = np.where(valid, 0.0, np.nan)
+    ks_error = np.where(valid, ks_error, np.nan)
+
+    summary = pd.DataFrame(
+        {
+            "count": (total_p + total_n).astype(np.int64),
+            "positives": total_p.astype(np.int64),
+            "auc": auc,
+            "gini": 2 * auc - 1,
+            "ks": ks,
+            "ks_score": ks_score,
+            "auc_error": auc_error,
+            "ks_error": ks_error,
+        },
+        index=keys,
+    )
+    curves = _curves(group, score, tp, fp, total_p, total_n, starts, keys, points)
+    return Result(summary, curves, list(by), binned)
+
+
+def single_stratum() -> pd.Index:
+    """Keys of the single stratum of an unstratified summary."""
+    return pd.Index([_INTERNAL_MARGINAL])
+
+
+def _segmented_cumsum(values: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Cumulative sum of values, restarting at each start of a group."""
+    total = np.cumsum(values)
+    if len(values) == 0:
+        return total
+    before = np.zeros(len(values))
+    before[starts] = total[starts] - values[starts]
+    # Position of the start of the group of each value.
+    index = np.zeros(len(values), dtype=np.int64)
+    index[starts] = starts
+    return total - before[np.maximum.accumulate(index)]
+
+
+def _curves(
+    group: np.ndarray,
+    score: np.ndarray,
+    tp: np.ndarray,
+    fp: np.ndarray,
+    total_p: np.ndarray,
+    total_n: np.ndarray,
+    starts: np.ndarray,
+    keys: pd.Index,
+    points: int,
+) -> pd.DataFrame:
+    """Curves of every stratum, interpolated at evenly spaced population shares.
+
+    Each stratum starts at the origin. Points of every stratum are located
+    at once, by searching the number of rows at or above each run, offset
+    by the rows of the previous strata, which increases along the runs.
+    Counts are integers, so that a point falling exactly at the end of a run
+    is located the same way in every stratum.
+    """
+    n_groups = len(keys)
+    grid = np.linspace(0, 1, points)
+    columns = {
+        "population": np.tile(grid, n_groups),
+        "tpr": np.full(n_groups * points, np.nan),
+        "fpr": np.full(n_groups * points, np.nan),
+        "score": np.full(n_groups * points, np.nan),
+    }
+    if len(group) > 0:
+        total = total_p + total_n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            y = np.insert(tp / total_p[group], starts, 0)
+            z = np.insert(fp / total_n[group], starts, 0)
+        offset = np.cumsum(total) - total
+        key = np.insert(offset[group] + tp + fp, starts, offset[group[starts]])
+        s = np.insert(score, starts, np.nan)
+        strata = group[starts]
+        # Position of the origin of each stratum, among the extended runs.
+        origin = starts + np.arange(len(starts))
+
+        target = total[strata, None] * grid[None, :]
+        target = np.where(np.isclose(target, target.round()), target.round(), target)
+        query = (offset[strata, None] + target).ravel()
+        j = np.searchsorted(key, query, side="left") - 1
+        j = np.maximum(j, np.repeat(origin, points))
+        j = np.minimum(j, len(key) - 2)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            t = np.clip((query - key[j]) / (key[j + 1] - key[j]), 0, 1)
+        rows = (strata[:, None] * points + np.arange(points)[None, :]).ravel()
+        columns["tpr"][rows] = y[j] + t * (y[j + 1] - y[j])
+        columns["fpr"][rows] = z[j] + t * (z[j + 1] - z[j])
+        columns["score"][rows] = s[j + 1]
+
+    levels = [keys.get_level_values(i).repeat(points) for i in range(keys.nlevels)]
+    index = pd.MultiIndex.from_arrays(
+        levels + [np.tile(np.arange(points), n_groups)],
+        names=list(keys.names) + ["point"],
+    )
+    return pd.DataFrame(columns, index=index)
@@ -0,0 +1,236 @@
+"""Mergeable sketches to approximate statistics of very large data sets.
+
+Sketches are updated chunk by chunk, in memory independent of the number of
+rows, and sketches of disjoint partitions can be merged into a sketch of
+their union with the same error guarantees.
+"""
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.util import hash_pandas_object
+
+from parakeet.stats.frequency import Result
+
+_UINT64 = np.uint64
+
+
+def hash_keys(keys: pd.Index) -> np.ndarray:
+    """Hash each key to 64 bits, consistently across processes.
+
+    Keys must have the same dtypes everywhere they are hashed, since e.g.
+    `1` and `1.0` are hashed differently.
+    """
+    return hash_pandas_object(keys.to_frame(index=False), index=False).to_numpy()
+
+
+class HyperLogLog:
+    """HyperLogLog sketch of the number of distinct values.
+
+    With `m = 2 ** precision` registers, the standard error of the estimate
+    is about `1.04 / sqrt(m)`, e.g. 0.8% with the default precision, using
+    `m` bytes of memory.
+
+    Parameters
+    ----------
+    precision : int, optional
+        Number of bits of the hashes used to choose a register, from 4 to 18,
+        by default 14.
+    """
+
+    def __init__(self, precision: int = 14) -> None:
+        if not 4 <= precision <= 18:
+            raise ValueError("Precision must be between 4 and 18.")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        """Standard error of the estimate, relative to the distinct count."""
+        return 1.04 / np.sqrt(len(self.registers))
+
+    def update(self, hashes: np.ndarray) -> "HyperLogLog":
+        """Add values, given by their 64-bit hashes."""
+        hashes = np.asarray(hashes, dtype=_UINT64)
+        p = self.precision
+        index = (hashes >> _UINT64(64 - p)).astype(np.intp)
+        # Rank of the first set bit in the remaining 64 - p bits.
+        rest = hashes << _UINT64(p)
+        rank = np.minimum(65 - _bit_length(rest), 64 - p + 1)
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """Merge the sketch of a disjoint partition into this one."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge sketches with different precisions.")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> float:
+        """Estimate the number of distinct values."""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if raw <= 2.5 * m and zeros > 0:
+            # Linear counting is more accurate for small cardinalities.
+            return m * np.log(m / zeros)
+        return raw
+
+
+class HeavyHitters:
+    """Mergeable summary of the most frequent keys (Misra-Gries).
+
+    At most `capacity` keys are kept. Each kept count underestimates the true
+    count of its key by at most `error`, which never exceeds
+    `n / (capacity + 1)` for `n` counted rows, and any key whose true count
+    exceeds `error` is kept. The bounds hold through merges (Agarwal et al.,
+    "Mergeable Summaries", 2012).
+
+    Parameters
+    ----------
+    capacity : int
+        Maximum number of keys to keep.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        if capacity < 1:
+            raise ValueError("Capacity must be positive.")
+        self.capacity = capacity
+        self.n = 0
+        self.error = 0
+        self.hashes = np.empty(0, dtype=_UINT64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.keys: Optional[pd.DataFrame] = None
+
+    def update(
+        self, keys: pd.Index, counts: np.ndarray, hashes: Optional[np.ndarray] = None
+    ) -> "HeavyHitters":
+        """Add the counts of distinct keys, e.g. from a chunk of data.
+
+        `hashes` of the keys, from `hash_keys`, are calculated if not given.
+        """
+        if hashes is None:
+            hashes = hash_keys(keys)
+        counts = np.asarray(counts, dtype=np.int64)
+        self._combine(hashes, counts, keys.to_frame(index=False), int(counts.sum()), 0)
+        return self
+
+    def merge(self, other: "HeavyHitters") -> "HeavyHitters":
+        """Merge the summary of a disjoint partition into this one."""
+        if other.capacity != self.capacity:
+            raise ValueError("Cannot merge summaries with different capacities.")
+        if other.keys is not None:
+            self._combine(other.hashes, other.counts, other.keys, other.n, other.error)
+        return self
+
+    def _combine(
+        self,
+        hashes: np.ndarray,
+        counts: np.ndarray,
+        keys: pd.DataFrame,
+        n: int,
+        error: int,
+    ) -> None:
+        if self.keys is not None:
+            hashes = np.concatenate([self.hashes, hashes])
+            counts = np.concatenate([self.counts, counts])
+            keys = pd.concat([self.keys, keys], ignore_index=True)
+        uniques, first, inverse = np.unique(
+            hashes, return_index=True, return_inverse=True
+        )
+        counts = np.bincount(inverse, weights=counts).astype(np.int64)
+
+        decrement = 0
+        if len(uniques) > self.capacity:
+            # Subtracting the (capacity + 1)-th largest count leaves at most
+            # `capacity` positive counters.
+            kth = len(counts) - self.capacity - 1
+            decrement = int(np.partition(counts, kth)[kth])
+            counts = counts - decrement
+        keep = counts > 0
+
+        self.hashes = uniques[keep]
+        self.counts = counts[keep]
+        self.keys = keys.iloc[first[keep]].reset_index(drop=True)
+        self.n += n
+        self.error += error + decrement
+
+
+class FrequencySketch:
+    """Approximate frequency table of very high-cardinality dimensions.
+
+    Combines `HeavyHitters`, for the most frequent cells and their counts,
+    and a `HyperLogLog`, for the number of distinct cells. Memory depends on
+    `capacity` and `precision` only, not on the number of cells.
+
+    Parameters
+    ----------
+    dims : list[str]
+        Dimensions of the frequency table.
+    capacity : int, optional
+        Number of cells to keep track of, by default 1000.
+    precision : int, optional
+        Precision of the distinct count, by default 14.
+    """
+
+    def __init__(self, dims: List[str], capacity: int = 1000, precision: int = 14):
+        self.dims = dims
+        self.heavy_hitters = HeavyHitters(capacity)
+        self.distinct = HyperLogLog(precision)
+
+    def update(self, counts: pd.Series) -> "FrequencySketch":
+        """Add the counts of each cell, indexed by the cells, e.g. of a chunk."""
+        counts = counts[counts > 0]
+        hashes = hash_keys(counts.index)
+        self.heavy_hitters.update(counts.index, counts.to_numpy(), hashes)
+        self.distinct.update(hashes)
+        return self
+
+    def merge(self, other: "FrequencySketch") -> "FrequencySketch":
+        """Merge the sketch of a disjoint partition into this one."""
+        if other.dims != self.dims:
+            raise ValueError("Cannot merge sketches of different dimensions.")
+        self.heavy_hitters.merge(other.heavy_hitters)
+        self.distinct.merge(other.distinct)
+        return self
+
+    def result(self, top_k: Optional[int] = None) -> Result:
+        """Estimated frequency table of the most frequent cells.
+
+        Cells are sorted by decreasing estimated frequency. Estimates are
+        lower bounds of the true frequencies, by at most `Result.error`.
+
+        Parameters
+        ----------
+        top_k : int, optional
+            Number of cells to return, by default every tracked cell.
+        """
+        hh = self.heavy_hitters
+        order = np.lexsort((hh.hashes, -hh.counts))[:top_k]
+        if hh.keys is None:
+            data = pd.DataFrame(columns=self.dims)
+        else:
+            data = hh.keys.iloc[order].reset_index(drop=True)
+        data.columns = self.dims
+        data["Frequency"] = hh.counts[order]
+        data["Percentage"] = data["Frequency"] / hh.n if hh.n > 0 else np.nan
+        return Result(
+            data,
+            self.dims,
+            estimated=True,
+            distinct=self.distinct.estimate(),
+            error=hh.error,
+        )
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """Number of bits needed to represent each unsigned 64-bit value."""
+    values = values.copy()
+    length = np.zeros(len(values), dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = values >= (_UINT64(1) << _UINT64(shift))
+        length[high] += shift
+        values[high] >>= _UINT64(shift)
+    return length + (values > 0)
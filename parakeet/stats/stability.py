@@ -0,0 +1,322 @@
+"""Stratified stability over time: a stratification per period, and drift.
+
+Base statistics are summarizable by sum, so the base statistics of each
+period are calculated once and cached. Adding a period only scans its rows,
+and every derived statistic, as well as the drift of the distribution of
+each period against a reference period, is calculated from the cached sums.
+"""
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from parakeet.stats import stratification
+from parakeet.stats.graph import Stat, StatGraph
+
+Period = Hashable
+CacheKey = Tuple[Hashable, ...]
+
+DEFAULT_EPSILON = 1e-4
+"""Share that replaces empty cells, whose log-ratio is otherwise infinite."""
+
+
+def to_periods(time: pd.Series, freq: str = "M") -> pd.Series:
+    """Period of each row, from a time column.
+
+    Datetimes are converted to periods of frequency `freq`, e.g. "M" for
+    months. Any other column, e.g. "2024-01" or 202401, already holds the
+    periods and is returned as is.
+    """
+    if pd.api.types.is_datetime64_any_dtype(time.dtype):
+        return time.dt.to_period(freq)
+    return time
+
+
+class PeriodCache:
+    """Cache of the base statistics of each period.
+
+    Base statistics are cached by analysis, given by a key such as the one of
+    `cache_key`, and then by period. Keep a cache per data source: periods
+    already cached are never scanned again, unless refreshed.
+
+    Persisted analyses are stored in a directory each, with a Parquet file
+    per period and a JSON index of the key and the periods, so that loading
+    a shared cache never runs code. Persisting requires `pyarrow`, and
+    periods that are `pd.Period`, integers or strings.
+
+    Parameters
+    ----------
+    path : str, optional
+        Directory where the cache is persisted, so that it survives across
+        processes, e.g. runs of a monitoring job. By default, the cache is
+        only kept in memory.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self._entries: Dict[CacheKey, Dict[Period, pd.DataFrame]] = {}
+
+    def periods(self, key: CacheKey) -> List[Period]:
+        """Periods cached for an analysis, in order."""
+        return sorted(self._load(key))
+
+    def get(self, key: CacheKey, period: Period, base: List[str]):
+        """Cached base statistics of a period, or None if some are missing."""
+        frame = self._load(key).get(period)
+        if frame is None or any(name not in frame for name in base):
+            return None
+        return frame[base]
+
+    def put(self, key: CacheKey, periods: Dict[Period, pd.DataFrame]) -> None:
+        """Cache the base statistics of each period, replacing earlier ones."""
+        entries = self._load(key)
+        entries.update(periods)
+        if self.path is None:
+            return
+        directory = self._directory(key)
+        os.makedirs(directory, exist_ok=True)
+        index = []
+        for i, (period, frame) in enumerate(entries.items()):
+            name = f"{i}.parquet"
+            frame.to_parquet(os.path.join(directory, name))
+            index.append([_encode_period(period), name])
+        with open(os.path.join(directory, _INDEX), "w") as f:
+            json.dump({"key": repr(key), "periods": index}, f)
+
+    def clear(self) -> None:
+        """Drop every cached period, including persisted ones."""
+        if self.path is not None and os.path.isdir(self.path):
+            for name in os.listdir(self.path):
+                directory = os.path.join(self.path, name)
+                if os.path.exists(os.path.join(directory, _INDEX)):
+                    shutil.rmtree(directory)
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return sum(len(periods) for periods in self._entries.values())
+
+    def _load(self, key: CacheKey) -> Dict[Period, pd.DataFrame]:
+        if key not in self._entries:
+            entries = {}
+            index = None
+            if self.path is not None:
+                index = os.path.join(self._directory(key), _INDEX)
+            if index is not None and os.path.exists(index):
+                with open(index) as f:
+                    stored = json.load(f)
+                if stored["key"] == repr(key):
+                    entries = {
+                        _decode_period(period): pd.read_parquet(
+                            os.path.join(self._directory(key), name)
+                        )
+                        for period, name in stored["periods"]
+                    }
+            self._entries[key] = entries
+        return self._entries[key]
+
+    def _directory(self, key: CacheKey) -> str:
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return os.path.join(self.path, digest)
+
+
+_INDEX = "index.json"
+
+
+def cache_key(
+    time: str,
+    freq: str,
+    dims: List[str],
+    label: str,
+    base: List[str],
+    label_type: stratification.LabelType = stratification.LabelType.BINARY,
+    grouping_sets: Optional[Iterable[Iterable[str]]] = None,
+    min_count: int = 0,
+) -> CacheKey:
+    """Key of the cached periods of a stability analysis.
+
+    Every option of the analysis is part of the key, so that analyses that
+    differ in any of them never read each other's periods.
+    """
+    if grouping_sets is not None:
+        grouping_sets = tuple(sorted(tuple(gset) for gset in grouping_sets))
+    return (
+        time,
+        freq,
+        tuple(dims),
+        label,
+        tuple(sorted(base)),
+        str(label_type),
+        grouping_sets,
+        min_count,
+    )
+
+
+def _encode_period(period: Period):
+    """Period as a JSON value."""
+    if isinstance(period, pd.Period):
+        return {"period": str(period), "freq": period.freqstr}
+    if isinstance(period, (int, np.integer)):
+        return int(period)
+    if isinstance(period, str):
+        return period
+    raise ValueError(f"Period {period!r} cannot be persisted.")
+
+
+def _decode_period(value) -> Period:
+    if isinstance(value, dict):
+        return pd.Period(value["period"], freq=value["freq"])
+    return value
+
+
+@dataclass
+class Result:
+    """Stratification of each period, and drift against a reference period."""
+
+    results: Dict[Period, stratification.Result]
+    psi: pd.Series
+    """Population stability index of each period, over the cells of every
+    dimension at once."""
+    csi: pd.DataFrame
+    """Characteristic stability index of each period (rows) and dimension
+    (columns), over the values of the dimension."""
+    reference: Period
+    scanned: List[Period] = field(default_factory=list)
+    """Periods whose rows were scanned, rather than read from the cache."""
+
+    @property
+    def periods(self) -> List[Period]:
+        return list(self.results)
+
+    @property
+    def data(self) -> pd.DataFrame:
+        """Stratification of every period, indexed by period first."""
+        return pd.concat({p: r.data for p, r in self.results.items()}, names=["period"])
+
+    def __getitem__(self, period: Period) -> stratification.Result:
+        return self.results[period]
+
+
+def stability_index(
+    expected: np.ndarray, actual: np.ndarray, epsilon: float = DEFAULT_EPSILON
+) -> np.ndarray:
+    """Stability index of distributions of counts over the same cells.
+
+    `sum((a - e) * log(a / e))` over the shares `e` and `a` of each cell, in
+    the last axis. Shares are at least `epsilon`, so that empty cells count
+    as a large but finite shift.
+    """
+    expected = np.asarray(expected, dtype=np.float64)
+    actual = np.asarray(actual, dtype=np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        e = expected / expected.sum(axis=-1, keepdims=True)
+        a = actual / actual.sum(axis=-1, keepdims=True)
+    e, a = np.maximum(e, epsilon), np.maximum(a, epsilon)
+    return np.sum((a - e) * np.log(a / e), axis=-1)
+
+
+def plan_stability(
+    stats: Optional[List[Union[str, Stat]]], min_count: int = 0
+) -> Tuple[StatGraph, List[Union[str, Stat]], List[str]]:
+    """Resolve the requested statistics, as in `stratification.plan_stats`.
+
+    The count is always calculated, since drift compares the distribution of
+    the counts of each period.
+    """
+    graph, outputs, base = stratification.plan_stats(stats, min_count)
+    if "count" not in base:
+        base.append("count")
+    return graph, outputs, base
+
+
+def stabilize(
+    basic_stats: Dict[Period, pd.DataFrame],
+    dims: List[str],
+    graph: StatGraph,
+    outputs: List[Union[str, Stat]],
+    reference: Optional[Period] = None,
+    epsilon: float = DEFAULT_EPSILON,
+    scanned: Iterable[Period] = (),
+    **kwargs,
+) -> Result:
+    """Stratify each period, and calculate their drift.
+
+    Parameters
+    ----------
+    basic_stats : dict[Period, DataFrame]
+        Base statistics of each period, indexed by the dimensions.
+    dims : list[str]
+        List of dimensions to stratify.
+    graph : StatGraph
+        Graph of statistics, as returned by `plan_stability`.
+    outputs : list[str | Stat]
+        Requested statistics.
+    reference : Period, optional
+        Period the others are compared with, by default the first one.
+    epsilon : float, optional
+        Minimum share of a cell in the stability indices.
+    scanned : Iterable[Period], optional
+        Periods whose base statistics were calculated rather than cached.
+    **kwargs
+        Cube options, see `parakeet.stats.stratification.stratify`.
+
+    Returns
+    -------
+    Result
+        Stratification of each period and drift.
+
+    """
+    periods = sorted(basic_stats)
+    if len(periods) == 0:
+        raise ValueError("Cannot calculate the stability of no periods.")
+    if reference is None:
+        reference = periods[0]
+    if reference not in basic_stats:
+        raise ValueError(f"Reference period {reference} is not in the data.")
+
+    results = {
+        p: stratification.stratify(basic_stats[p], dims, graph, outputs, **kwargs)
+        for p in periods
+    }
+
+    # Counts of each cell (rows) in each period (columns).
+    counts = pd.concat(
+        [basic_stats[p]["count"].rename(i) for i, p in enumerate(periods)], axis=1
+    )
+    counts = counts.fillna(0)
+    index = pd.Index(periods, name="period")
+    expected = counts[periods.index(reference)].to_numpy()
+    psi = pd.Series(
+        stability_index(expected, counts.to_numpy().T, epsilon), index=index, name="psi"
+    )
+    csi = {}
+    for dim in dims:
+        marginal = counts.groupby(level=dim, dropna=False, observed=True).sum()
+        expected = marginal[periods.index(reference)].to_numpy()
+        csi[dim] = stability_index(expected, marginal.to_numpy().T, epsilon)
+    csi = pd.DataFrame(csi, index=index)
+    return Result(results, psi, csi, reference, sorted(scanned))
+
+
+def periods_to_scan(
+    cache: PeriodCache,
+    key: CacheKey,
+    periods: Iterable[Period],
+    base: List[str],
+    refresh: Iterable[Period] = (),
+) -> List[Period]:
+    """Periods of the data whose base statistics must be calculated."""
+    refresh = set(refresh)
+    return [p for p in periods if p in refresh or cache.get(key, p, base) is None]
+
+
+def cached_stats(
+    cache: PeriodCache, key: CacheKey, base: List[str]
+) -> Dict[Period, pd.DataFrame]:
+    """Base statistics of every cached period of an analysis."""
+    stats = {p: cache.get(key, p, base) for p in cache.periods(key)}
+    return {p: frame for p, frame in stats.items() if frame is not None}
@@ -1,13 +1,315 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from enum import StrEnum, auto
+from typing import (
+    Dict,
+    FrozenSet,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 
+from numpy import errstate, log, maximum, nansum, sqrt, where
 from pandas import DataFrame
 
-from parakeet.stats.cube import _INTERNAL_MARGINAL
+from parakeet.core import profile
+from parakeet.core.profile import Span
+from parakeet.stats.cube import (
+    _INTERNAL_MARGINAL,
+    Cube,
+    CubeArray,
+    CubeStrategy,
+    GroupingSets,
+)
+from parakeet.stats.graph import Stat, StatGraph, ratio_to_total
+
+STATS = [
+    Stat("count"),
+    Stat("zeros"),
+    Stat("ones"),
+    ratio_to_total("zeros_pct", "zeros"),
+    ratio_to_total("ones_pct", "ones"),
+    Stat(
+        "ones_ratio",
+        ("ones", "count"),
+        lambda _, ones, count: ones / count,
+        lambda sql, ones, count: sql.div(ones, count),
+    ),
+    Stat(
+        "woe",
+        ("zeros", "ones"),
+        lambda _, zeros, ones: log(zeros / ones),
+        lambda sql, zeros, ones: sql.ln(sql.div(zeros, ones)),
+    ),
+    Stat(
+        "iv",
+        ("zeros_pct", "ones_pct", "woe"),
+        lambda _, zeros_pct, ones_pct, woe: (zeros_pct - ones_pct) * woe,
+        lambda _, zeros_pct, ones_pct, woe: f"({zeros_pct} - {ones_pct}) * {woe}",
+    ),
+]
+"""Statistics available in a stratification. Base statistics are calculated
+   from the label, and the remaining ones are derived from them."""
+
+DEFAULT_STATS = [s.name for s in STATS]
+
+
+class LabelType(StrEnum):
+    """Type of the label of a stratification."""
+
+    BINARY = auto()
+    """Label of 0s and 1s. Other values are counted, but in neither class."""
+    MULTICLASS = auto()
+    """Label of any number of classes, each compared with the rest."""
+    CONTINUOUS = auto()
+    """Numeric label, summarized by its moments."""
+
+
+CONTINUOUS_STATS = [
+    Stat("count"),
+    Stat("offset_sum"),
+    Stat("shifted_sum"),
+    Stat("shifted_sum_sq"),
+    Stat(
+        "sum",
+        ("shifted_sum", "offset_sum"),
+        lambda _, shifted_sum, offset_sum: shifted_sum + offset_sum,
+        lambda _, shifted_sum, offset_sum: f"({shifted_sum} + {offset_sum})",
+    ),
+    Stat(
+        "sum_sq",
+        ("shifted_sum_sq", "shifted_sum", "offset_sum", "count"),
+        lambda _, shifted_sum_sq, shifted_sum, offset_sum, count: shifted_sum_sq
+        + where(count > 0, (2 * shifted_sum + offset_sum) * offset_sum / count, 0),
+    ),
+    Stat(
+        "mean",
+        ("sum", "count"),
+        lambda _, sum_, count: sum_ / count,
+        lambda sql, sum_, count: sql.div(sum_, count),
+    ),
+    Stat(
+        "std",
+        ("shifted_sum_sq", "shifted_sum", "count"),
+        # Sample standard deviation, undefined for a single value.
+        lambda _, shifted_sum_sq, shifted_sum, count: where(
+            count > 1,
+            sqrt(maximum(shifted_sum_sq - shifted_sum**2 / count, 0) / (count - 1)),
+            float("nan"),
+        ),
+    ),
+]
+"""Statistics available in the stratification of a continuous label.
+
+   Values are shifted by a constant before they are summed, by default the
+   mean of the label, so that the sum of squares does not cancel out when the
+   mean is large relative to the deviation. `offset_sum`, the count times the
+   shift, carries the shift through the cube and merges. The standard
+   deviation is still imprecise in cells whose mean is millions of deviations
+   away from the shift."""
+
+CONTINUOUS_DEFAULT_STATS = ["count", "sum", "sum_sq", "mean", "std"]
+
+
+def rebase(base: CubeArray, shift: float) -> CubeArray:
+    """Base statistics of a continuous label, shifted by another constant.
+
+    Cubes of the same label shifted by different constants, e.g. of
+    different batches, can then be added.
+    """
+    count = base["count"]
+    with errstate(invalid="ignore", divide="ignore"):
+        delta = where(count > 0, base["offset_sum"] / count - shift, 0)
+    values = {name: base[name] for name in base.columns}
+    values["offset_sum"] = count * shift
+    if "shifted_sum_sq" in base:
+        values["shifted_sum_sq"] = (
+            base["shifted_sum_sq"]
+            + 2 * delta * base["shifted_sum"]
+            + count * delta**2
+        )
+    if "shifted_sum" in base:
+        values["shifted_sum"] = base["shifted_sum"] + count * delta
+    return CubeArray(base.levels, values, codes=base.codes)
+
+
+def class_stat(name: str, value: Hashable) -> str:
+    """Name of the statistic `name` of a class of a multiclass label."""
+    return f"{name}_{value}"
+
+
+def multiclass_stats(classes: Sequence[Hashable]) -> List[Stat]:
+    """Statistics available in the stratification of a multiclass label.
+
+    Each class is compared with the rest of the label, as the ones with the
+    zeros of a binary label, giving the statistics of `STATS` named after
+    the class, e.g. `count_a`, `share_a` (as `ones_ratio`), `pct_a` (as
+    `ones_pct`), `woe_a` and `iv_a` for the class "a". The information value
+    `iv` is the sum of the information values of every class.
+    """
+    stats = [Stat("count")]
+    for value in classes:
+        count, rest = class_stat("count", value), class_stat("rest", value)
+        pct, rest_pct = class_stat("pct", value), class_stat("rest_pct", value)
+        woe = class_stat("woe", value)
+        stats += [
+            Stat(count),
+            Stat(
+                rest,
+                ("count", count),
+                lambda _, total, ones: total - ones,
+                lambda _, total, ones: f"({total} - {ones})",
+            ),
+            ratio_to_total(pct, count),
+            ratio_to_total(rest_pct, rest),
+            Stat(
+                class_stat("share", value),
+                (count, "count"),
+                lambda _, ones, total: ones / total,
+                lambda sql, ones, total: sql.div(ones, total),
+            ),
+            Stat(
+                woe,
+                (rest, count),
+                lambda _, zeros, ones: log(zeros / ones),
+                lambda sql, zeros, ones: sql.ln(sql.div(zeros, ones)),
+            ),
+            Stat(
+                class_stat("iv", value),
+                (rest_pct, pct, woe),
+                lambda _, zeros_pct, ones_pct, woe: (zeros_pct - ones_pct) * woe,
+                lambda _, zeros_pct, ones_pct, woe: f"({zeros_pct} - {ones_pct}) * {woe}",
+            ),
+        ]
+    ivs = tuple(class_stat("iv", value) for value in classes)
+    stats.append(
+        Stat(
+            "iv",
+            ivs,
+            lambda _, *ivs: sum(ivs),
+            lambda _, *ivs: " + ".join(ivs) if len(ivs) > 0 else "0",
+        )
+    )
+    names = [s.name for s in stats]
+    if len(set(names)) < len(names):
+        raise ValueError(f"Classes {list(classes)} give conflicting statistic names.")
+    return stats
+
+
+def label_stats(
+    label_type: LabelType = LabelType.BINARY,
+    classes: Optional[Sequence[Hashable]] = None,
+) -> Tuple[List[Stat], List[str]]:
+    """Statistics available for a type of label, and the default ones.
+
+    Intermediate statistics of a multiclass label, the count and share of
+    the rest of each class, are available but not calculated by default.
+    """
+    if label_type == LabelType.BINARY:
+        return STATS, DEFAULT_STATS
+    if label_type == LabelType.CONTINUOUS:
+        return CONTINUOUS_STATS, CONTINUOUS_DEFAULT_STATS
+    if classes is None:
+        raise ValueError("The classes of a multiclass label are required.")
+    stats = multiclass_stats(classes)
+    defaults = ["count"]
+    for value in classes:
+        defaults += [
+            class_stat(name, value) for name in ["count", "share", "pct", "woe", "iv"]
+        ]
+    return stats, defaults + ["iv"]
 
 
 @dataclass
 class Result:
-    data: DataFrame
+    """Stratification result.
+
+    Attributes
+    ----------
+    cube : CubeArray
+        Requested statistics of each cell, including marginals.
+    base : CubeArray, optional
+        Base statistics of each cell, which are summarizable by sum. Results
+        keeping them can be merged.
+    outputs : list[str | Stat], optional
+        Requested statistics.
+    min_count : int
+        Minimum count of the cells that were kept.
+    label_type : LabelType
+        Type of the label.
+    classes : tuple, optional
+        Classes of a multiclass label, in the order of their statistics.
+    grouping_sets : frozenset[tuple[str, ...]], optional
+        Grouping sets of the cube, as the names of their dimensions.
+    profile : Span, optional
+        Time spent in each stage of the calculation, when profiling is
+        enabled (see `parakeet.core.profile`).
+    """
+
+    cube: CubeArray
+    base: Optional[CubeArray] = None
+    outputs: Optional[List[Union[str, Stat]]] = None
+    min_count: int = 0
+    label_type: LabelType = LabelType.BINARY
+    classes: Optional[Tuple] = None
+    grouping_sets: Optional[FrozenSet[Tuple[str, ...]]] = None
+    profile: Optional[Span] = field(default=None, repr=False, compare=False)
+
+    def merge(self, other: "Result") -> "Result":
+        """Merge the stratification of a disjoint part of the data.
+
+        Base statistics are summed cell by cell, marginals included, and the
+        requested statistics are calculated again from the sums. The result
+        is the same as stratifying both parts at once, e.g. a history and a
+        new batch of data.
+        """
+        if self.base is None or other.base is None:
+            raise ValueError("Results without base statistics cannot be merged.")
+        if self.min_count > 0 or other.min_count > 0:
+            raise ValueError("Results with pruned cells cannot be merged exactly.")
+        if (self.label_type, self.classes) != (other.label_type, other.classes):
+            raise ValueError("Results of different labels or classes cannot be merged.")
+        if self.grouping_sets != other.grouping_sets:
+            raise ValueError("Results of different grouping sets cannot be merged.")
+        graph, outputs, _ = plan_stats(
+            self.outputs, label_type=self.label_type, classes=self.classes
+        )
+        other_base = other.base
+        if self.label_type == LabelType.CONTINUOUS:
+            # Both parts must be shifted by the same constant to be summed.
+            other_base = rebase(other_base, self.shift)
+        base = self.base.add(other_base)
+        cube = graph.evaluate(base.select(base.columns), outputs)
+        return Result(
+            cube,
+            base,
+            outputs,
+            label_type=self.label_type,
+            classes=self.classes,
+            grouping_sets=self.grouping_sets,
+        )
+
+    @property
+    def shift(self) -> float:
+        """Constant subtracted from a continuous label before it is summed."""
+        total = self.base.total("count")
+        return self.base.total("offset_sum") / total if total > 0 else 0.0
+
+    @property
+    def data(self) -> DataFrame:
+        """Result as a frame indexed by the stratification dimensions."""
+        return self.cube.to_frame()
+
+    def information_value(self) -> float:
+        """Total information value over the cells of the finest grouping set.
+
+        The information value of a multiclass label sums the ones of every
+        class against the rest.
+        """
+        return float(nansum(self.cube.finest("iv")))
 
     def display(self) -> str:
         """Display the result with pretty formatting."""
@@ -16,17 +318,154 @@ class Result:
         data = data.round(3)
         data = data.rename(index={_INTERNAL_MARGINAL: "Total"})
 
-        data = data.style.format(
-            {
-                "Count": "{:,.0f}",
-                "Zeros": "{:,.0f}",
-                "Ones": "{:,.0f}",
-                "Zeros Pct": "{:.1%}",
-                "Ones Pct": "{:.1%}",
-                "Ones Ratio": "{:.1%}",
-                "Woe": "{:.3f}",
-                "Iv": "{:.3f}",
-            }
-        )
+        formats = {
+            "Count": "{:,.0f}",
+            "Zeros": "{:,.0f}",
+            "Ones": "{:,.0f}",
+            "Zeros Pct": "{:.1%}",
+            "Ones Pct": "{:.1%}",
+            "Ones Ratio": "{:.1%}",
+            "Woe": "{:.3f}",
+            "Iv": "{:.3f}",
+        }
+        if self.classes is not None:
+            for column in data.columns:
+                prefix = column.split(" ", 1)[0]
+                if prefix in _CLASS_FORMATS:
+                    formats[column] = _CLASS_FORMATS[prefix]
+        data = data.style.format(formats)
 
         return data
+
+
+_CLASS_FORMATS = {
+    "Count": "{:,.0f}",
+    "Share": "{:.1%}",
+    "Pct": "{:.1%}",
+    "Woe": "{:.3f}",
+    "Iv": "{:.3f}",
+}
+"""Formats of the statistics of each class, by prefix of their display name."""
+
+
+@dataclass
+class ScreeningResult:
+    """Stratification of many variables against the same label."""
+
+    results: Dict[str, Result]
+    summary: DataFrame
+    """Total information value of each variable, in descending order."""
+
+    def __getitem__(self, variable: str) -> Result:
+        return self.results[variable]
+
+
+def plan_stats(
+    stats: Optional[List[Union[str, Stat]]],
+    min_count: int = 0,
+    label_type: LabelType = LabelType.BINARY,
+    classes: Optional[Sequence[Hashable]] = None,
+) -> Tuple[StatGraph, List[Union[str, Stat]], List[str]]:
+    """Resolve the requested statistics to the base statistics they need.
+
+    Parameters
+    ----------
+    stats : list[str | Stat], optional
+        Requested statistics, by default the default ones of the label, e.g.
+        every statistic in `STATS` for a binary label.
+    min_count : int, optional
+        Minimum count for a cell to be kept, by default 0. If positive, the
+        count is always calculated.
+    label_type : LabelType, optional
+        Type of the label, by default `LabelType.BINARY`.
+    classes : Sequence, optional
+        Classes of a multiclass label, required for that type.
+
+    Returns
+    -------
+    StatGraph
+        Graph of statistics, including custom requested statistics.
+    list[str | Stat]
+        Requested statistics.
+    list[str]
+        Base statistics that must be aggregated from the data.
+
+    """
+    available, defaults = label_stats(label_type, classes)
+    graph = StatGraph(available)
+    outputs = defaults if stats is None else list(stats)
+    base = graph.base(outputs)
+    if min_count > 0 and "count" not in base:
+        # Cells are pruned on their count, even if it is not requested.
+        base.append("count")
+    if label_type == LabelType.CONTINUOUS:
+        # The shift of the label is kept, so that results can be merged.
+        base += [name for name in ["count", "offset_sum"] if name not in base]
+    return graph, outputs, base
+
+
+def stratify(
+    basic_stats: DataFrame,
+    dims: list[str],
+    graph: StatGraph,
+    outputs: List[Union[str, Stat]],
+    sparse: bool = False,
+    strategy: CubeStrategy = CubeStrategy.MATRIX,
+    grouping_sets: Optional[Iterable[Iterable[str]]] = None,
+    min_count: int = 0,
+    label_type: LabelType = LabelType.BINARY,
+    classes: Optional[Sequence[Hashable]] = None,
+) -> Result:
+    """Cube the basic statistics and calculate the derived statistics.
+
+    Parameters
+    ----------
+    basic_stats : DataFrame
+        Base statistics, indexed by the stratification dimensions.
+    dims : list[str]
+        List of dimensions to stratify.
+    graph : StatGraph
+        Graph of statistics, as returned by `plan_stats`.
+    outputs : list[str | Stat]
+        Requested statistics.
+    sparse, strategy, grouping_sets, min_count
+        Cube options, see `parakeet.stats.cube.Cube`.
+    label_type, classes
+        Label of the statistics, as in `plan_stats`.
+
+    Returns
+    -------
+    Result
+        Stratification result.
+
+    """
+    basic_stats = basic_stats.reset_index(drop=False)
+
+    # Calculate and apply the cube op to fill in marginal values.
+    if grouping_sets is not None:
+        grouping_sets = GroupingSets(tuple(map(tuple, grouping_sets))).with_total()
+    with profile.span("cube", rows_in=len(basic_stats)) as span:
+        cube = Cube(
+            basic_stats,
+            dims,
+            sparse=sparse,
+            strategy=strategy,
+            grouping_sets=grouping_sets,
+            min_count=min_count,
+            count_column="count",
+        )
+        stats = cube.array(basic_stats.drop(columns=dims)).fillna(0)
+        grouping_sets = frozenset(
+            tuple(dims[d] for d in gset) for gset in cube.grouping_sets
+        )
+        base = stats.select(stats.columns)
+        span.rows_out = len(stats)
+
+    # Calculate the remaining statistics as combinations of things
+    # that can be aggregated by sum. The graph resolves the requested
+    # statistics back to the base ones, calculating each intermediate
+    # statistic once and skipping the ones that are not needed.
+    with profile.span("derived"):
+        cube = graph.evaluate(stats, outputs)
+    classes = None if classes is None else tuple(classes)
+    return Result(cube, base, outputs, min_count, label_type, classes, grouping_sets)
@@ -7,10 +7,17 @@ References
 .. [1] http://dbpl2017.org/slides/DBPL-2017-5.pdf
 """
 
+import numpy as np
 import pandas as pd
 import pytest
 
-from parakeet.stats.cube import _INTERNAL_MARGINAL, Cube, _occurrence_matrix
+from parakeet.stats.cube import (
+    _INTERNAL_MARGINAL,
+    Cube,
+    CubeStrategy,
+    GroupingSets,
+    _occurrence_matrix,
+)
 
 
 @pytest.fixture
@@ -104,3 +111,172 @@ def testCubeCreation(sample_data):
             270,
         ]
     ).all()
+
+
+def testSparseKhatriRao():
+    from scipy import sparse as sp
+    from scipy.linalg import khatri_rao
+
+    from parakeet.stats.cube import sparse_khatri_rao
+
+    m1 = sp.random(4, 7, density=0.5, format="csc", random_state=0)
+    m2 = sp.random(3, 7, density=0.5, format="csr", random_state=1)
+    kr = sparse_khatri_rao(m1, m2)
+    assert kr.shape == (12, 7)
+    assert (abs(kr.toarray() - khatri_rao(m1.toarray(), m2.toarray())) < 1e-12).all()
+
+
+def testSparseCubeMatchesDense(sample_data):
+    dims = ["Year", "Color", "Model"]
+    dense = Cube(sample_data, dims)(sample_data[["Sale"]])
+    cube = Cube(sample_data, dims, sparse=True)
+
+    # Every input row contributes to 2^k cells.
+    assert cube.cube.nnz == len(sample_data) * 2 ** len(dims)
+
+    sales = cube(sample_data[["Sale"]])
+    assert sales.index.names == dims
+    pd.testing.assert_frame_equal(sales, dense.loc[sales.index])
+
+    # Cells dropped from the sparse cube are empty in the dense cube.
+    assert (dense.drop(index=sales.index)["Sale"] == 0).all()
+    assert sales.loc[(_INTERNAL_MARGINAL,) * 3, "Sale"] == 270
+
+
+@pytest.mark.parametrize("grouping_sets", [None, [()]])
+@pytest.mark.parametrize("sparse", [False, True])
+def testLatticeCubeMatchesMatrix(sample_data, grouping_sets, sparse):
+    dims = ["Year", "Color", "Model"]
+    kwargs = {"grouping_sets": grouping_sets}
+    matrix = Cube(sample_data, dims, sparse=sparse, **kwargs)(sample_data[["Sale"]])
+    lattice = Cube(sample_data, dims, strategy=CubeStrategy.LATTICE, **kwargs)(
+        sample_data[["Sale"]]
+    )
+    if not sparse:
+        # The dense cube also holds empty cells.
+        matrix = matrix.loc[lattice.index]
+    pd.testing.assert_frame_equal(lattice, matrix)
+
+
+def testLatticeCubeMissingValues(sample_data):
+    sample_data.loc[0, "Color"] = None
+    cube = Cube(sample_data, ["Color", "Model"], strategy=CubeStrategy.LATTICE)
+    sales = cube(sample_data[["Sale"]])
+
+    assert sales.loc[(_INTERNAL_MARGINAL, "Chevy"), "Sale"] == 92
+    assert sales.loc[(_INTERNAL_MARGINAL, _INTERNAL_MARGINAL), "Sale"] == 270
+    assert sales.xs("Chevy", level="Model")["Sale"].sum() == 87 + 92
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"sparse": True}, {"strategy": CubeStrategy.LATTICE}],
+)
+def testCubeGroupingSets(sample_data, kwargs):
+    dims = ["Year", "Color", "Model"]
+    full = Cube(sample_data, dims, sparse=True)(sample_data[["Sale"]])
+    cube = Cube(sample_data, dims, grouping_sets=GroupingSets.rollup(dims), **kwargs)
+    sales = cube(sample_data[["Sale"]])
+    sales = sales[sales["Sale"] != 0]
+
+    # Only prefixes of the hierarchy are kept.
+    marginal = sales.index.to_frame() == _INTERNAL_MARGINAL
+    assert {tuple(row) for row in marginal.to_numpy()} == {
+        (False, False, False),
+        (False, False, True),
+        (False, True, True),
+        (True, True, True),
+    }
+    pd.testing.assert_frame_equal(sales, full.loc[sales.index])
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"sparse": True}, {"strategy": CubeStrategy.LATTICE}],
+)
+def testCubeMinCount(sample_data, kwargs):
+    dims = ["Year", "Model"]
+    cube = Cube(sample_data, dims, min_count=2, **kwargs)
+    sales = cube(sample_data[["Sale"]])
+    assert list(sales.index) == [
+        (1990, "Chevy"),
+        (1990, "Ford"),
+        (1990, _INTERNAL_MARGINAL),
+        (1991, "Ford"),
+        (1991, _INTERNAL_MARGINAL),
+        (_INTERNAL_MARGINAL, "Chevy"),
+        (_INTERNAL_MARGINAL, "Ford"),
+        (_INTERNAL_MARGINAL, _INTERNAL_MARGINAL),
+    ]
+
+    counted = sample_data.assign(n=1)
+    cube = Cube(counted, dims, min_count=4, count_column="n", **kwargs)
+    assert list(cube(counted[["Sale", "n"]])["n"]) == [4, 4, 6]
+
+
+def testGroupingSetsPresets():
+    dims = ["A", "B", "C"]
+    assert len(GroupingSets.cube(dims)) == 8
+    assert GroupingSets.rollup(dims).sets == (("A", "B", "C"), ("A", "B"), ("A",), ())
+    assert GroupingSets.up_to_order(dims, 1).sets == (("A",), ("B",), ("C",), ())
+    assert GroupingSets((("A", "B"),)).with_total().sets == (("A", "B"), ())
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def testCubeArray(sample_data, sparse):
+    dims = ["Year", "Model"]
+    cube = Cube(sample_data, dims, sparse=sparse)
+    frame = cube(sample_data[["Sale"]])
+    sales = cube.array(sample_data[["Sale"]])
+
+    assert sales.is_dense != sparse
+    assert sales.shape == (3, 3)
+    assert sales.get("Sale", 1990, "Ford") == 163
+    assert sales.get("Sale", _INTERNAL_MARGINAL, "Chevy") == 92
+    assert sales.total("Sale") == 270
+    assert (sales.ratio_to_total("Sale") * 270 == sales["Sale"]).all()
+    assert list(sales.marginal("Sale", ["Year"])) == [255, 15, 270]
+    pd.testing.assert_frame_equal(
+        sales.to_frame(), frame.loc[sales.to_frame().index], check_index_type=False
+    )
+
+
+def testWideLatticeCube():
+    # The product of the cardinalities, 201**9, exceeds 64 bits.
+    rng = np.random.default_rng(0)
+    dims = [f"d{i}" for i in range(9)]
+    data = pd.DataFrame({d: rng.integers(0, 200, 5000) for d in dims})
+    data["x"] = 1
+    gsets = GroupingSets.up_to_order(dims, 2)
+    cube = Cube(data, dims, strategy=CubeStrategy.LATTICE, grouping_sets=gsets)
+    counts = cube.array(data[["x"]])
+
+    assert not counts.is_dense
+    assert counts.total("x") == len(data)
+    assert (
+        counts.marginal("x", ["d0"])[:-1] == data["d0"].value_counts().sort_index()
+    ).all()
+    pair = data.groupby(["d3", "d7"]).size()
+    (d3, d7), n = next(iter(pair.items()))
+    margins = [_INTERNAL_MARGINAL] * 9
+    margins[3], margins[7] = d3, d7
+    assert counts.get("x", *margins) == n
+    assert len(counts.finest("x")) == 0
+
+    doubled = counts.add(counts)
+    assert doubled.total("x") == 2 * len(data)
+    assert (doubled["x"] == 2 * counts["x"]).all()
+    assert len(counts.to_frame()) == len(counts)
+
+
+def testWideSparseCubeMatchesLattice():
+    rng = np.random.default_rng(0)
+    dims = [f"d{i}" for i in range(9)]
+    data = pd.DataFrame({d: rng.integers(0, 200, 500) for d in dims})
+    data["x"] = rng.random(len(data))
+    gsets = GroupingSets.up_to_order(dims, 2)
+    sparse = Cube(data, dims, sparse=True, grouping_sets=gsets)(data[["x"]])
+    lattice = Cube(data, dims, strategy=CubeStrategy.LATTICE, grouping_sets=gsets)(
+        data[["x"]]
+    )
+    pd.testing.assert_frame_equal(sparse, lattice)
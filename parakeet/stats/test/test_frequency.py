@@ -5,7 +5,7 @@ from pandas import DataFrame
 from pandas.testing import assert_frame_equal
 
 from parakeet.core.order import OrderBy
-from parakeet.stats.frequency import Result
+from parakeet.stats.frequency import OTHER, Result
 
 
 def test_frequency_results_formatting():
@@ -155,3 +155,105 @@ def test_frequency_results_formatting_with_order_by():
     assert_frame_equal(
         result.display(OrderBy.from_str("Percentage desc")).data, expected
     )
+
+
+def test_frequency_top_k():
+    """The top cells are kept by decreasing frequency, and the rest folded."""
+    data = DataFrame(
+        {
+            "A": ["a", "b", "c", "d", "e"],
+            "Frequency": [2, 5, 2, 1, 10],
+            "Percentage": [0.1, 0.25, 0.1, 0.05, 0.5],
+        }
+    )
+    result = Result(data, ["A"]).top(3)
+
+    # Ties are broken by the order of the cells.
+    expected = DataFrame(
+        {
+            "A": ["e", "b", "a", OTHER],
+            "Frequency": [10, 5, 2, 3],
+            "Percentage": [0.5, 0.25, 0.1, 0.15],
+            "Folded": [False, False, False, True],
+        }
+    )
+    assert_frame_equal(result.data, expected)
+    assert_frame_equal(result.top(10).data, expected)
+    assert_frame_equal(
+        Result(data, ["A"]).top(5).data,
+        data.iloc[[4, 1, 0, 2, 3]].reset_index(drop=True),
+    )
+
+    expected = DataFrame(
+        {
+            "A": ["e", OTHER],
+            "Frequency": [10, 10],
+            "Percentage": [0.5, 0.5],
+            "Folded": [False, True],
+        }
+    )
+    assert_frame_equal(result.top(1).data, expected)
+
+
+def test_frequency_display_top_k():
+    """Cumulative columns are only calculated for the rows shown."""
+    data = DataFrame(
+        {
+            "A": ["a", "b", "c", "d"],
+            "Frequency": [4, 1, 3, 2],
+            "Percentage": [0.4, 0.1, 0.3, 0.2],
+        }
+    )
+    result = Result(data, ["A"])
+
+    expected = DataFrame(
+        {
+            "A": ["a", "c", OTHER],
+            "Frequency": [4, 3, 3],
+            "Percentage": [0.4, 0.3, 0.3],
+            "Cumulative Frequency": [4, 7, 10],
+            "Cumulative Percentage": [0.4, 0.7, 1.0],
+        }
+    )
+    assert_frame_equal(result.display(top_k=2).data, expected)
+
+    # Ordering the shown rows keeps the row of other cells last.
+    expected = DataFrame(
+        {
+            "A": ["c", "a", OTHER],
+            "Frequency": [3, 4, 3],
+            "Percentage": [0.3, 0.4, 0.3],
+            "Cumulative Frequency": [3, 7, 10],
+            "Cumulative Percentage": [0.3, 0.7, 1.0],
+        }
+    )
+    assert_frame_equal(
+        result.display(OrderBy.from_str("A desc"), top_k=2).data, expected
+    )
+    assert_frame_equal(result.top(2).display(OrderBy.from_str("A desc")).data, expected)
+
+
+def test_frequency_top_k_other_value():
+    """A real cell labelled like the row of other cells is not folded."""
+    data = DataFrame(
+        {
+            "A": [OTHER, "b", "c"],
+            "Frequency": [5, 3, 2],
+            "Percentage": [0.5, 0.3, 0.2],
+        }
+    )
+    result = Result(data, ["A"])
+    assert_frame_equal(result.top(3).data, data)
+    assert result.merge(result).data["Frequency"].tolist() == [10, 6, 4]
+
+    top = result.top(1)
+    assert top.data["A"].tolist() == [OTHER, OTHER]
+    assert top.top(2).data["Frequency"].tolist() == [5, 5]
+    with pytest.raises(ValueError):
+        top.merge(result)
+
+
+def test_frequency_top_k_negative():
+    data = DataFrame({"A": ["a"], "Frequency": [1], "Percentage": [1.0]})
+    with pytest.raises(ValueError):
+        Result(data, ["A"]).top(-1)
@@ -0,0 +1,63 @@
+"""Test resolution of derived statistics as a computation graph."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from parakeet.stats.cube import _INTERNAL_MARGINAL, CubeArray
+from parakeet.stats.graph import Stat, StatGraph, ratio_to_total
+
+
+@pytest.fixture
+def cube():
+    levels = [pd.Index(["a", "b", _INTERNAL_MARGINAL], name="A")]
+    return CubeArray(levels, {"x": np.array([1, 3, 4]), "y": np.array([2, 2, 4])})
+
+
+@pytest.fixture
+def graph():
+    return StatGraph(
+        [
+            Stat("x"),
+            Stat("y"),
+            Stat("z"),
+            ratio_to_total("x_pct", "x"),
+            Stat("ratio", ("x", "y"), lambda _, x, y: x / y),
+            Stat("double", ("ratio",), lambda _, r: 2 * r),
+        ]
+    )
+
+
+def test_resolve_only_needed_stats(graph):
+    assert [s.name for s in graph.resolve(["double"])] == ["x", "y", "ratio", "double"]
+    assert graph.base(["x_pct"]) == ["x"]
+
+
+def test_evaluate_selects_outputs(graph, cube):
+    result = graph.evaluate(cube, ["double", "x_pct"])
+    assert result.columns == ["double", "x_pct"]
+    assert list(result["double"]) == [1.0, 3.0, 2.0]
+    assert list(result["x_pct"]) == [0.25, 0.75, 1.0]
+
+
+def test_evaluate_custom_stat(graph, cube):
+    calls = []
+
+    def diff(_, x, y):
+        calls.append(1)
+        return x - y
+
+    custom = Stat("diff", ("x", "y"), diff)
+    result = graph.evaluate(cube, [custom, Stat("neg", ("diff",), lambda _, d: -d)])
+    assert list(result["neg"]) == [1, -1, 0]
+    assert len(calls) == 1
+
+
+def test_invalid_graphs(graph, cube):
+    with pytest.raises(ValueError, match="Unknown statistic"):
+        graph.resolve(["missing"])
+    graph.add(Stat("loop", ("loop",), lambda _, x: x))
+    with pytest.raises(ValueError, match="depends on itself"):
+        graph.resolve(["loop"])
+    with pytest.raises(ValueError, match="Missing base statistic"):
+        graph.evaluate(cube, ["z"])
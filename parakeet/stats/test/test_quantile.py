@@ -0,0 +1,80 @@
+"""Test mergeable quantile sketches."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from parakeet.stats.quantile import QuantileSketch
+
+
+@pytest.fixture
+def sample():
+    rng = np.random.default_rng(2)
+    n = 200_000
+    return rng.integers(0, 5, n), rng.lognormal(size=n)
+
+
+def _sketch(group, values, chunk_size=20_000):
+    keys = pd.Index(range(5), name="g")
+    sketch = None
+    for i in range(0, len(values), chunk_size):
+        partial = QuantileSketch.from_values(
+            values[i : i + chunk_size], group[i : i + chunk_size], keys
+        )
+        sketch = partial if sketch is None else sketch.merge(partial)
+    return sketch
+
+
+def test_quantile_rank_error(sample):
+    group, values = sample
+    sketch = _sketch(group, values)
+    assert (sketch.count().to_numpy() == np.bincount(group)).all()
+    assert len(sketch.mean) <= 5 * (sketch.compression / 2 + 2)
+
+    q = np.array([0.001, 0.01, 0.5, 0.99, 0.999])
+    estimates = sketch.quantile(q)
+    for g in range(5):
+        sorted_values = np.sort(values[group == g])
+        ranks = np.searchsorted(sorted_values, estimates.loc[g].to_numpy())
+        assert np.abs(ranks / len(sorted_values) - q).max() < 0.005
+        assert estimates.loc[g, 0.001] >= sorted_values[0]
+
+    assert sketch.quantile([0, 1]).to_numpy().tolist() == [
+        [values[group == g].min(), values[group == g].max()] for g in range(5)
+    ]
+
+
+def test_cdf_and_histogram(sample):
+    group, values = sample
+    sketch = _sketch(group, values)
+    cdf = sketch.cdf([0.5, 1.0, 3.0])
+    for g in range(5):
+        expected = [(values[group == g] <= x).mean() for x in (0.5, 1.0, 3.0)]
+        assert np.allclose(cdf.loc[g], expected, atol=0.005)
+    assert (sketch.cdf([-1.0, 1e9]).to_numpy() == [[0.0, 1.0]] * 5).all()
+
+    histogram = sketch.histogram(4)
+    assert histogram.index.names == ["g", "bin"]
+    assert np.allclose(
+        histogram.groupby(level="g")["frequency"].sum(), np.bincount(group)
+    )
+    assert (histogram["lower"] <= histogram["upper"]).all()
+    assert np.allclose(histogram.xs(1, level="bin")["upper"], sketch.median())
+
+
+def test_small_sketch():
+    sketch = QuantileSketch.from_series(pd.Series([3.0, 1.0, np.nan, 2.0, 4.0]))
+    assert sketch.count().tolist() == [4]
+    assert sketch.median().tolist() == [2.5]
+    assert sketch.quantile([0, 1]).to_numpy().tolist() == [[1.0, 4.0]]
+
+    with pytest.raises(ValueError):
+        sketch.quantile(1.5)
+
+
+def test_merge_disjoint_groups():
+    left = QuantileSketch.from_values([1.0, 2.0], [0, 0], pd.Index(["a"]))
+    right = QuantileSketch.from_values([5.0, 7.0, 9.0], [0, 1, 1], pd.Index(["a", "b"]))
+    merged = left.merge(right)
+    assert merged.keys.tolist() == ["a", "b"]
+    assert merged.median().tolist() == [2.0, 8.0]
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from parakeet.stats.score import (
+    binned_runs,
+    edges_of_sorted,
+    runs,
+    single_stratum,
+    summarize,
+)
+
+
+def test_runs_ties():
+    group = np.array([1, 0, 0, 0, 1, 0])
+    score = np.array([0.5, 0.2, 0.9, 0.2, 0.1, 0.7])
+    label = np.array([1, 1, 0, 0, 0, 1])
+    g, s, p, n = runs(group, score, label)
+    np.testing.assert_array_equal(g, [0, 0, 0, 1, 1])
+    np.testing.assert_array_equal(s, [0.9, 0.7, 0.2, 0.5, 0.1])
+    np.testing.assert_array_equal(p, [0, 1, 1, 1, 0])
+    np.testing.assert_array_equal(n, [1, 0, 1, 0, 1])
+
+
+def test_summarize():
+    # Positives 0.8, 0.4; negatives 0.6, 0.4, 0.2: 4.5 of 6 pairs ordered.
+    score = np.array([0.8, 0.6, 0.4, 0.4, 0.2])
+    label = np.array([1, 0, 1, 0, 0])
+    result = summarize(runs(np.zeros(5, dtype=int), score, label), single_stratum(), [])
+    summary = result.summary.iloc[0]
+    assert summary["count"] == 5 and summary["positives"] == 2
+    assert summary["auc"] == pytest.approx(4.5 / 6)
+    assert summary["gini"] == pytest.approx(0.5)
+    # From 0.8 up: 1/2 positives and no negatives; from 0.4: 2/2 vs 2/3.
+    assert summary["ks"] == pytest.approx(0.5)
+    assert summary["ks_score"] == 0.8
+    assert summary["auc_error"] == 0
+
+    lorenz = result.lorenz()
+    assert len(lorenz) == 101
+    assert lorenz.iloc[0].tolist() == [0, 0]
+    assert lorenz.iloc[-1].tolist() == [1, 1]
+    # 1 of 5 rows holds 1 of 2 positives, interpolated in between.
+    assert lorenz.loc[20, "tpr"] == pytest.approx(0.5)
+    assert lorenz.loc[10, "tpr"] == pytest.approx(0.25)
+    roc = result.roc()
+    assert roc["fpr"].is_monotonic_increasing and roc["tpr"].is_monotonic_increasing
+
+
+def test_summarize_strata():
+    rng = np.random.default_rng(0)
+    n = 3000
+    group = rng.integers(0, 3, n)
+    label = rng.integers(0, 2, n)
+    # The third stratum only has negatives.
+    label[group == 2] = 0
+    score = rng.normal(size=n) + label * (1 + group)
+    keys = pd.Index(["a", "b", "c"], name="A")
+    result = summarize(runs(group, score, label), keys, ["A"], points=11)
+
+    for i, key in enumerate(keys[:2]):
+        alone = summarize(
+            runs(
+                np.zeros(np.sum(group == i), dtype=int),
+                score[group == i],
+                label[group == i],
+            ),
+            single_stratum(),
+            [],
+            points=11,
+        )
+        np.testing.assert_allclose(
+            result.summary.loc[key].to_numpy(), alone.summary.iloc[0].to_numpy()
+        )
+        np.testing.assert_allclose(result.curves.loc[key], alone.curves.loc["__all__"])
+    assert result.summary.loc["a", "auc"] < result.summary.loc["b", "auc"]
+    assert result.summary.loc["c", ["auc", "ks"]].isna().all()
+    assert result.curves.index.names == ["A", "point"]
+
+
+def test_binned_error_bounds():
+    rng = np.random.default_rng(1)
+    n = 20_000
+    group = rng.integers(0, 2, n)
+    label = rng.integers(0, 2, n)
+    score = rng.normal(size=n) + label
+    keys = pd.Index([0, 1])
+    exact = summarize(runs(group, score, label), keys, []).summary
+    edges = edges_of_sorted(np.sort(score), 50)
+    assert len(edges) == 50
+    binned = summarize(
+        binned_runs(group, score, label, edges, 2), keys, [], binned=True
+    ).summary
+    assert (binned["auc_error"] > 0).all() and (binned["auc_error"] < 0.01).all()
+    assert (abs(binned["auc"] - exact["auc"]) <= binned["auc_error"]).all()
+    assert (abs(binned["ks"] - exact["ks"]) <= binned["ks_error"]).all()
+    assert (binned["count"] == exact["count"]).all()
+
+    with pytest.raises(ValueError):
+        edges_of_sorted(np.sort(score), 0)
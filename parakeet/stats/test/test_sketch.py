@@ -0,0 +1,81 @@
+"""Test mergeable sketches."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from parakeet.stats.sketch import (
+    FrequencySketch,
+    HeavyHitters,
+    HyperLogLog,
+    _bit_length,
+    hash_keys,
+)
+
+
+def test_bit_length():
+    values = np.array([0, 1, 2, 3, 255, 256, 2**63, 2**64 - 1], dtype=np.uint64)
+    expected = [int(v).bit_length() for v in values]
+    assert _bit_length(values).tolist() == expected
+
+
+@pytest.mark.parametrize("n", [100, 5000, 200_000])
+def test_hyperloglog(n):
+    hashes = hash_keys(pd.Index(np.arange(n)))
+    sketch = HyperLogLog(precision=12)
+    for part in np.array_split(hashes, 4):
+        sketch.update(part)
+    # Duplicates do not change the estimate.
+    sketch.update(hashes[: n // 2])
+    assert abs(sketch.estimate() - n) <= 4 * sketch.relative_error * n
+
+    left, right = HyperLogLog(12).update(hashes[::2]), HyperLogLog(12).update(
+        hashes[1::2]
+    )
+    assert left.merge(right).estimate() == sketch.estimate()
+
+
+def test_heavy_hitters_bounds():
+    rng = np.random.default_rng(3)
+    values = pd.Series(rng.zipf(1.5, 100_000))
+    truth = values.value_counts()
+
+    partitions = []
+    for start in range(0, len(values), 20_000):
+        summary = HeavyHitters(capacity=50)
+        for chunk in range(start, start + 20_000, 5000):
+            counts = values.iloc[chunk : chunk + 5000].value_counts()
+            summary.update(pd.Index(counts.index), counts.to_numpy())
+        partitions.append(summary)
+    summary = partitions[0]
+    for other in partitions[1:]:
+        summary.merge(other)
+
+    assert summary.n == len(values)
+    assert len(summary.counts) <= 50
+    assert summary.error <= len(values) / 51
+    estimated = pd.Series(summary.counts, index=summary.keys.iloc[:, 0])
+    true = truth.loc[estimated.index]
+    assert (estimated <= true).all() and (estimated >= true - summary.error).all()
+    assert set(truth[truth > summary.error].index) <= set(estimated.index)
+
+
+def test_frequency_sketch_result():
+    counts = pd.Series(
+        [5, 3, 1],
+        index=pd.MultiIndex.from_tuples(
+            [("a", 1), ("b", 2), ("a", 2)], names=["A", "B"]
+        ),
+    )
+    sketch = FrequencySketch(["A", "B"], capacity=10).update(counts)
+    sketch.merge(FrequencySketch(["A", "B"], capacity=10).update(counts.iloc[1:]))
+    result = sketch.result()
+    assert result.estimated and result.error == 0
+    assert result.data["A"].tolist() == ["b", "a", "a"]
+    assert result.data["Frequency"].tolist() == [6, 5, 2]
+    assert result.data["Percentage"].sum() == 1.0
+    assert round(result.distinct) == 3
+    assert "Estimated" in result.display(top_k=2).caption
+
+    with pytest.raises(ValueError):
+        sketch.merge(FrequencySketch(["A"]))